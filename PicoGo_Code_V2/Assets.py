@@ -0,0 +1,82 @@
+"""
+Bitmaps for ST7789.bitmap(), generated by make_assets.py: edit that and
+run it again rather than changing this file.
+"""
+import framebuf
+
+# 97x73, 1 bit, 949 bytes: main.py's "Put me down :(" heart, drawn at (72, 46)
+BROKEN_HEART = (
+    b'\x00\x00\x00\x80\x00\x00\x00\x00\x00\x80\x00\x00\x00'
+    b'\x00\x00\x3f\xfe\x00\x00\x00\x00\x3f\xfe\x00\x00\x00'
+    b'\x00\x01\xff\xff\xc0\x00\x00\x01\xff\xff\xc0\x00\x00'
+    b'\x00\x07\xff\xff\xf0\x00\x00\x07\xff\xff\xf0\x00\x00'
+    b'\x00\x1f\xff\xff\xfc\x00\x00\x1f\xff\xff\xfc\x00\x00'
+    b'\x00\x3f\xff\xff\xfe\x00\x00\x3f\xff\xff\xfe\x00\x00'
+    b'\x00\x7f\xff\xff\xff\x00\x00\x7f\xff\xff\xff\x00\x00'
+    b'\x00\xff\xff\xff\xff\x80\x00\xff\xff\xff\xff\x80\x00'
+    b'\x01\xff\xff\xff\xff\xc0\x01\xff\xff\xff\xff\xc0\x00'
+    b'\x03\xff\xff\xff\xff\xe0\x03\xff\xff\xff\xff\xe0\x00'
+    b'\x07\xff\xff\xff\xff\x00\x07\xff\xff\xff\xff\xf0\x00'
+    b'\x0f\xff\xff\xff\xff\x00\x0f\xff\xff\xff\xff\xf8\x00'
+    b'\x0f\xff\xff\xff\xff\x00\x0f\xff\xff\xff\xff\xf8\x00'
+    b'\x1f\xff\xff\xff\xff\x00\x1f\xff\xff\xff\xff\xfc\x00'
+    b'\x1f\xff\xff\xff\xff\x00\x1f\xff\xff\xff\xff\xfc\x00'
+    b'\x3f\xff\xff\xff\xff\x00\x3f\xff\xff\xff\xff\xfe\x00'
+    b'\x3f\xff\xff\xff\xff\x00\x3f\xff\xff\xff\xff\xfe\x00'
+    b'\x3f\xff\xff\xff\xff\x00\x3f\xff\xff\xff\xff\xfe\x00'
+    b'\x7f\xff\xff\xff\xff\x00\x7f\xff\xff\xff\xff\xff\x00'
+    b'\x7f\xff\xff\xff\xff\x00\x7f\xff\xff\xff\xff\xff\x00'
+    b'\x7f\xff\xff\xff\xff\x00\x7f\xff\xff\xff\xff\xff\x00'
+    b'\x7f\xff\xff\xff\xff\x00\x00\xff\xff\xff\xff\xff\x00'
+    b'\x7f\xff\xff\xff\xff\xff\x00\xff\xff\xff\xff\xff\x00'
+    b'\x7f\xff\xff\xff\xff\xff\x00\xff\xff\xff\xff\xff\x00'
+    b'\xff\xff\xff\xff\xff\xff\x00\xff\xff\xff\xff\xff\x80'
+    b'\x7f\xff\xff\xff\xff\xff\x00\xff\xff\xff\xff\xff\x00'
+    b'\x3f\xff\xff\xff\xff\xff\x00\xff\xff\xff\xff\xfe\x00'
+    b'\x1f\xff\xff\xff\xff\xff\x00\xff\xff\xff\xff\xfc\x00'
+    b'\x0f\xff\xff\xff\xff\xff\x00\xff\xff\xff\xff\xf8\x00'
+    b'\x07\xff\xff\xff\xff\xff\x00\xff\xff\xff\xff\xf0\x00'
+    b'\x03\xff\xff\xff\xff\xff\x00\xff\xff\xff\xff\xe0\x00'
+    b'\x01\xff\xff\xff\xff\xff\x00\xff\xff\xff\xff\xc0\x00'
+    b'\x00\xff\xff\xff\xff\xc0\x00\xff\xff\xff\xff\x80\x00'
+    b'\x00\x7f\xff\xff\xff\xc0\x3f\xff\xff\xff\xff\x00\x00'
+    b'\x00\x3f\xff\xff\xff\xc0\x3f\xff\xff\xff\xfe\x00\x00'
+    b'\x00\x1f\xff\xff\xff\xc0\x3f\xff\xff\xff\xfc\x00\x00'
+    b'\x00\x0f\xff\xff\xff\xc0\x3f\xff\xff\xff\xf8\x00\x00'
+    b'\x00\x07\xff\xff\xff\xc0\x3f\xff\xff\xff\xf0\x00\x00'
+    b'\x00\x03\xff\xff\xff\xc0\x3f\xff\xff\xff\xe0\x00\x00'
+    b'\x00\x01\xff\xff\xff\xc0\x3f\xff\xff\xff\xc0\x00\x00'
+    b'\x00\x00\xff\xff\xff\xc0\x3f\xff\xff\xff\x80\x00\x00'
+    b'\x00\x00\x7f\xff\xff\xc0\x3f\xff\xff\xff\x00\x00\x00'
+    b'\x00\x00\x3f\xff\xff\xc0\x3f\xff\xff\xfe\x00\x00\x00'
+    b'\x00\x00\x1f\xff\xff\xc0\x00\x3f\xff\xfc\x00\x00\x00'
+    b'\x00\x00\x0f\xff\xff\xff\xc0\x3f\xff\xf8\x00\x00\x00'
+    b'\x00\x00\x07\xff\xff\xff\xc0\x3f\xff\xf0\x00\x00\x00'
+    b'\x00\x00\x03\xff\xff\xff\xc0\x3f\xff\xe0\x00\x00\x00'
+    b'\x00\x00\x01\xff\xff\xff\xc0\x3f\xff\xc0\x00\x00\x00'
+    b'\x00\x00\x00\xff\xff\xff\xc0\x3f\xff\x80\x00\x00\x00'
+    b'\x00\x00\x00\x7f\xff\xff\xc0\x3f\xff\x00\x00\x00\x00'
+    b'\x00\x00\x00\x3f\xff\xff\xc0\x3f\xfe\x00\x00\x00\x00'
+    b'\x00\x00\x00\x1f\xff\xff\xc0\x3f\xfc\x00\x00\x00\x00'
+    b'\x00\x00\x00\x0f\xff\xff\xc0\x3f\xf8\x00\x00\x00\x00'
+    b'\x00\x00\x00\x07\xff\xff\xc0\x3f\xf0\x00\x00\x00\x00'
+    b'\x00\x00\x00\x03\xff\xf0\x00\x3f\xe0\x00\x00\x00\x00'
+    b'\x00\x00\x00\x01\xff\xf0\x0f\xff\xc0\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\xff\xf0\x0f\xff\x80\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x7f\xf0\x0f\xff\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x3f\xf0\x0f\xfe\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x1f\xf0\x0f\xfc\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x0f\xf0\x0f\xf8\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x07\xf0\x0f\xf0\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x03\xf0\x0f\xe0\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x01\xf0\x0f\xc0\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\xf0\x0f\x80\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x0f\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\xfe\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\xfc\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\xf8\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\xf0\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\xe0\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\xc0\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x80\x00\x00\x00\x00\x00\x00',
+    97, 73, framebuf.MONO_HLSB)
@@ -0,0 +1,198 @@
+"""
+ST7789 flushes on the RP2040's second core.
+
+    from ST7789 import ST7789
+    from Display import DisplayService
+    lcd = ST7789()
+    DISPLAY = DisplayService(lcd)
+    ...                         # draw into lcd as usual
+    DISPLAY.present()           # instead of lcd.show(); never waits for the SPI transfer
+
+present() copies the rows that changed since the last handoff (lcd's
+damaged rectangles) into a second buffer and flags it for core 1,
+which sends it with lcd.flush() while the control loop carries on. If
+core 1 is still sending the previous frame, present() returns False
+straight away and the frame is dropped; its damage stays with lcd, so
+the next present() that gets through sends the latest picture.
+
+The second buffer takes as much RAM again as lcd.buffer (64,800 bytes
+in RGB565), so create the service right after the ST7789, before the
+heap fragments. While it runs only core 1 talks to the panel: call
+present(), not lcd.show().
+
+RefreshScheduler decides when the control loop should draw a frame at
+all: a target frame rate, and no frame while the loop is behind.
+"""
+import time
+import _thread
+
+from ST7789 import _Rects
+
+IDLE_US = 500       # how often an idle core 1 looks for a new frame
+
+class DisplayService(object):
+    def __init__(self, lcd, start=True):
+        self.lcd = lcd
+        self.front = bytearray(len(lcd.buffer))
+        self.front_view = memoryview(self.front)
+        self.rects = _Rects()       # what to send from front
+        self.ready = False          # set by core 0 once front holds a frame, cleared by core 1 once it's sent
+        self.running = False
+        self.stopped = True
+        self.presented = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.frame_bytes = 0        # sent for the last frame
+        self.flush_us = 0           # time core 1 took for it
+        self.max_flush_us = 0
+        if start:
+            self.start()
+
+    def start(self):
+        """Start the flush loop on core 1"""
+        if self.running:
+            return
+        self.running = True
+        self.stopped = False
+        _thread.start_new_thread(self._run, ())
+
+    def stop(self, timeout_ms=200):
+        """Stop core 1 once the frame it holds is out; False if that took over timeout_ms"""
+        self.running = False
+        start = time.ticks_ms()
+        while not self.stopped:
+            if time.ticks_diff(time.ticks_ms(), start) > timeout_ms:
+                return False
+            time.sleep_ms(1)
+        return True
+
+    def busy(self):
+        """True while core 1 hasn't finished sending the last frame"""
+        return self.ready
+
+    def present(self, wait=False):
+        """
+        Hand what was drawn into lcd since the last handoff to core 1.
+        Returns False without waiting if core 1 is still busy, unless
+        wait=True (for a screen that has to appear before a long pause).
+        """
+        if self.ready:
+            if not wait:
+                self.dropped += 1
+                return False
+            while self.ready:
+                time.sleep_us(IDLE_US)
+        lcd = self.lcd
+        damage = lcd.damage
+        if damage.n == 0:
+            return True
+        # whole rows, so each band is one slice copy
+        stride = lcd.row_bytes
+        front = self.front_view
+        back = lcd.view
+        r = damage.r
+        for i in range(0, 4 * damage.n, 4):
+            start = r[i + 1] * stride
+            end = r[i + 3] * stride
+            front[start:end] = back[start:end]
+        self.rects.copy(damage)
+        damage.clear()
+        self.presented += 1
+        self.ready = True
+        return True
+
+    def _run(self):
+        lcd = self.lcd
+        try:
+            while True:
+                if not self.ready:
+                    if not self.running:
+                        break
+                    time.sleep_us(IDLE_US)
+                    continue
+                start = time.ticks_us()
+                self.frame_bytes = lcd.flush(self.rects, self.front_view)
+                us = time.ticks_diff(time.ticks_us(), start)
+                self.flush_us = us
+                if us > self.max_flush_us:
+                    self.max_flush_us = us
+                self.flushed += 1
+                self.ready = False
+        finally:
+            self.stopped = True
+
+    def report(self, out=print):
+        out("display: %d frames presented, %d dropped, %d sent; last %d bytes in %d us, worst %d us" % (
+            self.presented, self.dropped, self.flushed, self.frame_bytes, self.flush_us, self.max_flush_us))
+
+class RefreshScheduler(object):
+    """
+    Paces screen refreshes separately from the control loop.
+
+        REFRESH = RefreshScheduler(fps=10, budget_us=4000, period_ms=15)
+        while True:
+            REFRESH.tick()
+            ...                         # sensors, motors
+            if REFRESH.due():
+                update_lcd(...)         # SCREEN.update(REFRESH.budget_us), show
+                REFRESH.done()
+
+    due() is True at most fps times a second, and with period_ms only
+    while the loop is on schedule: the last iteration took no longer
+    than period_ms and this one still has budget_us left of it. A frame
+    that comes due while the loop is behind waits for an iteration that
+    isn't; frames missed meanwhile are skipped, not caught up. A branch
+    of the loop that sleeps longer than period_ms on its own (a waiting
+    screen, say) calls due(ignore_behind=True), or it would never be on
+    schedule and never draw.
+    """
+    def __init__(self, fps=10, budget_us=4000, period_ms=None):
+        self.interval_us = 1000000 // fps
+        self.budget_us = budget_us
+        self.period_us = int(period_ms * 1000) if period_ms else 0
+        self.loop_start = None
+        self.behind = False
+        self.next_us = time.ticks_us()
+        self.render_start = 0
+        self.frames = 0
+        self.deferred = 0           # loops where a due frame waited for the loop to catch up
+        self.skipped = 0            # frame slots that passed without a frame
+        self.render_us = 0
+        self.max_render_us = 0
+
+    def tick(self):
+        """Mark the start of a control loop iteration"""
+        now = time.ticks_us()
+        if self.period_us and self.loop_start is not None:
+            self.behind = time.ticks_diff(now, self.loop_start) > self.period_us
+        self.loop_start = now
+
+    def due(self, ignore_behind=False):
+        """True if a frame should be drawn now; call done() once it has been"""
+        now = time.ticks_us()
+        if time.ticks_diff(now, self.next_us) < 0:
+            return False
+        if self.period_us and self.loop_start is not None and not ignore_behind:
+            if self.behind or time.ticks_diff(now, self.loop_start) + self.budget_us > self.period_us:
+                self.deferred += 1
+                return False
+        self.render_start = now
+        return True
+
+    def done(self):
+        now = time.ticks_us()
+        us = time.ticks_diff(now, self.render_start)
+        self.render_us = us
+        if us > self.max_render_us:
+            self.max_render_us = us
+        self.frames += 1
+        nxt = time.ticks_add(self.next_us, self.interval_us)
+        late = time.ticks_diff(now, nxt)
+        if late >= 0:
+            self.skipped += late // self.interval_us + 1
+            nxt = time.ticks_add(now, self.interval_us)
+        self.next_us = nxt
+
+    def report(self, out=print):
+        out("refresh: %d frames, %d skipped, %d loops deferred; last %d us, worst %d us" % (
+            self.frames, self.skipped, self.deferred, self.render_us, self.max_render_us))
@@ -7,12 +7,16 @@ print("\nTRSensor Test Program ...\r\n")
 time.sleep(3)
 M = PicoGo()
 TRS=TRSensor()
-for i in range(100):
-    if(i<25 or i>= 75):
-        M.setMotor(30,-30)
-    else:
-        M.setMotor(-30,30)
-    TRS.calibrate()
+# Only sweep the robot over the line when there is no saved calibration
+if not TRS.calibrated:
+    for i in range(100):
+        if(i<25 or i>= 75):
+            M.setMotor(30,-30)
+        else:
+            M.setMotor(-30,30)
+        TRS.calibrate()
+    M.setMotor(0,0)
+    TRS.save_calibration()
 print("\ncalibrate done\r\n")
 print(TRS.calibratedMin)
 print(TRS.calibratedMax)
@@ -24,7 +28,7 @@ last_proportional = 0
 while True:
     #print(TRS.readCalibrated())
     #print(TRS.readLine())
-    position,Sensors = TRS.readLine()
+    position,Sensors = TRS.readLineFixed()
     #time.sleep(0.1)
     if((Sensors[0] + Sensors[1] + Sensors[2]+ Sensors[3]+ Sensors[4]) > 4000):
         M.setMotor(0,0)
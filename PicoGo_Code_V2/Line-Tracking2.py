@@ -1,8 +1,10 @@
 from machine import Pin, PWM
 from TRSensor import TRSensor
 from Motor import PicoGo
-from ws2812 import NeoPixel
+from ws2812 import NeoPixel, Animator
 from ST7789 import ST7789
+from Display import RefreshScheduler
+from Widgets import Screen, Label, Field
 import time
 
 
@@ -12,8 +14,8 @@ buzzer_pwm = PWM(Pin(4))
 DSR = Pin(2, Pin.IN)
 DSL = Pin(3, Pin.IN)
 
-# Initialize LCD
-lcd = ST7789()
+# Initialize LCD, 4-bit palette mode: 16 KB of buffer instead of 64 KB
+lcd = ST7789(bpp=4)
 lcd.fill(lcd.BLACK)
 lcd.text("Line Tracking", 60, 10, lcd.WHITE)
 lcd.text("Initializing...", 55, 30, lcd.YELLOW)
@@ -93,64 +95,86 @@ lcd.text("Calibrating...", 55, 50, lcd.YELLOW)
 lcd.text("Please wait", 65, 70, lcd.WHITE)
 lcd.show()
 
-for i in range(100):
-    if(i<25 or i>= 75):
-        M.setMotor(30,-30)
-    else:
-        M.setMotor(-30,30)
-    TRS.calibrate()
+# Only sweep the robot over the line when there is no saved calibration
+if not TRS.calibrated:
+    for i in range(100):
+        if(i<25 or i>= 75):
+            M.setMotor(30,-30)
+        else:
+            M.setMotor(-30,30)
+        TRS.calibrate()
+    M.setMotor(0,0)
+    TRS.save_calibration()
 print("\ncalibrate done\r\n")
 print(TRS.calibratedMin)
 print(TRS.calibratedMax)
 print("\ncalibrate done\r\n")
+# Sample the line sensors from a timer from now on; readLineFixed() below
+# just picks up the newest sample instead of waiting on the ADC
+TRS.start_sampling(rate_hz=500)
+# Follow slow drift in the surface, saved whenever we stop at the end of the line
+TRS.track_calibration()
 maximum = 20  # Reduced to 1/5th of original speed (100 -> 20)
 integral = 0
 last_proportional = 0
-j=0
-lcd_update_counter = 0
+derivative = 0
+last_frame = None   # stamp of the sensor sample the derivative was last taken on
+# Rainbow on the LEDs, drawn from a timer so the loop never touches them
+LEDS = Animator(strip)
+LEDS.play("rainbow", period_ms=2000)
+LEDS.start_timer()
 
 # Clear LCD and prepare for tracking
 lcd.fill(lcd.BLACK)
 lcd.text("Line Tracking", 60, 5, lcd.WHITE)
 lcd.show()
 
+# Status screen below the title: widgets redraw only what changed, so show() sends only that.
+# Redrawn at 10 fps, and not while the loop is running late
+SCREEN = Screen(lcd, y=25, h=110)
+REFRESH = RefreshScheduler(fps=10, budget_us=4000, period_ms=20)
+POSITION_FIELD = SCREEN.add(Field(10, 25, "Position: %d", lcd.GREEN))
+SCREEN.add(Label(10, 45, "Sensors:", lcd.YELLOW))
+SENSOR_FIELD = SCREEN.add(Field(10, 60, "%3d %3d %3d %3d %3d", lcd.WHITE))
+STATUS_LABEL = SCREEN.add(Label(10, 80))
+DETAIL_LABEL = SCREEN.add(Label(10, 95))
+SPEED_FIELD = SCREEN.add(Field(10, 115, "Speed: %d", lcd.WHITE))
+
 while True:
-    position,Sensors = TRS.readLine()
+    REFRESH.tick()
+    position,Sensors = TRS.readLineFixed()
     DR_status = DSR.value()
     DL_status = DSL.value()
     
-    # Update LCD every 10 iterations to avoid slowing down
-    lcd_update_counter += 1
-    if lcd_update_counter >= 10:
-        lcd_update_counter = 0
-        lcd.fill_rect(0, 25, 240, 110, lcd.BLACK)
-        
+    # Update LCD when a frame is due and the loop can spare the time
+    if REFRESH.due():
         # Display position
-        lcd.text(f"Position: {position}", 10, 25, lcd.GREEN)
+        POSITION_FIELD.set(position)
         
         # Display sensor values
-        lcd.text("Sensors:", 10, 45, lcd.YELLOW)
-        sensor_str = f"{Sensors[0]:3d} {Sensors[1]:3d} {Sensors[2]:3d} {Sensors[3]:3d} {Sensors[4]:3d}"
-        lcd.text(sensor_str, 10, 60, lcd.WHITE)
+        SENSOR_FIELD.set(tuple(Sensors))
         
         # Display status
         if (Sensors[0] + Sensors[1] + Sensors[2]+ Sensors[3]+ Sensors[4]) > 4000:
-            lcd.text("Status: END LINE", 10, 80, lcd.RED)
+            STATUS_LABEL.set("Status: END LINE", lcd.RED)
+            DETAIL_LABEL.set("")
         elif (DL_status == 0) or (DR_status == 0):
-            lcd.text("Status: OBSTACLE", 10, 80, lcd.RED)
-            lcd.text(f"L:{DL_status} R:{DR_status}", 10, 95, lcd.YELLOW)
+            STATUS_LABEL.set("Status: OBSTACLE", lcd.RED)
+            DETAIL_LABEL.set(f"L:{DL_status} R:{DR_status}", lcd.YELLOW)
         else:
-            lcd.text("Status: TRACKING", 10, 80, lcd.GREEN)
+            STATUS_LABEL.set("Status: TRACKING", lcd.GREEN)
             if position < 1500:
-                lcd.text("Turning LEFT", 10, 95, lcd.GBLUE)
+                DETAIL_LABEL.set("Turning LEFT", lcd.GBLUE)
             elif position > 2500:
-                lcd.text("Turning RIGHT", 10, 95, lcd.GBLUE)
+                DETAIL_LABEL.set("Turning RIGHT", lcd.GBLUE)
             else:
-                lcd.text("Going STRAIGHT", 10, 95, lcd.GBLUE)
+                DETAIL_LABEL.set("Going STRAIGHT", lcd.GBLUE)
         
         # Display speed
-        lcd.text(f"Speed: {maximum}", 10, 115, lcd.WHITE)
+        SPEED_FIELD.set(maximum)
+        SCREEN.update(REFRESH.budget_us)
         lcd.show()
+        REFRESH.done()
     
     # Handle Imperial March playback
     current_time = time.ticks_ms()
@@ -179,6 +203,8 @@ while True:
         buzzer_pwm.duty_u16(0)  # Stop music
         is_playing_note = False
         M.setMotor(0,0)
+        if TRS.calibration_dirty:
+            TRS.save_calibration()
     elif((DL_status == 0) or (DR_status == 0)):
         # Alarm beep overrides music
         buzzer_pwm.freq(800)
@@ -190,11 +216,15 @@ while True:
         proportional = position - 2000
 
         # Compute the derivative (change) and integral (sum) of the position.
-        derivative = proportional - last_proportional
-        #integral += proportional
-
-        # Remember the last position.
-        last_proportional = proportional
+        # The loop outruns the 500 Hz sampler, so only a new sample moves it;
+        # otherwise the D term would be 0 on repeats and spike on new samples.
+        if TRS.frame_ticks != last_frame:
+            derivative = proportional - last_proportional
+            #integral += proportional
+
+            # Remember the last position.
+            last_proportional = proportional
+            last_frame = TRS.frame_ticks
         
         '''
         // Compute the difference between the two motor power settings,
@@ -216,10 +246,3 @@ while True:
             M.setMotor(maximum + power_difference, maximum)
         else:
             M.setMotor(maximum, maximum - power_difference)
-
-    for i in range(strip.num):
-        strip.pixels_set(i, strip.wheel(((i * 256 // strip.num) + j) & 255))
-    strip.pixels_show()
-    j += 1
-    if(j > 256): 
-        j = 0
@@ -1,7 +1,34 @@
 from machine import Pin, PWM
 import time
 
+# Rough conversion between the motor speed (percent duty) and ground
+# speed, for feed-forward control; measure it on your own robot.
+SPEED_DEADBAND = 3      # duty below which the wheels don't turn
+CM_S_PER_SPEED = 0.6    # cm/s per percent above the deadband
+
+def speed_to_cm_s(speed):
+    """Approximate ground speed in cm/s for a motor speed (-100..100)"""
+    if abs(speed) <= SPEED_DEADBAND:
+        return 0.0
+    cm_s = (abs(speed) - SPEED_DEADBAND) * CM_S_PER_SPEED
+    return cm_s if speed > 0 else -cm_s
+
+def cm_s_to_speed(cm_s):
+    """Motor speed (-100..100) for a ground speed in cm/s"""
+    if abs(cm_s) < CM_S_PER_SPEED / 2:
+        return 0
+    speed = min(int(SPEED_DEADBAND + abs(cm_s) / CM_S_PER_SPEED + 0.5), 100)
+    return speed if cm_s > 0 else -speed
+
 class PicoGo(object):
+    """
+    Remembers the level of each direction pin and the duty of each PWM
+    it last wrote and only writes those that change, so control loops
+    can call setMotor()/forward()/... every iteration with the same
+    speeds for free. writes and skipped count the pin and duty writes
+    issued and avoided. Drive the motors only through these methods;
+    after touching the pins or PWMs directly, call forget().
+    """
     def __init__(self):
         self.PWMA = PWM(Pin(16))
         self.PWMA.freq(1000)
@@ -11,69 +38,76 @@ class PicoGo(object):
         self.BIN2 = Pin(20, Pin.OUT)
         self.PWMB = PWM(Pin(21))
         self.PWMB.freq(1000)
+        self.state = [-1] * 6       # last AIN1, AIN2, duty A, BIN1, BIN2, duty B written
+        self.writes = 0
+        self.skipped = 0
         self.stop()
+
+    def forget(self):
+        """Write every output again on the next call"""
+        for i in range(6):
+            self.state[i] = -1
+
+    def _channel(self, i, in1_pin, in2_pin, pwm, in1, in2, duty):
+        state = self.state
+        if state[i] != in1:
+            in1_pin.value(in1)
+            state[i] = in1
+            self.writes += 1
+        else:
+            self.skipped += 1
+        if state[i + 1] != in2:
+            in2_pin.value(in2)
+            state[i + 1] = in2
+            self.writes += 1
+        else:
+            self.skipped += 1
+        if state[i + 2] != duty:
+            pwm.duty_u16(duty)
+            state[i + 2] = duty
+            self.writes += 1
+        else:
+            self.skipped += 1
+
+    def _a(self, in1, in2, speed):
+        self._channel(0, self.AIN1, self.AIN2, self.PWMA, in1, in2, int(speed*0xFFFF/100))
+
+    def _b(self, in1, in2, speed):
+        self._channel(3, self.BIN1, self.BIN2, self.PWMB, in1, in2, int(speed*0xFFFF/100))
             
     def forward(self,speed):
         if((speed >= 0) and (speed <= 100)):
-            self.PWMA.duty_u16(int(speed*0xFFFF/100))
-            self.PWMB.duty_u16(int(speed*0xFFFF/100))
-            self.AIN2.value(1)
-            self.AIN1.value(0)
-            self.BIN2.value(1)
-            self.BIN1.value(0)
+            self._a(0, 1, speed)
+            self._b(0, 1, speed)
         
     def backward(self,speed):
         if((speed >= 0) and (speed <= 100)):
-            self.PWMA.duty_u16(int(speed*0xFFFF/100))
-            self.PWMB.duty_u16(int(speed*0xFFFF/100))
-            self.AIN2.value(0)
-            self.AIN1.value(1)
-            self.BIN2.value(0)
-            self.BIN1.value(1)
+            self._a(1, 0, speed)
+            self._b(1, 0, speed)
 
     def left(self,speed):
         if((speed >= 0) and (speed <= 100)):
-            self.PWMA.duty_u16(int(speed*0xFFFF/100))
-            self.PWMB.duty_u16(int(speed*0xFFFF/100))
-            self.AIN2.value(0)
-            self.AIN1.value(1)
-            self.BIN2.value(1)
-            self.BIN1.value(0)
+            self._a(1, 0, speed)
+            self._b(0, 1, speed)
         
     def right(self,speed):
         if((speed >= 0) and (speed <= 100)):
-            self.PWMA.duty_u16(int(speed*0xFFFF/100))
-            self.PWMB.duty_u16(int(speed*0xFFFF/100))
-            self.AIN2.value(1)
-            self.AIN1.value(0)
-            self.BIN2.value(0)
-            self.BIN1.value(1)
+            self._a(0, 1, speed)
+            self._b(1, 0, speed)
         
     def stop(self):
-        self.PWMA.duty_u16(0)
-        self.PWMB.duty_u16(0)
-        self.AIN2.value(0)
-        self.AIN1.value(0)
-        self.BIN2.value(0)
-        self.BIN1.value(0)
+        self._a(0, 0, 0)
+        self._b(0, 0, 0)
 
     def setMotor(self, left, right):
         if((left >= 0) and (left <= 100)):
-            self.AIN1.value(0)
-            self.AIN2.value(1)
-            self.PWMA.duty_u16(int(left*0xFFFF/100))
+            self._a(0, 1, left)
         elif((left < 0) and (left >= -100)):
-            self.AIN1.value(1)
-            self.AIN2.value(0)
-            self.PWMA.duty_u16(-int(left*0xFFFF/100))
+            self._a(1, 0, -left)
         if((right >= 0) and (right <= 100)):
-            self.BIN2.value(1)
-            self.BIN1.value(0)
-            self.PWMB.duty_u16(int(right*0xFFFF/100))
+            self._b(0, 1, right)
         elif((right < 0) and (right >= -100)):
-            self.BIN2.value(0)
-            self.BIN1.value(1)
-            self.PWMB.duty_u16(-int(right*0xFFFF/100))
+            self._b(1, 0, -right)
 
 if __name__=='__main__':
     import utime
@@ -0,0 +1,203 @@
+"""
+Per-stage loop profiler on time.ticks_us.
+
+    from Profiler import LoopProfiler
+    PROF = LoopProfiler(("sensors", "lcd", "leds", "motors"), period_ms=10)
+    update_lcd = PROF.timed("lcd")(update_lcd)
+    PROF.wrap(strip, ("pixels_show",), "leds")
+
+    while True:
+        PROF.tick()
+        with PROF.stage("sensors"):
+            values = TRS.AnalogRead()
+        ...
+
+tick() marks the start of each loop iteration; the time between two
+ticks is the "loop" row and is checked against period_ms for overruns.
+Each stage keeps count/total/min/max and a log-scale histogram (four
+buckets per octave) for the p99 in preallocated arrays, so recording a
+sample does not allocate. Everything record() reads or writes stays
+below 2**30, MicroPython's small-int limit: totals carry whole seconds
+into a second array instead of growing past it.
+
+Profiling is off unless enabled=True is passed or the module-level
+ENABLED is set before the profiler is created. A disabled profiler
+hands back one shared do-nothing context manager, leaves functions
+undecorated and returns straight out of tick(), so the hooks can stay
+in the scripts.
+"""
+import time
+from array import array
+
+ENABLED = False
+BUCKETS = 92        # covers samples up to ~16 s, longer ones land in the last bucket
+LOOP = "loop"
+SMALL_MAX = (1 << 30) - 1   # largest small int; above it MicroPython allocates
+
+instances = []      # every profiler created, for host tools to report on
+
+def _bucket(us):
+    e = 0
+    while us >= 8:
+        us >>= 1
+        e += 1
+    if e == 0:
+        return us
+    i = (e << 2) + us
+    return i if i < BUCKETS else BUCKETS - 1
+
+def _bucket_top(i):
+    """Largest sample that lands in bucket i"""
+    if i < 8:
+        return i
+    e = (i >> 2) - 1
+    return (((i & 3) + 5) << e) - 1
+
+class _NullStage(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullStage()
+
+class _Stage(object):
+    def __init__(self, prof, index):
+        self.prof = prof
+        self.index = index
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.ticks_us()
+        return self
+
+    def __exit__(self, *exc):
+        self.prof.record(self.index, time.ticks_diff(time.ticks_us(), self.start))
+        return False
+
+class LoopProfiler(object):
+    def __init__(self, stages, period_ms=None, enabled=None, report_every=0):
+        self.enabled = ENABLED if enabled is None else enabled
+        self.names = (LOOP,) + tuple(stages)
+        self.period_us = int(period_ms * 1000) if period_ms else 0
+        self.report_every = report_every
+        n = len(self.names)
+        self.count = array('L', [0] * n)
+        self.total = array('L', [0] * n)       # microseconds below a second
+        self.total_s = array('L', [0] * n)     # and whole seconds
+        self.min = array('L', [0] * n)
+        self.max = array('L', [0] * n)
+        self.hist = array('L', [0] * (n * BUCKETS))
+        self.overruns = 0
+        self.worst_overrun = 0
+        self.last_tick = None
+        self._stages = {}
+        for i in range(1, n):
+            self._stages[self.names[i]] = _Stage(self, i)
+        self.reset()
+        instances.append(self)
+
+    def reset(self):
+        for i in range(len(self.names)):
+            self.count[i] = 0
+            self.total[i] = 0
+            self.total_s[i] = 0
+            self.min[i] = SMALL_MAX
+            self.max[i] = 0
+        for i in range(len(self.hist)):
+            self.hist[i] = 0
+        self.overruns = 0
+        self.worst_overrun = 0
+        self.last_tick = None
+
+    def record(self, index, us):
+        """Add one sample of `us` microseconds to stage `index` (0 is the loop)"""
+        if us < 0:
+            us = 0
+        self.count[index] += 1
+        total = self.total[index] + us
+        if total >= 1000000:
+            secs = total // 1000000
+            self.total_s[index] += secs
+            total -= secs * 1000000
+        self.total[index] = total
+        if us < self.min[index]:
+            self.min[index] = us
+        if us > self.max[index]:
+            self.max[index] = us
+        self.hist[index * BUCKETS + _bucket(us)] += 1
+
+    def stage(self, name):
+        """Context manager timing the block it wraps as stage `name`"""
+        if not self.enabled:
+            return _NULL
+        return self._stages[name]
+
+    def timed(self, name):
+        """Decorator timing every call of the function as stage `name`"""
+        if not self.enabled:
+            return lambda f: f
+        stage = self._stages[name]
+
+        def decorate(f):
+            def wrapper(*args, **kwargs):
+                with stage:
+                    return f(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def wrap(self, obj, methods, name):
+        """Time the named methods of one object (e.g. a driver instance) as stage `name`"""
+        if not self.enabled:
+            return
+        decorate = self.timed(name)
+        for method in methods:
+            setattr(obj, method, decorate(getattr(obj, method)))
+
+    def tick(self):
+        """Call once at the top of every loop iteration"""
+        if not self.enabled:
+            return
+        now = time.ticks_us()
+        if self.last_tick is not None:
+            us = time.ticks_diff(now, self.last_tick)
+            self.record(0, us)
+            if self.period_us and us > self.period_us:
+                self.overruns += 1
+                if us - self.period_us > self.worst_overrun:
+                    self.worst_overrun = us - self.period_us
+            if self.report_every and self.count[0] % self.report_every == 0:
+                self.report()
+                now = time.ticks_us()  # don't bill the report to the next iteration
+        self.last_tick = now
+
+    def percentile(self, index, fraction=0.99):
+        """Upper bound of the given percentile of stage `index`, in microseconds"""
+        n = self.count[index]
+        if n == 0:
+            return 0
+        want = n - int(n * (1 - fraction))
+        seen = 0
+        base = index * BUCKETS
+        for i in range(BUCKETS):
+            seen += self.hist[base + i]
+            if seen >= want:
+                return min(_bucket_top(i), self.max[index])
+        return self.max[index]
+
+    def report(self, out=print):
+        if not self.enabled:
+            return
+        out("%-10s %7s %8s %8s %8s %8s  (us)" % ("stage", "n", "min", "avg", "max", "p99"))
+        for i in range(len(self.names)):
+            n = self.count[i]
+            if n == 0:
+                out("%-10s %7d" % (self.names[i], 0))
+                continue
+            total = self.total_s[i] * 1000000 + self.total[i]
+            out("%-10s %7d %8d %8d %8d %8d" % (self.names[i], n, self.min[i],
+                total // n, self.max[i], self.percentile(i)))
+        if self.period_us:
+            out("overruns: %d of %d loops over %d us, worst by %d us" % (
+                self.overruns, self.count[0], self.period_us, self.worst_overrun))
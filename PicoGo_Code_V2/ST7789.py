@@ -1,11 +1,158 @@
 from machine import Pin,SPI
+import machine
 import framebuf
 import time
+import sys
+from array import array
+try:
+    from rp2 import DMA
+except ImportError:
+    DMA = None          # firmware without rp2.DMA: start_show() sends from the CPU
 
-class ST7789(framebuf.FrameBuffer):
+# The 240x135 panel sits at (40, 53) in the controller's 320x240 RAM
+COL_OFFSET = 40
+ROW_OFFSET = 53
+WINDOW_BYTES = 11       # CASET + RASET + RAMWR and their parameters, sent per rectangle
+MAX_RECTS = 8           # damaged rectangles kept apart; more get merged
+MERGE_SLACK = 256       # px of undamaged area worth sending to save a rectangle (and its window setup)
+WIDEN_PX = 16           # rectangles this close to full width go out whole, in one write
+LINE_BYTES = 3840       # RGB565 line buffer a palette-mode show() expands pixels into (8 full rows)
+FORMATS = {16: framebuf.RGB565, 8: framebuf.GS8, 4: framebuf.GS4_HMSB}
+
+# SPI1 registers and its TX DREQ, for start_show()'s DMA transfers
+if "RP2350" in getattr(sys.implementation, "_machine", ""):
+    SPI1_BASE = 0x40088000
+    DREQ_SPI1_TX = 26
+else:
+    SPI1_BASE = 0x40040000
+    DREQ_SPI1_TX = 18
+SSPDR = 0x08
+SSPSR = 0x0C
+SSPSR_BSY = 0x10
+
+# Power-on sequence: opcode, parameter count, parameters
+INIT = bytes((
+    0x36, 1, 0x70,                      # MADCTL: landscape
+    0x3A, 1, 0x05,                      # COLMOD: RGB565
+    0xB2, 5, 0x0C, 0x0C, 0x00, 0x33, 0x33,  # PORCTRL
+    0xB7, 1, 0x35,                      # GCTRL
+    0xBB, 1, 0x19,                      # VCOMS
+    0xC0, 1, 0x2C,                      # LCMCTRL
+    0xC2, 1, 0x01,                      # VDVVRHEN
+    0xC3, 1, 0x12,                      # VRHS
+    0xC4, 1, 0x20,                      # VDVS
+    0xC6, 1, 0x0F,                      # FRCTRL2: 60 Hz
+    0xD0, 2, 0xA4, 0xA1,                # PWCTRL1
+    0xE0, 14, 0xD0, 0x04, 0x0D, 0x11, 0x13, 0x2B, 0x3F,    # PVGAMCTRL
+              0x54, 0x4C, 0x18, 0x0D, 0x0B, 0x1F, 0x23,
+    0xE1, 14, 0xD0, 0x04, 0x0C, 0x11, 0x13, 0x2C, 0x3F,    # NVGAMCTRL
+              0x44, 0x51, 0x2F, 0x1F, 0x1F, 0x20, 0x23,
+    0x21, 0,                            # INVON
+    0x11, 0,                            # SLPOUT
+    0x29, 0,                            # DISPON
+))
+
+class _Rects(object):
+    """
+    Up to MAX_RECTS rectangles (x0, y0, x1, y1, ends exclusive) in a
+    preallocated array. A new rectangle is merged with the one whose
+    bounding box grows least if that costs under MERGE_SLACK pixels, or
+    unconditionally once the array is full.
+    """
     def __init__(self):
+        self.r = array('h', [0] * (4 * MAX_RECTS))
+        self.n = 0
+
+    def clear(self):
+        self.n = 0
+
+    def full(self, w, h):
+        self.r[0] = 0
+        self.r[1] = 0
+        self.r[2] = w
+        self.r[3] = h
+        self.n = 1
+
+    def add(self, x0, y0, x1, y1):
+        r = self.r
+        while self.n:
+            area = (x1 - x0) * (y1 - y0)
+            best = -1
+            best_cost = 0
+            for i in range(0, 4 * self.n, 4):
+                u0 = min(x0, r[i])
+                v0 = min(y0, r[i + 1])
+                u1 = max(x1, r[i + 2])
+                v1 = max(y1, r[i + 3])
+                cost = (u1 - u0) * (v1 - v0) - area - (r[i + 2] - r[i]) * (r[i + 3] - r[i + 1])
+                if best < 0 or cost < best_cost:
+                    best = i
+                    best_cost = cost
+            if best_cost > MERGE_SLACK and self.n < MAX_RECTS:
+                break
+            # take rectangle `best` out and go round again with the union
+            x0 = min(x0, r[best])
+            y0 = min(y0, r[best + 1])
+            x1 = max(x1, r[best + 2])
+            y1 = max(y1, r[best + 3])
+            self.n -= 1
+            last = 4 * self.n
+            for k in range(4):
+                r[best + k] = r[last + k]
+        i = 4 * self.n
+        r[i] = x0
+        r[i + 1] = y0
+        r[i + 2] = x1
+        r[i + 3] = y1
+        self.n += 1
+
+    def copy(self, other):
+        self.r[:] = other.r
+        self.n = other.n
+
+    def merge(self, other):
+        r = other.r
+        for i in range(0, 4 * other.n, 4):
+            self.add(r[i], r[i + 1], r[i + 2], r[i + 3])
+
+class ST7789(framebuf.FrameBuffer):
+    """
+    Drawing calls record the area they touch, and show() only sends
+    those rectangles (coalesced) through a CASET/RASET window. A fill()
+    with the same colour as the last one only damages what was drawn
+    since then, so code that clears and redraws everything each frame
+    still sends little more than the text and shapes on screen. Call
+    invalidate() after writing to lcd.buffer directly.
+
+    frame_bytes is what the last show() sent, window setup included; a
+    full frame is 64,800 bytes of pixels.
+
+    start_show() sends the same damage by DMA and returns at once, so
+    sensors and motors can be serviced while the pixels go out; busy()
+    and wait() tell when it's done. While a transfer is still going,
+    start_show() sends nothing and returns False, and the damage waits
+    for the next call. Each damaged band of rows goes out
+    whole (DMA needs contiguous memory), one after the other from the
+    channel's completion interrupt. Drawing meanwhile is safe: it is
+    recorded as damage for the next frame, though part of it may make
+    it into this one. Without rp2.DMA, or with no free channel,
+    start_show() is show().
+
+    ST7789(bpp=8) or ST7789(bpp=4) keeps a palette-indexed buffer
+    (framebuf.GS8, GS4_HMSB) of 32,400 or 16,200 bytes instead of the
+    64,800-byte RGB565 one. Drawing colours are then palette indices:
+    lcd.WHITE, lcd.RED and the rest already are, and color(0x07E0) gives
+    (or adds) the index of any other RGB565 value, up to 256 or 16.
+    show() expands the damaged rectangles to RGB565 with one palette
+    blit per LINE_BYTES of pixels and sends each as it is done. There is
+    no DMA in this mode: start_show() is show().
+    """
+    def __init__(self, bpp=16):
         self.width = 240
         self.height = 135
+        if bpp not in FORMATS:
+            raise ValueError("bpp must be 16, 8 or 4")
+        self.bpp = bpp
         
         self.rst = Pin(12,Pin.OUT)
         self.bl = Pin(13,Pin.OUT)
@@ -18,30 +165,77 @@ class ST7789(framebuf.FrameBuffer):
         self.spi = SPI(1,10000_000,polarity=0, phase=0,sck=Pin(10),mosi=Pin(11),miso=None)
         self.dc = Pin(8,Pin.OUT)
         self.dc(1)
-        self.buffer = bytearray(self.height * self.width * 2)
-        super().__init__(self.buffer, self.width, self.height, framebuf.RGB565)
+        self.buffer = bytearray(self.height * self.width * bpp // 8)
+        self.view = memoryview(self.buffer)
+        self.row_bytes = self.width * bpp // 8  # buffer bytes per row
+        self.palette = framebuf.FrameBuffer(bytearray(4), 2, 1, framebuf.RGB565)   # bitmap()'s two colours
+        self.op = bytearray(1)          # opcode of the command being sent
+        self.params = bytearray(4)      # CASET/RASET parameters, rewritten per window
+        self.init_params = memoryview(INIT)
+        super().__init__(self.buffer, self.width, self.height, FORMATS[bpp])
+        if bpp < 16:
+            self.colors = framebuf.FrameBuffer(bytearray(2 << bpp), 1 << bpp, 1, framebuf.RGB565)  # index -> RGB565
+            self.ncolors = 0
+            self.line = bytearray(LINE_BYTES)
+            self.line_view = memoryview(self.line)
+            self.source = self           # the palette blits' source, remade when flushing another buffer
+            self.source_view = self.view
+        self.damage = _Rects()      # to send at the next show()
+        self.drawn = _Rects()       # drawn since the last fill(), erased by the next one
+        self.clear_color = None     # colour of the last fill()
+        self.frame_bytes = 0
+        self.frames = 0
+        self.total_bytes = 0
+        self.dma = None             # claimed by the first start_show()
+        self.bands = array('h', [0] * (2 * MAX_RECTS))     # row ranges start_show() is sending
+        self.nbands = 0
+        self.band = 0               # next one to start
+        self.sending = False
+        self.invalidate()
         self.init_display()
         
-        self.WHITE  =   0xFFFF
-        self.BLACK  =  0x0000
-        self.GREEN  =  0x001F
-        self.RED    =  0xF800
-        self.BLUE   = 0xFF00
-        self.GBLUE = 0X07FF
-        self.YELLOW = 0xFFE0
+        self.BLACK  =  self.color(0x0000)   # first, so a zeroed palette-mode buffer is black
+        self.WHITE  =  self.color(0xFFFF)
+        self.GREEN  =  self.color(0x001F)
+        self.RED    =  self.color(0xF800)
+        self.BLUE   = self.color(0xFF00)
+        self.GBLUE = self.color(0X07FF)
+        self.YELLOW = self.color(0xFFE0)
+
+    def color(self, c):
+        """The drawing colour for RGB565 value c: c itself, or in palette mode its index"""
+        if self.bpp == 16:
+            return c
+        colors = self.colors
+        for i in range(self.ncolors):
+            if colors.pixel(i, 0) == c:
+                return i
+        if self.ncolors == 1 << self.bpp:
+            raise ValueError("palette full")
+        i = self.ncolors
+        colors.pixel(i, 0, c)
+        self.ncolors += 1
+        return i
         
-    def write_cmd(self, cmd):
-        self.cs(1)
+    def command(self, cmd, params=None):
+        """Send opcode cmd followed by the bytes in params, all in one CS transaction"""
+        self.op[0] = cmd
         self.dc(0)
         self.cs(0)
-        self.spi.write(bytearray([cmd]))
+        self.spi.write(self.op)
+        if params:
+            self.dc(1)
+            self.spi.write(params)
         self.cs(1)
 
+    def write_cmd(self, cmd):
+        self.command(cmd)
+
     def write_data(self, buf):
-        self.cs(1)
+        self.op[0] = buf
         self.dc(1)
         self.cs(0)
-        self.spi.write(bytearray([buf]))
+        self.spi.write(self.op)
         self.cs(1)
 
     def init_display(self):
@@ -49,104 +243,321 @@ class ST7789(framebuf.FrameBuffer):
         self.rst(1)
         self.rst(0)
         self.rst(1)
-        
-        self.write_cmd(0x36)
-        self.write_data(0x70)
-
-        self.write_cmd(0x3A) 
-        self.write_data(0x05)
-
-        self.write_cmd(0xB2)
-        self.write_data(0x0C)
-        self.write_data(0x0C)
-        self.write_data(0x00)
-        self.write_data(0x33)
-        self.write_data(0x33)
-
-        self.write_cmd(0xB7)
-        self.write_data(0x35) 
-
-        self.write_cmd(0xBB)
-        self.write_data(0x19)
-
-        self.write_cmd(0xC0)
-        self.write_data(0x2C)
-
-        self.write_cmd(0xC2)
-        self.write_data(0x01)
-
-        self.write_cmd(0xC3)
-        self.write_data(0x12)   
-
-        self.write_cmd(0xC4)
-        self.write_data(0x20)
-
-        self.write_cmd(0xC6)
-        self.write_data(0x0F) 
-
-        self.write_cmd(0xD0)
-        self.write_data(0xA4)
-        self.write_data(0xA1)
-
-        self.write_cmd(0xE0)
-        self.write_data(0xD0)
-        self.write_data(0x04)
-        self.write_data(0x0D)
-        self.write_data(0x11)
-        self.write_data(0x13)
-        self.write_data(0x2B)
-        self.write_data(0x3F)
-        self.write_data(0x54)
-        self.write_data(0x4C)
-        self.write_data(0x18)
-        self.write_data(0x0D)
-        self.write_data(0x0B)
-        self.write_data(0x1F)
-        self.write_data(0x23)
-
-        self.write_cmd(0xE1)
-        self.write_data(0xD0)
-        self.write_data(0x04)
-        self.write_data(0x0C)
-        self.write_data(0x11)
-        self.write_data(0x13)
-        self.write_data(0x2C)
-        self.write_data(0x3F)
-        self.write_data(0x44)
-        self.write_data(0x51)
-        self.write_data(0x2F)
-        self.write_data(0x1F)
-        self.write_data(0x1F)
-        self.write_data(0x20)
-        self.write_data(0x23)
-        
-        self.write_cmd(0x21)
 
-        self.write_cmd(0x11)
+        table = self.init_params
+        i = 0
+        while i < len(table):
+            n = table[i + 1]
+            self.command(table[i], table[i + 2:i + 2 + n])
+            i += 2 + n
 
-        self.write_cmd(0x29)
+    # -- damage tracking ------------------------------------------------
 
-    def show(self):
-        self.write_cmd(0x2A)
-        self.write_data(0x00)
-        self.write_data(0x28)
-        self.write_data(0x01)
-        self.write_data(0x17)
-        
-        self.write_cmd(0x2B)
-        self.write_data(0x00)
-        self.write_data(0x35)
-        self.write_data(0x00)
-        self.write_data(0xBB)
-        
-        self.write_cmd(0x2C)
-        
+    def invalidate(self):
+        """Send the whole buffer at the next show()"""
+        self.damage.full(self.width, self.height)
+        self.drawn.full(self.width, self.height)
+        self.clear_color = None
+
+    def _mark(self, x0, y0, x1, y1):
+        x0 = max(x0, 0)
+        y0 = max(y0, 0)
+        x1 = min(x1, self.width)
+        y1 = min(y1, self.height)
+        if x0 < x1 and y0 < y1:
+            self.damage.add(x0, y0, x1, y1)
+            self.drawn.add(x0, y0, x1, y1)
+
+    def _cleared(self, c):
+        if c == self.clear_color:
+            self.damage.merge(self.drawn)   # only what was drawn on top has changed
+        else:
+            self.damage.full(self.width, self.height)
+        self.drawn.clear()
+        self.clear_color = c
+
+    def fill(self, c):
+        super().fill(c)
+        self._cleared(c)
+
+    def fill_rect(self, x, y, w, h, c):
+        super().fill_rect(x, y, w, h, c)
+        if x <= 0 and y <= 0 and x + w >= self.width and y + h >= self.height:
+            self._cleared(c)
+        else:
+            self._mark(x, y, x + w, y + h)
+
+    def pixel(self, x, y, c=None):
+        if c is None:
+            return super().pixel(x, y)
+        super().pixel(x, y, c)
+        self._mark(x, y, x + 1, y + 1)
+
+    def hline(self, x, y, w, c):
+        super().hline(x, y, w, c)
+        self._mark(x, y, x + w, y + 1)
+
+    def vline(self, x, y, h, c):
+        super().vline(x, y, h, c)
+        self._mark(x, y, x + 1, y + h)
+
+    def line(self, x1, y1, x2, y2, c):
+        super().line(x1, y1, x2, y2, c)
+        self._mark(min(x1, x2), min(y1, y2), max(x1, x2) + 1, max(y1, y2) + 1)
+
+    def rect(self, x, y, w, h, c, f=False):
+        super().rect(x, y, w, h, c, f)
+        self._mark(x, y, x + w, y + h)
+
+    def ellipse(self, x, y, xr, yr, c, f=False, m=0xF):
+        super().ellipse(x, y, xr, yr, c, f, m)
+        self._mark(x - xr, y - yr, x + xr + 1, y + yr + 1)
+
+    def poly(self, x, y, coords, c, f=False):
+        super().poly(x, y, coords, c, f)
+        x0 = x1 = coords[0]
+        y0 = y1 = coords[1]
+        for i in range(2, len(coords), 2):
+            x0 = min(x0, coords[i])
+            x1 = max(x1, coords[i])
+            y0 = min(y0, coords[i + 1])
+            y1 = max(y1, coords[i + 1])
+        self._mark(x + x0, y + y0, x + x1 + 1, y + y1 + 1)
+
+    def text(self, s, x, y, c=1):
+        super().text(s, x, y, c)
+        self._mark(x, y, x + 8 * len(s), y + 8)
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if palette is None:
+            super().blit(fbuf, x, y, key)
+        else:
+            super().blit(fbuf, x, y, key, palette)
+        if isinstance(fbuf, tuple):
+            self._mark(x, y, x + fbuf[1], y + fbuf[2])
+        elif hasattr(fbuf, "width"):
+            self._mark(x, y, x + fbuf.width, y + fbuf.height)
+        else:
+            self.invalidate()   # a plain FrameBuffer doesn't tell us its size
+
+    def bitmap(self, bitmap, x, y, color=None, bg=None, key=-1):
+        """
+        Draw a bitmap from Assets.py (a (data, width, height, format)
+        tuple) with its top left at (x, y), in one blit. A 1-bit bitmap is
+        drawn in color (default WHITE) on bg (default BLACK), or on
+        whatever is there already with key=0. An RGB565 one is copied as it is, except pixels of colour
+        key.
+        """
+        if bitmap[3] == framebuf.RGB565:
+            if self.bpp != 16:
+                raise ValueError("RGB565 bitmap on a palette-mode ST7789")
+            self.blit(bitmap, x, y, key)
+            return
+        if color is None:
+            color = self.WHITE
+        if bg is None:
+            bg = self.BLACK
+        palette = self.palette
+        palette.pixel(0, 0, bg)
+        palette.pixel(1, 0, color)
+        self.blit(bitmap, x, y, key, palette)
+
+    def scroll(self, xstep, ystep):
+        super().scroll(xstep, ystep)
+        self.invalidate()
+
+    # -- flushing -------------------------------------------------------
+
+    def _window(self, x0, y0, x1, y1):
+        """Point RAMWR at the rectangle x0..x1-1, y0..y1-1 of the buffer"""
+        p = self.params
+        x0 += COL_OFFSET
+        x1 += COL_OFFSET - 1
+        p[0] = x0 >> 8
+        p[1] = x0 & 0xFF
+        p[2] = x1 >> 8
+        p[3] = x1 & 0xFF
+        self.command(0x2A, p)
+        y0 += ROW_OFFSET
+        y1 += ROW_OFFSET - 1
+        p[0] = y0 >> 8
+        p[1] = y0 & 0xFF
+        p[2] = y1 >> 8
+        p[3] = y1 & 0xFF
+        self.command(0x2B, p)
+
+    def _flush(self, view, x0, y0, x1, y1):
+        """Send one rectangle of view, returning the bytes it took"""
+        if x1 - x0 >= self.width - WIDEN_PX:
+            x0 = 0
+            x1 = self.width
+        self._window(x0, y0, x1, y1)
+
+        # RAMWR and the pixels in one transaction
+        self.op[0] = 0x2C
+        self.dc(0)
+        self.cs(0)
+        self.spi.write(self.op)
+        self.dc(1)
+        stride = self.width * 2
+        if x1 - x0 == self.width:
+            self.spi.write(view[y0 * stride:y1 * stride])
+        else:
+            start = y0 * stride + x0 * 2
+            n = (x1 - x0) * 2
+            for _ in range(y1 - y0):
+                self.spi.write(view[start:start + n])
+                start += stride
         self.cs(1)
+        return WINDOW_BYTES + (x1 - x0) * (y1 - y0) * 2
+
+    def _flush_indexed(self, view, x0, y0, x1, y1):
+        """_flush() for palette mode: expand the rectangle into self.line a band at a time"""
+        if x1 - x0 >= self.width - WIDEN_PX:
+            x0 = 0
+            x1 = self.width
+        w = x1 - x0
+        rows = LINE_BYTES // (2 * w)
+        if view is not self.source_view:
+            self.source = framebuf.FrameBuffer(view, self.width, self.height, FORMATS[self.bpp])
+            self.source_view = view
+        # a line buffer exactly w wide, so each band is one contiguous write
+        line = framebuf.FrameBuffer(self.line, w, rows, framebuf.RGB565)
+        self._window(x0, y0, x1, y1)
+
+        self.op[0] = 0x2C
+        self.dc(0)
+        self.cs(0)
+        self.spi.write(self.op)
         self.dc(1)
+        y = y0
+        while y < y1:
+            n = min(rows, y1 - y)
+            line.blit(self.source, -x0, -y, -1, self.colors)
+            self.spi.write(self.line_view[:n * w * 2])
+            y += n
+        self.cs(1)
+        return WINDOW_BYTES + w * (y1 - y0) * 2
+
+    def flush(self, rects, view):
+        """
+        Send the rectangles in rects from view, a buffer laid out like
+        self.buffer (a copy of it, say); returns the bytes sent
+        """
+        r = rects.r
+        flush = self._flush if self.bpp == 16 else self._flush_indexed
+        sent = 0
+        for i in range(0, 4 * rects.n, 4):
+            sent += flush(view, r[i], r[i + 1], r[i + 2], r[i + 3])
+        return sent
+
+    def show(self, full=False):
+        """Send what changed since the last show(), or the whole buffer with full=True"""
+        self.wait()
+        if full:
+            self.damage.full(self.width, self.height)
+        sent = self.flush(self.damage, self.view)
+        self.damage.clear()
+        self.frame_bytes = sent
+        self.frames += 1
+        self.total_bytes += sent
+
+    # -- DMA ------------------------------------------------------------
+
+    def _claim_dma(self):
+        if self.bpp != 16:
+            return False        # indices have to be expanded on the way out
+        if self.dma is None and DMA is not None:
+            try:
+                self.dma = DMA()
+            except (OSError, ValueError):
+                return False    # all channels taken
+            self.dma_ctrl = self.dma.pack_ctrl(size=0, inc_write=False, treq_sel=DREQ_SPI1_TX, irq_quiet=False)
+            self.dma.irq(self._band_done)
+        return self.dma is not None
+
+    def start_show(self, full=False):
+        """Like show(), but by DMA: start sending and return straight away; False if still busy"""
+        if self.sending:
+            return False
+        if not self._claim_dma():
+            self.show(full)
+            return True
+        if full:
+            self.damage.full(self.width, self.height)
+        # the damaged row ranges, sorted and merged
+        d = self.damage
+        r = d.r
+        b = self.bands
+        n = 0
+        for i in range(0, 4 * d.n, 4):
+            y0 = r[i + 1]
+            y1 = r[i + 3]
+            j = n
+            while j > 0 and b[2 * j - 2] > y0:
+                b[2 * j] = b[2 * j - 2]
+                b[2 * j + 1] = b[2 * j - 1]
+                j -= 1
+            b[2 * j] = y0
+            b[2 * j + 1] = y1
+            n += 1
+        m = 0
+        sent = 0
+        for i in range(n):
+            y0 = b[2 * i]
+            y1 = b[2 * i + 1]
+            if m and y0 <= b[2 * m - 1]:
+                if y1 > b[2 * m - 1]:
+                    b[2 * m - 1] = y1
+                continue
+            b[2 * m] = y0
+            b[2 * m + 1] = y1
+            m += 1
+        for i in range(m):
+            sent += WINDOW_BYTES + (b[2 * i + 1] - b[2 * i]) * self.width * 2
+        d.clear()
+        self.frame_bytes = sent
+        self.frames += 1
+        self.total_bytes += sent
+        self.nbands = m
+        self.band = 0
+        self.sending = True
+        self._next_band()
+        return True
+
+    def _next_band(self):
+        if self.band >= self.nbands:
+            self.sending = False
+            return
+        y0 = self.bands[2 * self.band]
+        y1 = self.bands[2 * self.band + 1]
+        self.band += 1
+        self._window(0, y0, self.width, y1)
+        self.op[0] = 0x2C
+        self.dc(0)
         self.cs(0)
-        self.spi.write(self.buffer)
+        self.spi.write(self.op)
+        self.dc(1)
+        stride = self.width * 2
+        self.dma.config(read=self.view[y0 * stride:y1 * stride], write=SPI1_BASE + SSPDR,
+                        count=(y1 - y0) * stride, ctrl=self.dma_ctrl, trigger=True)
+
+    def _band_done(self, dma):
+        # the last bytes are still in the SPI FIFO when the channel finishes
+        while machine.mem32[SPI1_BASE + SSPSR] & SSPSR_BSY:
+            pass
         self.cs(1)
-        
+        self._next_band()
+
+    def busy(self):
+        """True while a start_show() transfer is going out"""
+        return self.sending
+
+    def wait(self):
+        """Block until the start_show() transfer is out"""
+        while self.sending:
+            time.sleep_us(50)
+
 if __name__=='__main__':
     lcd = ST7789()
     lcd.fill(0xFFFF)
@@ -1,19 +1,132 @@
-from machine import Pin
+from machine import Pin, Timer
 import machine
 import time
 import rp2
+from array import array
+
+# Calibration survives resets in this file on flash; delete it (or call
+# calibrate() and save_calibration() again) when the surface changes
+CALIBRATION_FILE = "trsensor.cal"
+CALIBRATION_MAGIC = b"TRC1"
+
+# readCalibratedFixed() scales by (1000 << CAL_SHIFT) / range; 20 bits
+# keeps every product below 2**30, so nothing spills into a big int
+CAL_SHIFT = 20
+
+# Noise filter modes for TRSensor.set_filter()
+FILTER_NONE = 0
+FILTER_MEDIAN3 = 3
+FILTER_MEDIAN5 = 5
+FILTER_EMA = 1
+
+# fractional bits kept in the EMA state
+EMA_FRAC = 4
 
 @rp2.asm_pio(out_shiftdir=0, autopull=True, pull_thresh=12, autopush=True, push_thresh=12, sideset_init=(rp2.PIO.OUT_LOW), out_init=rp2.PIO.OUT_LOW)
 def spi_cpha0():
     out(pins, 1)             .side(0x0)   [1]
     in_(pins, 1)             .side(0x1)   [1]
-        
+
+"""
+Per-channel noise filter for raw frames. FILTER_MEDIAN3/5 replace
+each value with the median of the last 3 or 5 frames, which removes
+single-sample spikes outright; FILTER_EMA is an integer exponential
+moving average with alpha = 1 / 2**ema_shift. All state is allocated
+up front and apply() works in place on any indexable buffer, so the
+filter can be fed recorded traces on the host without a TRSensor.
+"""
+class TRFilter():
+    def __init__(self, channels, mode=FILTER_MEDIAN3, ema_shift=2):
+        self.channels = channels
+        self.mode = mode
+        self.ema_shift = ema_shift
+        self.depth = mode if mode in (FILTER_MEDIAN3, FILTER_MEDIAN5) else 1
+        self.history = array('H', [0] * (channels * self.depth))
+        self.ema = array('l', [0] * channels)
+        self.slot = 0
+        self.primed = False
+
+    def reset(self):
+        self.primed = False
+
+    def apply(self, buf, offset=0):
+        n = self.channels
+        if self.mode == FILTER_NONE:
+            return buf
+        if not self.primed:
+            # start from the first frame instead of ramping up from 0
+            for i in range(n):
+                v = buf[offset + i]
+                for k in range(self.depth):
+                    self.history[k * n + i] = v
+                self.ema[i] = v << EMA_FRAC
+            self.primed = True
+            return buf
+
+        if self.mode == FILTER_EMA:
+            shift = self.ema_shift
+            ema = self.ema
+            for i in range(n):
+                e = ema[i]
+                e += ((buf[offset + i] << EMA_FRAC) - e) >> shift
+                ema[i] = e
+                buf[offset + i] = (e + (1 << (EMA_FRAC - 1))) >> EMA_FRAC
+            return buf
+
+        h = self.history
+        base = self.slot * n
+        for i in range(n):
+            h[base + i] = buf[offset + i]
+        self.slot += 1
+        if self.slot == self.depth:
+            self.slot = 0
+        if self.depth == 3:
+            for i in range(n):
+                buf[offset + i] = _median3(h[i], h[n + i], h[2 * n + i])
+        else:
+            for i in range(n):
+                buf[offset + i] = _median5(h[i], h[n + i], h[2 * n + i], h[3 * n + i], h[4 * n + i])
+        return buf
+
+def _median3(a, b, c):
+    if a > b:
+        a, b = b, a
+    if b > c:
+        b = c
+    return a if a > b else b
+
+def _median5(a, b, c, d, e):
+    # 9-comparator sorting network, middle element
+    if a > b: a, b = b, a
+    if d > e: d, e = e, d
+    if c > e: c, e = e, c
+    if c > d: c, d = d, c
+    if b > e: b, e = e, b
+    if a > d: a, d = d, a
+    if a > c: a, c = c, a
+    if b > d: b, d = d, b
+    if b > c: b, c = c, b
+    return c
+
 class TRSensor():
-    def __init__(self):
+    def __init__(self, calibration_file=CALIBRATION_FILE):
         self.numSensors = 5
         self.calibratedMin = [0] * self.numSensors
         self.calibratedMax = [1023] * self.numSensors
+        self.calibrated = False
+        self.calibration_dirty = False
+        self.calibration_file = calibration_file
+        self.track_window = 0
+        self.filter = None
+        self.cal_offset = array('H', [0] * self.numSensors)
+        self.cal_range = array('h', [0] * self.numSensors)
+        self.cal_scale = array('L', [0] * self.numSensors)
+        self.calibrated_values = array('H', [0] * self.numSensors)
+        self._build_scale_table()
         self.last_value = 0
+        self.raw_values = array('H', [0] * self.numSensors)
+        self.frame_ticks = 0    # ticks_us() stamp of the frame in raw_values
+        self.timer = None
         self.Clock     = 6
         self.Address   = 7
         self.DataOut   = 27
@@ -21,31 +134,151 @@ class TRSensor():
         self.CS.value(1)
         self.sm = rp2.StateMachine(1, spi_cpha0, freq=4*200000, sideset_base=Pin(self.Clock, Pin.OUT), out_base=Pin(self.Address, Pin.OUT), in_base=Pin(self.DataOut, Pin.IN))
         self.sm.active(1)
+        if calibration_file:
+            self.load_calibration()
         
     """
     Reads the sensor values into an array. There *MUST* be space
     for as many values as there were sensors specified in the constructor.
     Example usage:
-    unsigned int sensor_values[8];9
-    sensors.read(sensor_values);
+    sensor_values = array('H', [0]*5)
+    sensors.AnalogReadInto(sensor_values)
+    With offset the values are written to buf[offset:offset+5] instead.
     The values returned are a measure of the reflectance in abstract units,
     with higher values corresponding to lower reflectance (e.g. a black
     surface or a void).
-    """     
+
+    CS is held low for the whole frame and the next channel address is
+    queued before the previous result is collected, so the PIO program
+    clocks the six transfers back to back. The ADC returns the result
+    of the previous address on each transfer, so the first word is
+    discarded. Nothing is allocated and there is no sleep.
+    """
+    def AnalogReadInto(self, buf, offset=0):
+        sm = self.sm
+        last = self.numSensors - 1
+        self.CS.value(0)
+        # put(value, shift) shifts in C; 4 << 28 would be a heap bigint
+        sm.put(0, 28)
+        sm.put(1, 28)
+        # first result belongs to whatever was addressed last frame
+        sm.get()
+        for i in range(self.numSensors):
+            if i < last:
+                sm.put(i + 2, 28)
+            buf[offset + i] = (sm.get() & 0xfff) >> 2
+        self.CS.value(1)
+        return buf
+
+    """
+    Same as AnalogReadInto() but returns a new list, for callers that
+    keep or modify the values. While background sampling is running
+    this returns the newest sample instead of reading the ADC.
+    """
     def AnalogRead(self):
-        value = [0]*(self.numSensors+1)
-        
-        #Read Channel~channe5 AD value
-        for j in range(0,self.numSensors+1):
-            self.CS.value(0)
-            #set channe
-            self.sm.put(j << 28)
-            #get last channe value
-            value[j] = self.sm.get() & 0xfff
-            self.CS.value(1)
-            value[j] >>= 2
-        time.sleep_ms(2)
-        return value[1:]
+        return list(self._read_frame())
+
+    def _read_frame(self):
+        if self.timer is None:
+            self.AnalogReadInto(self.raw_values)
+            if self.filter is not None:
+                self.filter.apply(self.raw_values)
+            self.frame_ticks = time.ticks_us()
+            return self.raw_values
+        self.frame_ticks = self.latest(self.raw_values)
+        return self.raw_values
+
+    """
+    Puts a TRFilter between the ADC and everything that reads frames
+    (AnalogRead, calibrate, readCalibrated*, readLine*, and the
+    background sampler). FILTER_NONE removes it.
+    """
+    def set_filter(self, mode=FILTER_MEDIAN3, ema_shift=2):
+        if mode == FILTER_NONE:
+            self.filter = None
+        else:
+            self.filter = TRFilter(self.numSensors, mode, ema_shift)
+
+    """
+    Starts sampling all channels from a machine.Timer at rate_hz into
+    a preallocated ring of depth frames, each stamped with
+    time.ticks_us(). The timer owns the state machine from now on, so
+    the control loop should use latest()/history() (or AnalogRead(),
+    readCalibrated() and readLine(), which switch to the newest
+    sample) rather than AnalogReadInto(). Those can return the same
+    sample again if called faster than rate_hz; frame_ticks holds the
+    stamp of the one they last used, so a loop can tell.
+    """
+    def start_sampling(self, rate_hz=500, depth=16, timer_id=-1):
+        self.stop_sampling()
+        self.ring_depth = max(depth, 2)
+        self.ring = array('H', [0] * (self.ring_depth * self.numSensors))
+        self.ring_ticks = array('L', [0] * self.ring_depth)
+        self.ring_head = 0      # slot the next sample goes into
+        self.ring_count = 0     # samples taken since start
+        # take one sample now so readers never see an empty ring
+        self._sample(None)
+        # bind once so the IRQ does not allocate a bound method each time
+        self._sample_cb = self._sample
+        self.timer = Timer(timer_id, mode=Timer.PERIODIC, freq=rate_hz, callback=self._sample_cb)
+
+    def stop_sampling(self):
+        if self.timer is not None:
+            self.timer.deinit()
+            self.timer = None
+
+    def _sample(self, t):
+        head = self.ring_head
+        self.AnalogReadInto(self.ring, head * self.numSensors)
+        if self.filter is not None:
+            self.filter.apply(self.ring, head * self.numSensors)
+        self.ring_ticks[head] = time.ticks_us()
+        head += 1
+        if head == self.ring_depth:
+            head = 0
+        self.ring_head = head
+        self.ring_count += 1
+
+    """
+    Copies the newest sample into buf and returns its ticks_us stamp.
+    Never blocks; if the timer overwrote the slot while it was being
+    copied the copy is simply retried.
+    """
+    def latest(self, buf):
+        n = self.numSensors
+        while True:
+            count = self.ring_count
+            slot = (self.ring_head - 1) % self.ring_depth
+            base = slot * n
+            for i in range(n):
+                buf[i] = self.ring[base + i]
+            stamp = self.ring_ticks[slot]
+            if self.ring_count - count < self.ring_depth - 1:
+                return stamp
+
+    """
+    Copies the last frames samples, oldest first, into buf (room for
+    frames * 5 values) and their stamps into ticks if given. frames is
+    limited to what has been sampled and to depth - 1; the number of
+    frames copied is returned.
+    """
+    def history(self, frames, buf, ticks=None):
+        n = self.numSensors
+        frames = min(frames, self.ring_count, self.ring_depth - 1)
+        while True:
+            count = self.ring_count
+            slot = (self.ring_head - frames) % self.ring_depth
+            for f in range(frames):
+                base = slot * n
+                for i in range(n):
+                    buf[f * n + i] = self.ring[base + i]
+                if ticks is not None:
+                    ticks[f] = self.ring_ticks[slot]
+                slot += 1
+                if slot == self.ring_depth:
+                    slot = 0
+            if self.ring_count - count < self.ring_depth - frames:
+                return frames
     
     """
     Reads the sensors 10 times and uses the results for
@@ -58,7 +291,9 @@ class TRSensor():
         min_sensor_values = [0]*self.numSensors
         for j in range(0,10):
         
-            sensor_values = self.AnalogRead();
+            sensor_values = self._read_frame()
+            # spread the samples out while the robot sweeps the line
+            time.sleep_ms(2)
             
             for i in range(0,self.numSensors):
             
@@ -76,6 +311,123 @@ class TRSensor():
                 self.calibratedMin[i] = min_sensor_values[i]
             if(max_sensor_values[i] < self.calibratedMax[i]):
                 self.calibratedMax[i] = max_sensor_values[i]
+        self.calibrated = True
+        self._calibration_changed()
+
+    def _calibration_changed(self):
+        self.calibration_dirty = True
+        self._build_scale_table()
+
+    """
+    Replaces the calibration, e.g. with values recorded earlier.
+    """
+    def set_calibration(self, calibrated_min, calibrated_max):
+        self.calibratedMin = list(calibrated_min)
+        self.calibratedMax = list(calibrated_max)
+        self.calibrated = True
+        self._calibration_changed()
+
+    """
+    Precomputes the per-sensor offset and rounded-up reciprocal used
+    by readCalibratedFixed(). Rounding up makes the fixed-point result
+    equal int() of the float formula for every in-range reading.
+    """
+    def _build_scale_table(self):
+        for i in range(self.numSensors):
+            denominator = self.calibratedMax[i] - self.calibratedMin[i]
+            self.cal_offset[i] = max(self.calibratedMin[i], 0)
+            self.cal_range[i] = denominator
+            if denominator > 0:
+                self.cal_scale[i] = ((1000 << CAL_SHIFT) + denominator - 1) // denominator
+            else:
+                self.cal_scale[i] = 0
+
+    """
+    Stores calibratedMin/calibratedMax on flash as a 4 byte tag
+    followed by ten little-endian uint16 values (24 bytes in all).
+    """
+    def save_calibration(self, path=None):
+        data = array('H', self.calibratedMin + self.calibratedMax)
+        with open(path or self.calibration_file, "wb") as f:
+            f.write(CALIBRATION_MAGIC)
+            f.write(data)
+        self.calibration_dirty = False
+
+    """
+    Loads a calibration written by save_calibration(). Returns False
+    and leaves the current calibration alone if the file is missing,
+    truncated or does not describe a usable range for every sensor.
+    """
+    def load_calibration(self, path=None):
+        n = self.numSensors
+        data = array('H', [0] * (2 * n))
+        try:
+            with open(path or self.calibration_file, "rb") as f:
+                if f.read(len(CALIBRATION_MAGIC)) != CALIBRATION_MAGIC:
+                    return False
+                if f.readinto(data) != 4 * n:
+                    return False
+        except OSError:
+            return False
+        for i in range(n):
+            if data[i] >= data[n + i]:
+                return False
+        self.set_calibration(data[:n], data[n:])
+        self.calibration_dirty = False
+        return True
+
+    """
+    Keeps the calibration fresh while following the line. Every window
+    frames read through readCalibrated(), the stored min and max of
+    each sensor move 1/8 of the way toward the extremes seen in that
+    window. A sensor whose spread in the window stayed below
+    min_spread never crossed the line, so it is left alone. Changes
+    set calibration_dirty; call save_calibration() at a convenient
+    moment to keep them. A frame read more than once (by a loop faster
+    than start_sampling()'s rate) counts once, by its frame_ticks.
+    """
+    def track_calibration(self, window=250, min_spread=200):
+        n = self.numSensors
+        self.track_window = window
+        self.track_min_spread = min_spread
+        self.track_lo = array('H', [0xffff] * n)
+        self.track_hi = array('H', [0] * n)
+        self.track_frames = 0
+        self.track_ticks = None     # frame_ticks of the last frame counted
+
+    def stop_tracking(self):
+        self.track_window = 0
+
+    def _track(self, sensor_values):
+        if self.frame_ticks == self.track_ticks:
+            return
+        self.track_ticks = self.frame_ticks
+        lo = self.track_lo
+        hi = self.track_hi
+        for i in range(self.numSensors):
+            v = sensor_values[i]
+            if v < lo[i]:
+                lo[i] = v
+            if v > hi[i]:
+                hi[i] = v
+        self.track_frames += 1
+        if self.track_frames < self.track_window:
+            return
+
+        changed = False
+        for i in range(self.numSensors):
+            if hi[i] - lo[i] >= self.track_min_spread:
+                new_min = self.calibratedMin[i] + (lo[i] - self.calibratedMin[i]) // 8
+                new_max = self.calibratedMax[i] + (hi[i] - self.calibratedMax[i]) // 8
+                if new_min < new_max and (new_min != self.calibratedMin[i] or new_max != self.calibratedMax[i]):
+                    self.calibratedMin[i] = new_min
+                    self.calibratedMax[i] = new_max
+                    changed = True
+            lo[i] = 0xffff
+            hi[i] = 0
+        self.track_frames = 0
+        if changed:
+            self._calibration_changed()
         
     """
     Returns values calibrated to a value between 0 and 1000, where
@@ -88,6 +440,8 @@ class TRSensor():
     def readCalibrated(self):
         value = 0
         sensor_values = self.AnalogRead()
+        if self.track_window:
+            self._track(sensor_values)
         
         for i in range (0,self.numSensors):
             denominator = self.calibratedMax[i] - self.calibratedMin[i]
@@ -104,6 +458,34 @@ class TRSensor():
 
         return sensor_values
 
+    """
+    Integer-only readCalibrated(): one subtract, compare and multiply
+    per sensor using the tables from _build_scale_table(), no soft-float
+    divide. Results match readCalibrated() for every sensor with a
+    usable range; a sensor whose calibrated max is not above its min
+    reads 0. The values are written into the preallocated
+    calibrated_values array, which is returned. Pass sensor_values to
+    scale a frame that was already read instead of reading a new one.
+    """
+    def readCalibratedFixed(self, sensor_values=None):
+        if sensor_values is None:
+            sensor_values = self._read_frame()
+        if self.track_window:
+            self._track(sensor_values)
+        offset = self.cal_offset
+        rng = self.cal_range
+        scale = self.cal_scale
+        out = self.calibrated_values
+        for i in range(self.numSensors):
+            d = sensor_values[i] - offset[i]
+            if d <= 0 or rng[i] <= 0:
+                out[i] = 0
+            elif d >= rng[i]:
+                out[i] = 1000
+            else:
+                out[i] = (d * scale[i]) >> CAL_SHIFT
+        return out
+
     """
     Operates the same as read calibrated, but also returns an
     estimated position of the robot with respect to a line. The
@@ -158,6 +540,112 @@ class TRSensor():
 
         return int(self.last_value),sensor_values
 
+    """
+    readLine() on top of readCalibratedFixed(), with the weighted
+    average done by integer floor division. Returns the same position
+    as readLine() (the weighted sum stays below 10**7, well inside the
+    small-int range) and the shared calibrated_values array.
+    """
+    def readLineFixed(self, white_line = 0):
+        sensor_values = self.readCalibratedFixed()
+        avg = 0
+        sum = 0
+        on_line = 0
+        for i in range(self.numSensors):
+            value = sensor_values[i]
+            if white_line:
+                value = 1000 - value
+            if value > 200:
+                on_line = 1
+            if value > 50:
+                avg += value * i * 1000
+                sum += value
+
+        if on_line != 1:
+            if self.last_value < (self.numSensors - 1) * 500:
+                self.last_value = 0
+            else:
+                self.last_value = (self.numSensors - 1) * 1000
+        else:
+            self.last_value = avg // sum
+
+        return int(self.last_value), sensor_values
+
+    """
+    Sub-sensor line position. Fits a parabola through the strongest
+    calibrated reading and its two neighbours (a missing neighbour past
+    the end of the array counts as 0) and returns the vertex as
+    (position, confidence). position uses the readLine() scale, 0 to
+    (numSensors - 1) * 1000, but is not limited to the sensor centres
+    or to the coarse weighted average, so each unit is 1/1000 of the
+    sensor pitch. confidence runs from 0 to 1000: the height of the
+    peak above the strongest reading that is not part of it, so a
+    faint line, a second line or an intersection all lower it. With
+    no line in sight the last position is pushed to the nearer edge,
+    as readLine() does, and confidence is 0. Integer math only.
+    """
+    def interpolateLine(self, values, white_line = 0):
+        n = self.numSensors
+        peak = 0
+        c = -1
+        for i in range(n):
+            v = 1000 - values[i] if white_line else values[i]
+            if v > c:
+                c = v
+                peak = i
+        if c <= 200:
+            if self.last_value < (n - 1) * 500:
+                self.last_value = 0
+            else:
+                self.last_value = (n - 1) * 1000
+            return int(self.last_value), 0
+
+        l = 0
+        r = 0
+        if peak > 0:
+            l = 1000 - values[peak - 1] if white_line else values[peak - 1]
+        if peak < n - 1:
+            r = 1000 - values[peak + 1] if white_line else values[peak + 1]
+
+        # vertex of the parabola through (-1, l), (0, c), (1, r)
+        den = l - 2 * c + r
+        offset = 0
+        if den < 0:
+            offset = (500 * (l - r)) // den
+            if offset > 500:
+                offset = 500
+            elif offset < -500:
+                offset = -500
+        position = peak * 1000 + offset
+        if position < 0:
+            position = 0
+        elif position > (n - 1) * 1000:
+            position = (n - 1) * 1000
+
+        # strongest reading outside the peak and its neighbours
+        other = 0
+        for i in range(n):
+            if i < peak - 1 or i > peak + 1:
+                v = 1000 - values[i] if white_line else values[i]
+                if v > other:
+                    other = v
+        confidence = c - other
+        if confidence < 0:
+            confidence = 0
+
+        self.last_value = position
+        return position, confidence
+
+    """
+    readLine() with sub-sensor interpolation: reads and scales a frame
+    with readCalibratedFixed() and returns
+    (position, confidence, calibrated_values).
+    """
+    def readLineInterpolated(self, white_line = 0):
+        sensor_values = self.readCalibratedFixed()
+        position, confidence = self.interpolateLine(sensor_values, white_line)
+        return position, confidence, sensor_values
+
 if __name__ == '__main__':
 
     print("\nTRSensor Test Program ...\r\n")
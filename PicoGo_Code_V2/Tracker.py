@@ -0,0 +1,142 @@
+"""
+Alpha-beta tracker for a followed target: its distance ahead and its
+own speed over the ground.
+
+    from Tracker import TargetTracker
+    TRACK = TargetTracker()
+    TRACK.robot_speed(speed_to_cm_s(speed))     # whenever the motors change
+    TRACK.update_sonar(SONAR)                   # every new ping, with its timestamp
+    d = TRACK.predict(default=999)              # distance now, extrapolated between pings
+    v = TRACK.follow_speed(30)                  # robot cm/s that holds 30 cm
+
+Distances are in cm and speeds in cm/s. The tracker dead-reckons the
+robot's own travel from the speeds given to robot_speed(), so each ping
+places the target at odometry + distance; tracking that position rather
+than the raw distance keeps the robot's own speed changes out of the
+target's speed estimate, which is what makes the feed-forward stable.
+
+Each ping corrects the predicted position by alpha times the residual
+and the speed by beta times the residual over the time since the last
+ping. Residuals beyond gate_cm are treated as stray echoes until
+MAX_OUTLIERS arrive in a row, which means the target really jumped and
+the tracker locks on afresh. After coast_ms without an echo the target
+counts as lost.
+"""
+import time
+
+from Ultrasonic import CM_PER_US, HISTORY
+
+ALPHA = 0.4
+BETA = 0.1          # about critically damped for ALPHA
+GATE_CM = 20.0
+MAX_OUTLIERS = 3
+COAST_MS = 600
+IR_RANGE_CM = 15.0  # the IR sensors only fire this close
+
+class TargetTracker(object):
+    def __init__(self, alpha=ALPHA, beta=BETA, gate_cm=GATE_CM, coast_ms=COAST_MS):
+        self.alpha = alpha
+        self.beta = beta
+        self.gate_cm = gate_cm
+        self.coast_ms = coast_ms
+        self.seen = 0           # Ultrasonic.count already fed in
+        self.odo = 0.0          # robot travel in cm at odo_ticks
+        self.odo_ticks = time.ticks_ms()
+        self.robot_cm_s = 0.0
+        self.reset()
+
+    def reset(self):
+        self.locked = False
+        self.position = 0.0     # target position on the odometry scale at self.ticks
+        self.speed = 0.0        # target speed over the ground
+        self.ticks = 0          # ticks_ms of the last accepted sample
+        self.outliers = 0
+
+    def robot_speed(self, cm_s, ticks_ms=None):
+        """Tell the tracker the robot's speed changed to cm_s (forward positive)"""
+        if ticks_ms is None:
+            ticks_ms = time.ticks_ms()
+        self.odo = self.odometry(ticks_ms)
+        self.odo_ticks = ticks_ms
+        self.robot_cm_s = cm_s
+
+    def odometry(self, ticks_ms):
+        """Dead-reckoned robot travel in cm at ticks_ms"""
+        return self.odo + self.robot_cm_s * time.ticks_diff(ticks_ms, self.odo_ticks) / 1000
+
+    def update(self, distance_cm, ticks_ms):
+        """Feed one measured distance taken at ticks_ms"""
+        z = self.odometry(ticks_ms) + distance_cm
+        if not self.locked:
+            self.position = z
+            self.speed = self.robot_cm_s    # until told otherwise, it keeps its distance
+            self.ticks = ticks_ms
+            self.outliers = 0
+            self.locked = True
+            return
+        dt = time.ticks_diff(ticks_ms, self.ticks) / 1000
+        if dt <= 0:
+            return
+        predicted = self.position + self.speed * dt
+        residual = z - predicted
+        if abs(residual) > self.gate_cm:
+            self.outliers += 1
+            if self.outliers >= MAX_OUTLIERS:
+                self.locked = False
+                self.update(distance_cm, ticks_ms)
+            return
+        self.outliers = 0
+        self.position = predicted + self.alpha * residual
+        self.speed += self.beta * residual / dt
+        self.ticks = ticks_ms
+
+    def miss(self, ticks_ms):
+        """A ping got no echo; drop the lock once coast_ms have passed without one"""
+        if self.locked and time.ticks_diff(ticks_ms, self.ticks) > self.coast_ms:
+            self.reset()
+
+    def update_ir(self, ticks_ms, near_cm=IR_RANGE_CM):
+        """Both IR sensors see the target, so it is no further than near_cm"""
+        predicted = self.predict(ticks_ms)
+        if predicted is None or predicted > near_cm:
+            self.update(near_cm, ticks_ms)
+
+    def update_sonar(self, sonar):
+        """Feed every ping an Ultrasonic has finished since the last call"""
+        end = sonar.count
+        i = max(self.seen, end - HISTORY)
+        while i < end:
+            width = sonar.widths[i % HISTORY]
+            ticks = sonar.times[i % HISTORY]
+            if width < 0:
+                self.miss(ticks)
+            else:
+                self.update(width * CM_PER_US, ticks)
+            i += 1
+        self.seen = end
+
+    def predict(self, ticks_ms=None, default=None):
+        """Distance at ticks_ms (now by default), or default when not locked"""
+        if not self.locked:
+            return default
+        if ticks_ms is None:
+            ticks_ms = time.ticks_ms()
+        dt = time.ticks_diff(ticks_ms, self.ticks)
+        if dt > self.coast_ms:
+            return default
+        return self.position + self.speed * dt / 1000 - self.odometry(ticks_ms)
+
+    def closing_speed(self):
+        """How fast the gap is shrinking in cm/s"""
+        return self.robot_cm_s - self.speed
+
+    def follow_speed(self, follow_cm, gain=1.0):
+        """
+        Robot speed in cm/s that keeps up with the target (feed-forward
+        of its estimated speed) and closes the gap to follow_cm at gain
+        cm/s per cm of error; 0 without a target.
+        """
+        d = self.predict()
+        if d is None:
+            return 0.0
+        return self.speed + gain * (d - follow_cm)
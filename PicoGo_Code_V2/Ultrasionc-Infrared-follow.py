@@ -1,13 +1,14 @@
-from machine import UART, Pin
+from machine import UART, Pin, ADC
 from Motor import PicoGo
-from ws2812 import NeoPixel
+from Ultrasonic import Ultrasonic
+from ws2812 import NeoPixel, Animator
 from ST7789 import ST7789
 import ujson
 import utime
 
 
-bat = machine.ADC(Pin(26))
-temp = machine.ADC(4)
+bat = ADC(Pin(26))
+temp = ADC(4)
 
 lcd = ST7789()
 lcd.fill(0xF232)
@@ -36,10 +37,7 @@ BUZ.value(0)
 Buzzer = Pin(4, Pin.OUT)
 DSR = Pin(2, Pin.IN)
 DSL = Pin(3, Pin.IN)
-Echo = Pin(15, Pin.IN)
-Trig = Pin(14, Pin.OUT)
-Trig.value(0)
-Echo.value(0)
+SONAR = Ultrasonic()
 
 strip = NeoPixel()
 strip.pixels_set(0, strip.BLACK)
@@ -54,20 +52,13 @@ HIGH_SPEED   =  80
 
 speed = 20
 t = 0
-j = 0
+# Rainbow on the LEDs, drawn from a timer so the loop never touches them
+LEDS = Animator(strip)
+LEDS.play("rainbow", period_ms=5000)
+LEDS.start_timer()
 n = 0  
 def dist():
-    Trig.value(1)
-    utime.sleep_ms(10)
-    Trig.value(0)
-    while(Echo.value() == 0):
-        pass
-    ts=utime.ticks_us()
-    while(Echo.value() == 1):
-        pass
-    te=utime.ticks_us()
-    distance=((te-ts)*0.034)/2
-    return distance
+    return SONAR.distance(999)
 while True:
     
     D = dist()
@@ -103,18 +94,3 @@ while True:
        M.stop() 
         
     utime.sleep_ms(20)
-    
-
-    for i in range(strip.num):
-        strip.pixels_set(i, strip.wheel(((i * 256 // strip.num) + j) & 255))
-    strip.pixels_show()
-    j += 1
-    if(j > 256): 
-        j = 0
-
-
-
-
-
-
-
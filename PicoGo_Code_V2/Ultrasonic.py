@@ -0,0 +1,244 @@
+"""
+Interrupt-driven HC-SR04 ranging.
+
+A timer sends the 10 us trigger pulse at a fixed rate and the echo
+pin's edge interrupts timestamp the reply, so reading the distance
+never blocks the control loop:
+
+    from Ultrasonic import Ultrasonic
+    SONAR = Ultrasonic(rate_hz=20, max_cm=100)
+    d = SONAR.distance()                # latest distance in cm, None if no echo
+    d, ticks = SONAR.read()             # ... and the ticks_ms it was measured at
+    d = SONAR.estimate(3)               # median of the last 3 pings, None if most got no echo
+
+max_cm bounds the useful range: echoes from further away are reported
+as no echo and the timeout shrinks to match, which matters for
+measure(), the on-demand reading for code that doesn't ping in the
+background (rate_hz=0).
+
+PIOUltrasonic has the same API but leaves the trigger pulse and the
+echo timing to a PIO state machine, so interpreter jitter and GC pauses
+no longer land in the measurement.
+"""
+import time
+from array import array
+from machine import Pin, Timer
+import rp2
+
+TRIG_PIN = 14
+ECHO_PIN = 15
+CM_PER_US = 0.0343 / 2      # speed of sound at ~20 C, there and back
+TIMEOUT_US = 30000          # longer echoes mean nothing in range (the module gives up at ~38 ms)
+RISE_US = 1000              # trigger to echo rise takes ~0.5 ms (the 40 kHz burst)
+BUSY_US = 40000             # longest the echo pin stays high after a ping with no echo
+PIO_SM = 4                  # first state machine of PIO1; PIO0 runs the NeoPixels (0) and TRSensor (1)
+HISTORY = 8                 # pings kept for estimate()
+
+def timeout_for(max_cm):
+    """Echo timeout in us for targets up to max_cm away"""
+    return int(max_cm / CM_PER_US) + 1
+
+# Put the timeout in us to take one measurement: a 10 us trigger pulse,
+# then up to timeout us for the echo to rise and as long again for it to
+# fall, counted at one loop per us (2 cycles at 2 MHz). Pushes what is
+# left of the fall countdown, so width = timeout - result, or 0 when
+# either wait ran out, and raises the state machine's IRQ.
+@rp2.asm_pio(set_init=rp2.PIO.OUT_LOW)
+def echo_timer():
+    pull(block)
+    mov(x, osr)
+    mov(y, osr)
+    set(pins, 1)            [19]
+    set(pins, 0)
+    label("wait_rise")
+    jmp(pin, "high")
+    jmp(y_dec, "wait_rise")
+    jmp("timeout")
+    label("high")
+    jmp(pin, "count")
+    jmp("done")
+    label("count")
+    jmp(x_dec, "high")
+    label("timeout")
+    mov(x, null)
+    label("done")
+    mov(isr, x)
+    push(noblock)
+    irq(rel(0))
+
+class Ultrasonic(object):
+    def __init__(self, trig=TRIG_PIN, echo=ECHO_PIN, rate_hz=20, timeout_us=TIMEOUT_US, timer_id=-1, max_cm=None):
+        self.timeout_us = timeout_for(max_cm) if max_cm else timeout_us
+        self.limit_us = self.timeout_us + RISE_US   # give up on a ping after this
+        self.pulse_us = -1      # width of the latest echo, -1 for none
+        self.ticks = 0          # ticks_ms the latest measurement finished at
+        self.count = 0          # measurements finished, no-echo ones included
+        self.sent = 0           # ticks_us of the last trigger pulse
+        self.rise = 0           # ticks_us of the last echo rising edge
+        self.pending = False    # trigger sent, echo not over yet
+        self.widths = array('l', [-1] * HISTORY)    # recent pulse_us, oldest overwritten
+        self.times = array('l', [0] * HISTORY)      # ... and the ticks_ms each finished at
+        self.scratch = array('l', [0] * HISTORY)
+        self.timer = None
+        self._attach(trig, echo)
+        if rate_hz:
+            self.start(rate_hz, timer_id)
+
+    def _attach(self, trig, echo):
+        self.trig = Pin(trig, Pin.OUT)
+        self.trig.value(0)
+        self.echo = Pin(echo, Pin.IN)
+        self.echo.irq(handler=self._edge, trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING)
+
+    def start(self, rate_hz=20, timer_id=-1):
+        """Ping at rate_hz from a timer; keep it under ~25 Hz so echoes can't overlap"""
+        self.stop()
+        self.timer = Timer(timer_id)
+        self.timer.init(mode=Timer.PERIODIC, freq=rate_hz, callback=self._tick)
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.deinit()
+            self.timer = None
+
+    def _tick(self, t):
+        self.trigger()
+
+    def trigger(self):
+        """Send one ping; False if the previous one is still being answered"""
+        if self.pending:
+            if time.ticks_diff(time.ticks_us(), self.sent) < self.limit_us:
+                return False
+            self._finish(-1)    # nothing within range (or no echo edge at all)
+        if self.echo.value():
+            return False        # the module is still sitting out a ping that got no echo
+        return self._ping()
+
+    def _ping(self):
+        self.trig.value(1)
+        time.sleep_us(10)
+        self.trig.value(0)
+        self.sent = time.ticks_us()
+        self.rise = self.sent
+        self.pending = True
+        return True
+
+    def _edge(self, pin):
+        now = time.ticks_us()
+        if pin.value():
+            self.rise = now
+        elif self.pending:
+            self._finish(time.ticks_diff(now, self.rise))
+
+    def _finish(self, width_us):
+        if width_us >= self.timeout_us:
+            width_us = -1
+        self.pulse_us = width_us
+        self.ticks = time.ticks_ms()
+        self.widths[self.count % HISTORY] = width_us
+        self.times[self.count % HISTORY] = self.ticks
+        self.count += 1
+        self.pending = False
+
+    def distance(self, default=None):
+        """Latest distance in cm, or default if the last ping got no echo"""
+        if self.pulse_us < 0:
+            return default
+        return self.pulse_us * CM_PER_US
+
+    def read(self, default=None):
+        """(distance in cm or default, ticks_ms it was measured at)"""
+        return self.distance(default), self.ticks
+
+    def age_ms(self):
+        """How old the latest measurement is, None before the first one"""
+        if self.count == 0:
+            return None
+        return time.ticks_diff(time.ticks_ms(), self.ticks)
+
+    def estimate(self, n=3, default=None):
+        """
+        Median distance in cm over the last n pings that got an echo, or
+        default unless most of them did. A single miss or stray echo
+        doesn't move the result.
+        """
+        n = min(n, self.count, HISTORY)
+        widths = self.widths
+        scratch = self.scratch
+        end = self.count
+        m = 0
+        for i in range(end - n, end):
+            w = widths[i % HISTORY]
+            if w >= 0:
+                # insertion sort into scratch[0:m]
+                j = m
+                while j > 0 and scratch[j - 1] > w:
+                    scratch[j] = scratch[j - 1]
+                    j -= 1
+                scratch[j] = w
+                m += 1
+        if m == 0 or 2 * m <= n:
+            return default
+        if m & 1:
+            return scratch[m >> 1] * CM_PER_US
+        return (scratch[(m >> 1) - 1] + scratch[m >> 1]) * (CM_PER_US / 2)
+
+    def measure(self, pings=3, agree_cm=1.0, default=None):
+        """
+        Ping now, up to `pings` times, and return estimate() over them.
+        Stops early once two pings in a row agree within agree_cm, or
+        both got no echo. Blocks for a few ms at short ranges; use it
+        with rate_hz=0 so the timer doesn't ping at the same time.
+        """
+        first = self.count
+        last = -2
+        for _ in range(pings):
+            while self.echo.value() and time.ticks_diff(time.ticks_us(), self.sent) < BUSY_US:
+                time.sleep_us(20)
+            if not self.trigger():
+                continue
+            while self.pending and time.ticks_diff(time.ticks_us(), self.sent) < self.limit_us:
+                time.sleep_us(20)
+            if self.pending:
+                self._finish(-1)
+            w = self.pulse_us
+            if w < 0 and last == -1:
+                break
+            if w >= 0 and last >= 0 and abs(w - last) * CM_PER_US <= agree_cm:
+                break
+            last = w
+        return self.estimate(self.count - first, default)
+
+class PIOUltrasonic(Ultrasonic):
+    """
+    Ultrasonic on the echo_timer PIO program: 1 us resolution with no
+    interpreter jitter, and a measurement costs one sm.get() in the
+    state machine's IRQ handler. Defaults to state machine 4 (PIO1) so
+    it leaves PIO0's instruction memory to the NeoPixel and TRSensor
+    programs.
+    """
+    def __init__(self, trig=TRIG_PIN, echo=ECHO_PIN, rate_hz=20, timeout_us=TIMEOUT_US, timer_id=-1, max_cm=None, sm_id=PIO_SM):
+        self.sm_id = sm_id
+        Ultrasonic.__init__(self, trig, echo, rate_hz, timeout_us, timer_id, max_cm)
+        # the program waits up to timeout_us for the rise and again for the fall
+        self.limit_us = 2 * self.timeout_us + RISE_US
+
+    def _attach(self, trig, echo):
+        self.trig = Pin(trig, Pin.OUT)
+        self.echo = Pin(echo, Pin.IN)
+        self.sm = rp2.StateMachine(self.sm_id, echo_timer, freq=2_000_000, set_base=self.trig, jmp_pin=self.echo)
+        self.sm.irq(self._rx)
+        self.sm.active(1)
+
+    def _ping(self):
+        if self.sm.tx_fifo():
+            return False        # the program hasn't taken the last word yet
+        self.sent = time.ticks_us()
+        self.pending = True
+        self.sm.put(self.timeout_us)
+        return True
+
+    def _rx(self, sm):
+        while sm.rx_fifo():
+            left = sm.get()
+            self._finish(self.timeout_us - left if left else -1)
@@ -0,0 +1,222 @@
+"""
+Retained-mode widgets for the ST7789 status screens.
+
+    from Widgets import Screen, Label, Field, Bar, Indicator, Marker
+    SCREEN = Screen(lcd, y=25, h=110)
+    STATE = SCREEN.add(Field(10, 25, "State: %s"))
+    DIST = SCREEN.add(Field(10, 45, "Distance: %.1f cm", none_text="Distance: No Target"))
+    GAUGE = SCREEN.add(Bar(20, 65, 200, 10, 100))
+
+    STATE.set(state, lcd.GREEN)
+    DIST.set(distance)
+    GAUGE.set(distance, lcd.GREEN)
+    SCREEN.update()             # redraws only the widgets whose value changed
+    lcd.show()                  # and sends only what they touched
+
+Each widget remembers the value and colour it last drew and set() with
+the same again does nothing; a Field only redraws when its formatted
+text changes. A widget that did change blanks its last box in the
+screen's background and draws itself again, so the ST7789's damage
+tracking sends just that box.
+
+Screen.invalidate() repaints the screen's area and every widget at the
+next update(); call it after drawing over the screen some other way.
+update(budget_us) stops drawing once that much time has gone; the
+widgets left over are drawn first next time.
+"""
+import time
+
+class Widget(object):
+    def __init__(self, x, y, color=None):
+        self.x = x
+        self.y = y
+        self.default_color = color
+        self.value = None
+        self.color = color
+        self.dirty = True
+        self.box = None         # (x, y, w, h) covered by the last draw
+
+    def attach(self, lcd):
+        """Fill in the default colours from lcd (they are palette indices in palette mode)"""
+        if self.default_color is None:
+            self.default_color = self.color = lcd.WHITE
+
+    def set(self, value, color=None):
+        """Show value (in color, default the widget's); True if that changed anything"""
+        if color is None:
+            color = self.default_color
+        if value == self.value and color == self.color and not self.dirty:
+            return False
+        self.value = value
+        self.color = color
+        self.dirty = True
+        return True
+
+    def draw(self, lcd, bg):
+        if self.box is not None:
+            x, y, w, h = self.box
+            lcd.fill_rect(x, y, w, h, bg)
+        self.box = self.render(lcd)
+        self.dirty = False
+
+    def render(self, lcd):
+        """Draw the current value; return the (x, y, w, h) box drawn, or None"""
+        return None
+
+class Label(Widget):
+    """A line of text"""
+    def __init__(self, x, y, text="", color=None):
+        Widget.__init__(self, x, y, color)
+        self.value = text
+
+    def render(self, lcd):
+        text = self.value
+        if not text:
+            return None
+        lcd.text(text, self.x, self.y, self.color)
+        return (self.x, self.y, 8 * len(text), 8)
+
+class Field(Label):
+    """
+    A value shown through a % format, e.g. Field(10, 60, "Dist: %.1fcm");
+    tuples fill several slots. None shows none_text.
+    """
+    def __init__(self, x, y, fmt="%s", color=None, none_text=""):
+        Label.__init__(self, x, y, "", color)
+        self.fmt = fmt
+        self.none_text = none_text
+        self.raw = None
+
+    def set(self, value, color=None):
+        if color is None:
+            color = self.default_color
+        if value == self.raw and color == self.color and not self.dirty:
+            return False
+        self.raw = value
+        return Label.set(self, self.none_text if value is None else self.fmt % value, color)
+
+class Bar(Widget):
+    """A horizontal gauge: w x h frame, filled in proportion to value / full_scale (None: not shown)"""
+    def __init__(self, x, y, w, h, full_scale, color=None, frame=None):
+        Widget.__init__(self, x, y, color)
+        self.w = w
+        self.h = h
+        self.full_scale = full_scale
+        self.frame = frame
+        self.fill = -1          # filled px last set
+
+    def attach(self, lcd):
+        Widget.attach(self, lcd)
+        if self.frame is None:
+            self.frame = lcd.WHITE
+
+    def set(self, value, color=None):
+        fill = -1
+        if value is not None:
+            fill = max(0, min(int(value * self.w / self.full_scale), self.w))
+        if fill == self.fill and (fill <= 0 or color is None or color == self.color) and not self.dirty:
+            return False
+        self.fill = fill
+        return Widget.set(self, value, color)
+
+    def render(self, lcd):
+        if self.fill < 0:
+            return None
+        lcd.fill_rect(self.x, self.y, self.fill, self.h, self.color)
+        lcd.rect(self.x, self.y, self.w, self.h, self.frame)
+        return (self.x, self.y, self.w, self.h)
+
+class Indicator(Widget):
+    """A w x h box: filled in on_color when set(True), outlined in off_color (or blank if None) otherwise"""
+    def __init__(self, x, y, w, h, on_color, off_color=None):
+        Widget.__init__(self, x, y, on_color)
+        self.w = w
+        self.h = h
+        self.off_color = off_color
+
+    def set(self, on, color=None):
+        return Widget.set(self, bool(on), color)
+
+    def render(self, lcd):
+        if self.value:
+            lcd.fill_rect(self.x, self.y, self.w, self.h, self.color)
+        elif self.off_color is not None:
+            lcd.rect(self.x, self.y, self.w, self.h, self.off_color)
+        else:
+            return None
+        return (self.x, self.y, self.w, self.h)
+
+class Marker(Widget):
+    """
+    A w x h block centred on a moving x (set(None) hides it), with
+    optional text under it, e.g. the "^" under main.py's line position.
+    """
+    def __init__(self, y, w, h, color=None, text=None):
+        Widget.__init__(self, 0, y, color)
+        self.w = w
+        self.h = h
+        self.text = text
+
+    def render(self, lcd):
+        if self.value is None:
+            return None
+        x = self.value - self.w // 2
+        lcd.fill_rect(x, self.y, self.w, self.h, self.color)
+        if not self.text:
+            return (x, self.y, self.w, self.h)
+        tw = 8 * len(self.text)
+        tx = self.value - 3
+        lcd.text(self.text, tx, self.y + self.h + 2, self.color)
+        x0 = min(x, tx)
+        x1 = max(x + self.w, tx + tw)
+        return (x0, self.y, x1 - x0, self.h + 10)
+
+class Screen(object):
+    """The widgets drawn in one area of the LCD (all of it by default)"""
+    def __init__(self, lcd, x=0, y=0, w=None, h=None, bg=None):
+        self.lcd = lcd
+        self.x = x
+        self.y = y
+        self.w = lcd.width - x if w is None else w
+        self.h = lcd.height - y if h is None else h
+        self.bg = lcd.BLACK if bg is None else bg
+        self.widgets = []
+        self.stale = True
+        self.next = 0           # where the last update() left off
+
+    def add(self, widget):
+        """Add widget (in lcd.WHITE unless it was given a colour); returns it"""
+        widget.attach(self.lcd)
+        self.widgets.append(widget)
+        return widget
+
+    def invalidate(self):
+        """Repaint the whole area at the next update()"""
+        self.stale = True
+
+    def update(self, budget_us=None):
+        """Redraw what changed, for at most budget_us if given; returns how many widgets were drawn"""
+        lcd = self.lcd
+        start = time.ticks_us()
+        if self.stale:
+            lcd.fill_rect(self.x, self.y, self.w, self.h, self.bg)
+            for widget in self.widgets:
+                widget.box = None
+                widget.dirty = True
+            self.stale = False
+        widgets = self.widgets
+        n = len(widgets)
+        i = self.next
+        drawn = 0
+        for _ in range(n):
+            widget = widgets[i]
+            i += 1
+            if i == n:
+                i = 0
+            if widget.dirty:
+                widget.draw(lcd, self.bg)
+                drawn += 1
+                if budget_us is not None and time.ticks_diff(time.ticks_us(), start) >= budget_us:
+                    break
+        self.next = i
+        return drawn
@@ -0,0 +1,381 @@
+"""
+Host benchmark for ST7789 partial flushes.
+
+Run under CPython from this directory:
+    python3 bench_lcd.py
+
+Renders frames the way main.py's update_lcd() and the followers'
+update_following_lcd() used to (clear, redraw everything, show(); kept
+here as references) with changing sensor values, and compares
+show(full=True) with the damage-tracked show(): bytes sent per frame,
+SPI writes and virtual ms per frame at 10 MHz. The widgets rows draw
+the same frames on the Widgets screens the scripts now use.
+
+A model of the controller replays every SPI write (commands, the
+CASET/RASET window and RAMWR data) into its own RAM, and each run
+checks the panel ends up showing exactly the framebuffer.
+
+Then the same main.py frames are drawn from a 10 ms control loop that
+shows them with lcd.show(), with lcd.start_show() (DMA, and the CPU
+fallback for firmware without rp2.DMA) or hands them to
+Display.DisplayService on the (fake) second core, timing what the loop
+itself spends per frame.
+
+Then the same frames on main.py's widget screen with the buffer in
+RGB565 and in 8- and 4-bit palette mode: buffer size, bytes and SPI
+writes per frame, and for palette mode the expansion work per frame,
+as palette blits into the line buffer and pixels expanded (with the
+host time they took under the fake framebuf, a relative measure only).
+
+The last section compares the original byte-at-a-time write_cmd() /
+write_data() (kept here as a reference) with command() for the init
+sequence and for one window setup: SPI writes, CS/DC pin writes,
+virtual us and peak heap per call (the fake pins' history is included
+in every row).
+"""
+import random
+import time
+import tracemalloc
+
+import fakes
+fakes.install()
+from fakes import framebuf, machine, utime
+
+import ST7789 as st
+from ST7789 import ST7789
+from Display import DisplayService
+from Widgets import Screen, Label, Field, Bar, Indicator, Marker
+
+FRAMES = 200
+LINE_THRESHOLD = 480
+
+class Panel(object):
+    """Controller RAM written through the CASET/RASET window"""
+    def __init__(self, spi, dc):
+        self.dc = dc
+        self.ram = {}
+        self.cmd = None
+        self.params = []
+        self.window = (0, 0, 0, 0)
+        self.pos = None
+        spi.on_write = self.write
+
+    def write(self, buf):
+        data = bytes(buf)
+        if not self.dc.value():
+            for b in data:
+                self.command(b)
+            return
+        if self.cmd == 0x2C:
+            self.pixels(data)
+            return
+        self.params.extend(data)
+        if len(self.params) == 4:
+            a = (self.params[0] << 8) | self.params[1]
+            b = (self.params[2] << 8) | self.params[3]
+            x0, x1, y0, y1 = self.window
+            self.window = (a, b, y0, y1) if self.cmd == 0x2A else (x0, x1, a, b)
+
+    def command(self, b):
+        self.cmd = b
+        self.params = []
+        if b == 0x2C:
+            x0, x1, y0, y1 = self.window
+            self.pos = [x0, y0, None]
+
+    def pixels(self, data):
+        x0, x1, y0, y1 = self.window
+        pos = self.pos
+        for i in range(len(data)):
+            if pos[2] is None:
+                pos[2] = data[i]
+                continue
+            self.ram[(pos[0], pos[1])] = pos[2] | (data[i] << 8)
+            pos[2] = None
+            pos[0] += 1
+            if pos[0] > x1:
+                pos[0] = x0
+                pos[1] += 1
+
+    def matches(self, lcd):
+        for y in range(lcd.height):
+            for x in range(lcd.width):
+                c = lcd.pixel(x, y)
+                if lcd.bpp != 16:
+                    c = lcd.colors.pixel(c, 0)
+                if self.ram.get((x + st.COL_OFFSET, y + st.ROW_OFFSET)) != c:
+                    return False
+        return True
+
+def main_lcd(lcd, state, sensor_values, line_position, last_intersection_choice):
+    """main.py update_lcd()"""
+    lcd.fill(lcd.BLACK)
+    lcd.text("Grid Follower", 65, 5, lcd.WHITE)
+    state_color = lcd.GREEN if state == "FOLLOWING" else lcd.YELLOW
+    lcd.text(f"State: {state}", 10, 25, state_color)
+    lcd.text("Sensors:", 10, 45, lcd.WHITE)
+    for i in range(5):
+        x = 20 + i * 40
+        value = sensor_values[i]
+        color = lcd.GREEN if value < LINE_THRESHOLD else lcd.WHITE
+        lcd.text(str(value), x, 60, color)
+        if value < LINE_THRESHOLD:
+            lcd.fill_rect(x + 5, 80, 20, 10, lcd.GREEN)
+        else:
+            lcd.rect(x + 5, 80, 20, 10, lcd.WHITE)
+    if line_position is not None:
+        indicator_x = 120 + int(line_position * 30)
+        lcd.fill_rect(indicator_x - 5, 100, 10, 10, lcd.YELLOW)
+        lcd.text("^", indicator_x - 3, 112, lcd.YELLOW)
+    if last_intersection_choice:
+        lcd.text(f"Last turn: {last_intersection_choice}", 10, 120, lcd.GREEN)
+
+def follower_lcd(lcd, distance, left_conf, right_conf, movement_state):
+    """curved_obstacle_follower.py update_following_lcd()"""
+    lcd.fill(lcd.BLACK)
+    lcd.text("Curved Following", 50, 5, lcd.WHITE)
+    bar_width = min(int((distance / 100) * 200), 200)
+    lcd.rect(20, 25, 200, 15, lcd.WHITE)
+    lcd.fill_rect(20, 25, bar_width, 15, lcd.GREEN)
+    if left_conf:
+        lcd.fill_rect(5, 25, 10, 15, lcd.YELLOW)
+        lcd.text(f"{left_conf}%", 5, 42, lcd.YELLOW)
+    if right_conf:
+        lcd.fill_rect(225, 25, 10, 15, lcd.YELLOW)
+        lcd.text(f"{right_conf}%", 190, 42, lcd.YELLOW)
+    lcd.text(f"Dist: {distance:.1f}cm", 10, 60, lcd.WHITE)
+    lcd.text(f"State: {movement_state}", 10, 75, lcd.GREEN)
+    lcd.text(f"IR L:{left_conf}% R:{right_conf}%", 10, 90, lcd.BLUE)
+    lcd.text("^^^", 105, 105, lcd.GREEN)
+
+def main_widgets(lcd):
+    """main.py's status screen on Widgets; returns its update_lcd()"""
+    screen = Screen(lcd)
+    screen.add(Label(65, 5, "Grid Follower", lcd.WHITE))
+    state_label = screen.add(Label(10, 25))
+    screen.add(Label(10, 45, "Sensors:", lcd.WHITE))
+    fields = [screen.add(Field(20 + i * 40, 60, "%d")) for i in range(5)]
+    boxes = [screen.add(Indicator(25 + i * 40, 80, 20, 10, lcd.GREEN, lcd.WHITE)) for i in range(5)]
+    marker = screen.add(Marker(100, 10, 10, lcd.YELLOW, "^"))
+    turn = screen.add(Field(10, 120, "Last turn: %s", lcd.GREEN))
+    def update(lcd, state, sensor_values, line_position, last_intersection_choice):
+        state_label.set("State: " + state, lcd.GREEN if state == "FOLLOWING" else lcd.YELLOW)
+        for i in range(5):
+            on_line = sensor_values[i] < LINE_THRESHOLD
+            fields[i].set(sensor_values[i], lcd.GREEN if on_line else lcd.WHITE)
+            boxes[i].set(on_line)
+        marker.set(None if line_position is None else 120 + int(line_position * 30))
+        turn.set(last_intersection_choice or None)
+        screen.update()
+    return update
+
+def follower_widgets(lcd):
+    """curved_obstacle_follower.py's status screen on Widgets; returns its update_following_lcd()"""
+    screen = Screen(lcd)
+    screen.add(Label(50, 5, "Curved Following", lcd.WHITE))
+    bar = screen.add(Bar(20, 25, 200, 15, 100, lcd.GREEN))
+    left_box = screen.add(Indicator(5, 25, 10, 15, lcd.YELLOW))
+    left_field = screen.add(Field(5, 42, "%d%%", lcd.YELLOW))
+    right_box = screen.add(Indicator(225, 25, 10, 15, lcd.YELLOW))
+    right_field = screen.add(Field(190, 42, "%d%%", lcd.YELLOW))
+    dist = screen.add(Field(10, 60, "Dist: %.1fcm", lcd.WHITE))
+    state = screen.add(Field(10, 75, "State: %s", lcd.GREEN))
+    ir = screen.add(Field(10, 90, "IR L:%d%% R:%d%%", lcd.BLUE))
+    screen.add(Label(105, 105, "^^^", lcd.GREEN))
+    def update(lcd, distance, left_conf, right_conf, movement_state):
+        bar.set(distance)
+        left_box.set(left_conf)
+        left_field.set(left_conf or None)
+        right_box.set(right_conf)
+        right_field.set(right_conf or None)
+        dist.set(distance)
+        state.set(movement_state)
+        ir.set((left_conf, right_conf))
+        screen.update()
+    return update
+
+def main_frames():
+    rng = random.Random(1)
+    values = [600, 600, 300, 600, 600]
+    for n in range(FRAMES):
+        values = [max(0, min(1000, v + rng.randint(-15, 15))) for v in values]
+        position = rng.choice((-1, -0.5, 0, 0.5, 1))
+        state = "FOLLOWING" if n % 50 < 40 else "SEARCHING"
+        yield (state, list(values), position, "LEFT" if n > 100 else "")
+
+def follower_frames():
+    rng = random.Random(2)
+    distance = 30.0
+    for n in range(FRAMES):
+        distance = max(16.0, min(80.0, distance + rng.uniform(-1.5, 1.5)))
+        left = rng.choice((0, 0, 0, 60, 90))
+        yield (distance, left, 0, "DRIFT_LEFT" if left else "STRAIGHT")
+
+def run(name, frames, render, full, build=None):
+    """Draw frames() with render, or with what build(lcd) returns (the *_widgets screens)"""
+    fakes.reset()
+    utime.reset()
+    lcd = ST7789()
+    if build:
+        render = build(lcd)
+    spi = machine.SPI.registry[1]
+    panel = Panel(spi, machine.Pin.registry[8])
+    lcd.show()                  # the first show() always sends everything
+    sent = writes = 0
+    start_bytes, start_writes, start_us = spi.bytes_written, spi.writes, utime.now_us()
+    for args in frames():
+        render(lcd, *args)
+        lcd.show(full=full)
+        sent += lcd.frame_bytes
+    n = FRAMES
+    ms = (utime.now_us() - start_us) / 1000.0 / n
+    writes = (spi.writes - start_writes) / n
+    ok = "ok" if panel.matches(lcd) else "PANEL MISMATCH"
+    print("%-38s %8.0f bytes/frame %7.1f writes/frame %7.2f ms/frame  %s" % (
+        name, sent / n, writes, ms, ok))
+
+def control_loop(name, mode):
+    fakes.reset()
+    utime.reset()
+    lcd = ST7789()
+    panel = Panel(lcd.spi, machine.Pin.registry[8])
+    display = DisplayService(lcd) if mode == "core1" else None
+    spent = worst = sent = dropped = 0
+    for args in main_frames():
+        start = utime.now_us()
+        main_lcd(lcd, *args)
+        if display:
+            display.present()
+        elif mode == "dma":
+            if lcd.start_show():
+                sent += lcd.frame_bytes
+            else:
+                dropped += 1
+        else:
+            lcd.show()
+            sent += lcd.frame_bytes
+        us = utime.now_us() - start
+        spent += us
+        worst = max(worst, us)
+        utime.sleep_us(max(0, 10000 - us))
+    extra = ""
+    if display:
+        display.present(wait=True)
+        display.stop()
+        extra = "  %d presented, %d dropped" % (display.presented, display.dropped)
+    else:
+        lcd.wait()
+        lcd.start_show()
+        lcd.wait()
+        extra = "  %d bytes/frame sent, %d dropped" % (sent / (FRAMES - dropped), dropped)
+    ok = "ok" if panel.matches(lcd) else "PANEL MISMATCH"
+    print("%-38s %7.2f ms/frame in the loop, worst %5.2f ms%s  %s" % (
+        name, spent / 1000.0 / FRAMES, worst / 1000.0, extra, ok))
+
+def palette_cost(name, bpp):
+    """main.py frames on the widget screen, in RGB565 or palette mode"""
+    fakes.reset()
+    utime.reset()
+    lcd = ST7789(bpp=bpp)
+    panel = Panel(lcd.spi, machine.Pin.registry[8])
+    render = main_widgets(lcd)
+    lcd.show()
+    blits = [0, 0, 0.0]     # line blits, pixels expanded, host seconds
+    blit = framebuf.FrameBuffer.blit
+    colors = getattr(lcd, "colors", None)
+    def counted(target, fbuf, x, y, key=-1, palette=None):
+        start = time.perf_counter()
+        blit(target, fbuf, x, y, key, palette)
+        blits[2] += time.perf_counter() - start
+        if palette is not None and palette is colors:
+            blits[0] += 1
+            blits[1] += min(target.width, lcd.width + x) * min(target.height, lcd.height + y)
+    framebuf.FrameBuffer.blit = counted
+    sent = writes = 0
+    start_writes, start_us = lcd.spi.writes, utime.now_us()
+    try:
+        for args in main_frames():
+            render(lcd, *args)
+            lcd.show()
+            sent += lcd.frame_bytes
+    finally:
+        framebuf.FrameBuffer.blit = blit
+    n = FRAMES
+    ok = "ok" if panel.matches(lcd) else "PANEL MISMATCH"
+    print("%-24s %6d byte buffer %6.0f bytes/frame %5.1f writes/frame %5.2f ms/frame  %4.1f blits %5.0f px expanded/frame (host %5.0f us)  %s" % (
+        name, len(lcd.buffer), sent / n, (lcd.spi.writes - start_writes) / n, (utime.now_us() - start_us) / 1000.0 / n,
+        blits[0] / n, blits[1] / n, blits[2] * 1e6 / n, ok))
+
+def reference_write_cmd(lcd, cmd):
+    lcd.cs(1)
+    lcd.dc(0)
+    lcd.cs(0)
+    lcd.spi.write(bytearray([cmd]))
+    lcd.cs(1)
+
+def reference_write_data(lcd, buf):
+    lcd.cs(1)
+    lcd.dc(1)
+    lcd.cs(0)
+    lcd.spi.write(bytearray([buf]))
+    lcd.cs(1)
+
+def reference_init(lcd):
+    """init_display() before the INIT table: one transaction per byte"""
+    i = 0
+    while i < len(st.INIT):
+        n = st.INIT[i + 1]
+        reference_write_cmd(lcd, st.INIT[i])
+        for b in st.INIT[i + 2:i + 2 + n]:
+            reference_write_data(lcd, b)
+        i += 2 + n
+
+def reference_window(lcd):
+    for cmd, a, b in ((0x2A, 40, 279), (0x2B, 53, 187)):
+        reference_write_cmd(lcd, cmd)
+        for v in (a >> 8, a & 0xFF, b >> 8, b & 0xFF):
+            reference_write_data(lcd, v)
+    reference_write_cmd(lcd, 0x2C)
+
+def new_window(lcd):
+    lcd._window(0, 0, lcd.width, lcd.height)
+    lcd.command(0x2C)
+
+def command_cost(name, fn):
+    fakes.reset()
+    utime.reset()
+    lcd = ST7789()
+    spi = lcd.spi
+    writes, pins, start = spi.writes, lcd.cs.writes + lcd.dc.writes, utime.now_us()
+    fn(lcd)
+    us = utime.now_us() - start
+    writes = spi.writes - writes
+    pins = lcd.cs.writes + lcd.dc.writes - pins
+    tracemalloc.start()
+    fn(lcd)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("%-38s %4d SPI writes %4d pin writes %6d us  peak %5d bytes" % (name, writes, pins, us, peak))
+
+if __name__ == '__main__':
+    for label, frames, render, widgets in (
+            ("main.py update_lcd", main_frames, main_lcd, main_widgets),
+            ("follower update_following_lcd", follower_frames, follower_lcd, follower_widgets)):
+        run(label + ", full", frames, render, True)
+        run(label + ", partial", frames, render, False)
+        run(label + ", widgets", frames, None, False, widgets)
+    print("")
+    control_loop("control loop, lcd.show()", "show")
+    control_loop("control loop, lcd.start_show()", "dma")
+    dma, st.DMA = st.DMA, None
+    control_loop("control loop, start_show() without DMA", "dma")
+    st.DMA = dma
+    control_loop("control loop, DisplayService", "core1")
+    print("")
+    for bpp in (16, 8, 4):
+        palette_cost("widgets, %d bpp" % bpp, bpp)
+    print("")
+    command_cost("init, write_cmd/write_data", reference_init)
+    command_cost("init, INIT table", lambda lcd: lcd.init_display())
+    command_cost("window, write_cmd/write_data", reference_window)
+    command_cost("window, command()", new_window)
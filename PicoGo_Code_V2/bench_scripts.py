@@ -0,0 +1,84 @@
+"""
+Run the control scripts on the host under the fakes package and report
+how far virtual time got compared with the wall clock, plus what each
+script did to the hardware.
+
+    python3 bench_scripts.py [seconds]
+
+The line sensors see a light line under the middle sensor and the
+ultrasonic sensor sees a target 30 cm ahead with both IR sensors
+clear; nothing moves.
+"""
+import contextlib
+import io
+import sys
+
+import fakes
+from fakes import machine, rp2, utime
+
+SURFACE = (620, 610, 140, 605, 615)
+TARGET_CM = 30
+
+def attach_line_sensor():
+    state = [10]
+    def on_put(word):
+        addr = word >> 28
+        prev = state[0]
+        state[0] = addr
+        return (SURFACE[prev] if prev < len(SURFACE) else 512) << 2
+    rp2.StateMachine.models[1] = on_put
+
+def attach_ultrasonic():
+    """Echo goes high 200 us after the trigger falls, for 58 us per cm"""
+    def echo(now_us):
+        trig = machine.Pin.registry.get(14)
+        if trig is None:
+            return 0
+        fall = None
+        for t, v in reversed(trig.history):
+            if v == 0:
+                fall = t
+                break
+        if fall is None:
+            return 0
+        start = fall + 200
+        return 1 if start <= now_us < start + TARGET_CM * 58 else 0
+
+    def trigger(pin, level):
+        # drive the same edges for code that times them with Pin.irq
+        echo_pin = machine.Pin.registry.get(15)
+        if level or echo_pin is None or echo_pin.irq_handler is None:
+            return
+        for delay, v in ((200, 1), (200 + TARGET_CM * 58, 0)):
+            machine.Timer(-1, mode=machine.Timer.ONE_SHOT, period=(delay + 0.5) / 1000,
+                          callback=lambda t, v=v: echo_pin.drive(v))
+    machine.Pin.drivers[15] = echo
+    machine.Pin.watchers[14] = trigger
+    # the Ultrasonic.echo_timer PIO program returns what is left of the timeout
+    rp2.StateMachine.models[4] = lambda timeout_us: max(timeout_us - TARGET_CM * 58, 0)
+
+def run(path, seconds):
+    fakes.reset()
+    attach_line_sensor()
+    attach_ultrasonic()
+    # IR obstacle sensors read 1 when clear
+    machine.Pin.scripts[2] = [1]
+    machine.Pin.scripts[3] = [1]
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        stats = fakes.run_script(path, seconds)
+    spi = machine.SPI.registry.get(1)
+    motor = [machine.PWM.registry.get(16), machine.PWM.registry.get(21)]
+    motor += [machine.Pin.registry.get(i) for i in (17, 18, 19, 20)]
+    leds = rp2.StateMachine.registry.get(0)
+    print("%-28s %5.1f virtual s in %5.2f wall s (%5.1fx)  SPI %8d bytes  motor writes %5d  LED words %5d  %d lines printed" % (
+        path, stats["virtual_s"], stats["wall_s"], stats["virtual_s"] / stats["wall_s"],
+        spi.bytes_written if spi else 0, sum(p.writes for p in motor if p is not None), leds.puts if leds else 0,
+        out.getvalue().count("\n")))
+    return stats
+
+if __name__ == '__main__':
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    fakes.install()
+    run("main.py", seconds)
+    run("curved_obstacle_follower.py", seconds)
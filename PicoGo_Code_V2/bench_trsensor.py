@@ -0,0 +1,182 @@
+"""
+Host benchmark for TRSensor.AnalogRead against a fake rp2.StateMachine.
+
+Run under CPython from this directory:
+    python3 bench_trsensor.py
+
+Compares the original per-channel CS-toggling read (kept here as a
+reference) with AnalogReadInto(), counting state-machine transfers,
+CS writes, wall time per call and the peak heap used by one call
+(the fake FIFO's own bookkeeping is included in every row).
+
+It then runs background sampling against the fake machine.Timer for
+one virtual second and checks the achieved rate and ring contents.
+
+Finally readCalibrated()/readLine() are checked against the integer
+readCalibratedFixed()/readLineFixed() over random calibrations and
+readings and timed. CPython has a hardware FPU, so the host speedup
+understates what the fixed-point path saves on the RP2040's soft-float.
+
+The last section replays a noisy line-crossing trace through each
+TRFilter mode and counts how often a LINE_THRESHOLD test flips.
+"""
+import random
+import time
+import tracemalloc
+from array import array
+
+import fakes
+fakes.install()
+from fakes import utime
+
+from TRSensor import TRSensor, TRFilter, FILTER_NONE, FILTER_MEDIAN3, FILTER_MEDIAN5, FILTER_EMA
+
+CALLS = 20000
+SURFACE = (612, 580, 120, 595, 640)
+surface = list(SURFACE)
+
+def attach_adc(sm):
+    """Model the TLC1543: each transfer returns the previous address' result"""
+    state = [10]
+    def on_put(word):
+        addr = word >> 28
+        prev = state[0]
+        state[0] = addr
+        return (surface[prev] if prev < len(surface) else 512) << 2
+    sm.on_put(on_put)
+
+def noisy_trace(frames=2000, seed=7, noise=True):
+    """Slow sweep across a light line with gaussian noise and 2% spikes"""
+    rng = random.Random(seed)
+    trace = []
+    for f in range(frames):
+        centre = 2.0 + 2.5 * ((f % 400) / 200.0 - 1.0)
+        frame = []
+        for i in range(5):
+            v = 620 - int(480 * max(0.0, 1.0 - abs(i - centre)))
+            if noise:
+                v += int(rng.gauss(0, 12))
+            if noise and rng.random() < 0.02:
+                v = 620 - v if v > 320 else 620
+            frame.append(max(0, min(1023, v)))
+        trace.append(frame)
+    return trace
+
+def threshold_flips(trace, threshold=480):
+    flips = 0
+    last = [v < threshold for v in trace[0]]
+    for frame in trace[1:]:
+        for i, v in enumerate(frame):
+            on = v < threshold
+            if on != last[i]:
+                flips += 1
+                last[i] = on
+    return flips
+
+def reference_read(trs):
+    """Baseline commit's AnalogRead, minus the trailing sleep_ms(2)"""
+    value = [0]*(trs.numSensors+1)
+    for j in range(0,trs.numSensors+1):
+        trs.CS.value(0)
+        trs.sm.put(j << 28)
+        value[j] = trs.sm.get() & 0xfff
+        trs.CS.value(1)
+        value[j] >>= 2
+    return value[1:]
+
+def measure(name, trs, fn):
+    fn()
+    puts, cs = trs.sm.puts, trs.CS.writes
+    t0 = time.perf_counter()
+    for _ in range(CALLS):
+        fn()
+    elapsed = time.perf_counter() - t0
+    calls = CALLS
+
+    # peak heap growth within a single call; CPython boxes every int
+    # above 256, which MicroPython's tagged small ints do not
+    tracemalloc.start()
+    worst = 0
+    for _ in range(1000):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        worst = max(worst, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    print("%-20s %7.2f us/call  %d sm.put/call  %d CS writes/call  peak %4d bytes/call" % (
+        name, elapsed * 1e6 / calls, (trs.sm.puts - puts) // calls,
+        (trs.CS.writes - cs) // calls, worst))
+
+if __name__ == '__main__':
+    trs = TRSensor()
+    attach_adc(trs.sm)
+    buf = array('H', [0] * trs.numSensors)
+
+    assert reference_read(trs) == list(SURFACE)
+    assert list(trs.AnalogReadInto(buf)) == list(SURFACE)
+
+    measure("reference", trs, lambda: reference_read(trs))
+    measure("AnalogRead", trs, trs.AnalogRead)
+    measure("AnalogReadInto", trs, lambda: trs.AnalogReadInto(buf))
+    print("(the baseline additionally slept 2000 us on every call)")
+
+    print("\nbackground sampling")
+    for rate in (200, 500, 1000):
+        utime.reset()
+        trs.start_sampling(rate_hz=rate, depth=16)
+        start = trs.ring_count
+        utime.sleep_ms(1000)
+        taken = trs.ring_count - start
+        stamp = trs.latest(buf)
+        hist = array('H', [0] * (8 * trs.numSensors))
+        stamps = array('L', [0] * 8)
+        frames = trs.history(8, hist, stamps)
+        steps = set(stamps[i + 1] - stamps[i] for i in range(frames - 1))
+        trs.stop_sampling()
+        assert list(buf) == list(SURFACE) and stamp == stamps[frames - 1]
+        print("%5d Hz requested: %4d samples in 1 s, history %d frames, spacing %s us" % (
+            rate, taken, frames, sorted(steps)))
+
+    print("\nfixed-point calibration")
+    rng = random.Random(4)
+    worst = 0
+    for _ in range(2000):
+        lo = [rng.randrange(0, 600) for _ in range(5)]
+        hi = [l + rng.randrange(1, 1024 - l) for l in lo]
+        trs.set_calibration(lo, hi)
+        for _ in range(20):
+            surface[:] = [rng.randrange(0, 1024) for _ in range(5)]
+            ref = trs.readCalibrated()
+            fixed = trs.readCalibratedFixed()
+            worst = max(worst, max(abs(a - b) for a, b in zip(ref, fixed)))
+            trs.last_value = 2000
+            ref_pos = trs.readLine()[0]
+            trs.last_value = 2000
+            fixed_pos = trs.readLineFixed()[0]
+            worst = max(worst, abs(ref_pos - fixed_pos))
+    print("largest difference over 40000 frames: %d" % worst)
+    assert worst <= 1
+
+    surface[:] = SURFACE
+    trs.set_calibration([100, 110, 90, 105, 95], [700, 720, 690, 710, 705])
+    measure("readCalibrated", trs, trs.readCalibrated)
+    measure("readCalibratedFixed", trs, trs.readCalibratedFixed)
+    measure("readLine", trs, trs.readLine)
+    measure("readLineFixed", trs, trs.readLineFixed)
+
+    print("\nnoise filters on a recorded-style trace")
+    trace = noisy_trace()
+    print("%-10s %5d threshold flips" % ("clean", threshold_flips(noisy_trace(noise=False))))
+    for name, mode in (("none", FILTER_NONE), ("median3", FILTER_MEDIAN3),
+                       ("median5", FILTER_MEDIAN5), ("ema (1/4)", FILTER_EMA)):
+        filt = TRFilter(5, mode)
+        out = []
+        t0 = time.perf_counter()
+        for frame in trace:
+            buf = array('H', frame)
+            filt.apply(buf)
+            out.append(list(buf))
+        elapsed = time.perf_counter() - t0
+        print("%-10s %5d threshold flips  %6.2f us/frame" % (
+            name, threshold_flips(out), elapsed * 1e6 / len(trace)))
@@ -0,0 +1,165 @@
+"""
+Host benchmark for the Ultrasonic module against a modelled HC-SR04.
+
+Run under CPython from this directory:
+    python3 bench_ultrasonic.py
+
+Times one distance reading on the fake virtual clock for a target at
+30 cm, at 75 cm and for nothing in range, comparing the followers' old
+get_distance() (three busy-waited pings with 30 ms sleeps, kept here as
+a reference) with Ultrasonic.measure() and PIOUltrasonic.measure()
+bounded to max_cm=100, and with estimate() on a sensor that pings in
+the background.
+
+It then feeds the same pings, one of which gets no echo, to the old
+average and to estimate().
+"""
+from collections import deque
+
+import fakes
+fakes.install()
+from fakes import machine, rp2, utime
+
+from Ultrasonic import Ultrasonic, PIOUltrasonic
+
+CALLS = 20
+ECHO_DELAY_US = 200
+NO_ECHO_US = 38000      # what the module sends back with nothing in range
+
+outcomes = deque()      # cm per ping, None for no echo; the last one repeats
+ping = [None, 0]        # trigger fall time, echo width
+
+def next_width():
+    cm = outcomes.popleft() if len(outcomes) > 1 else outcomes[0]
+    return NO_ECHO_US if cm is None else int(cm / 0.01715)
+
+def attach_sensor():
+    def echo(now_us):
+        fall, width = ping
+        if fall is None:
+            return 0
+        start = fall + ECHO_DELAY_US
+        return 1 if start <= now_us < start + width else 0
+
+    def trigger(pin, level):
+        if level:
+            return
+        ping[0] = utime.now_us()
+        ping[1] = next_width()
+        echo_pin = machine.Pin.registry.get(15)
+        if echo_pin is None or echo_pin.irq_handler is None:
+            return
+        for delay, v in ((ECHO_DELAY_US, 1), (ECHO_DELAY_US + ping[1], 0)):
+            machine.Timer(-1, mode=machine.Timer.ONE_SHOT, period=(delay + 0.5) / 1000,
+                          callback=lambda t, v=v: echo_pin.drive(v))
+
+    def echo_timer(timeout_us):
+        # finishes when the echo falls, or when the program's waits run out
+        width = next_width()
+        ping[0] = utime.now_us()
+        ping[1] = width
+        utime.advance(min(ECHO_DELAY_US + width, 2 * timeout_us))
+        return timeout_us - width if width < timeout_us else 0
+
+    machine.Pin.drivers[15] = echo
+    machine.Pin.watchers[14] = trigger
+    rp2.StateMachine.models[4] = echo_timer
+
+def reference_get_distance(Echo, Trig):
+    """get_distance() from the followers before the Ultrasonic module"""
+    distances = []
+
+    for _ in range(3):  # Take 3 readings
+        # Send trigger pulse
+        Trig.value(0)
+        Trig.value(1)
+        utime.sleep_us(10)
+        Trig.value(0)
+
+        timeout_start = utime.ticks_us()
+        timeout = 30000  # 30ms timeout
+
+        # Wait for echo to go high
+        while Echo.value() == 0:
+            if utime.ticks_diff(utime.ticks_us(), timeout_start) > timeout:
+                distances.append(999)
+                break
+        else:
+            time1 = utime.ticks_us()
+
+            # Wait for echo to go low
+            while Echo.value() == 1:
+                if utime.ticks_diff(utime.ticks_us(), time1) > timeout:
+                    distances.append(999)
+                    break
+            else:
+                time2 = utime.ticks_us()
+                during = time2 - time1
+                distance = during * 0.034 / 2
+                distances.append(distance)
+
+        utime.sleep_ms(30)  # Short delay between readings
+
+    # Simple average of all readings
+    if len(distances) > 0:
+        avg_distance = sum(distances) / len(distances)
+        return avg_distance
+    else:
+        return 999
+
+def setup(script):
+    fakes.reset()
+    utime.reset()
+    outcomes.clear()
+    outcomes.extend(script)
+    ping[0] = None
+    attach_sensor()
+
+def timed(fn):
+    """Virtual ms per call and the last result"""
+    start = utime.now_us()
+    for _ in range(CALLS):
+        result = fn()
+    return (utime.now_us() - start) / 1000.0 / CALLS, result
+
+def latency(name, make, script):
+    setup(script)
+    fn = make()
+    ms, result = timed(fn)
+    print("%-28s %7.2f ms/call  -> %s" % (name, ms, "%.1f cm" % result if result is not None else "no echo"))
+
+def old():
+    echo = machine.Pin(15, machine.Pin.IN)
+    trig = machine.Pin(14, machine.Pin.OUT)
+    return lambda: reference_get_distance(echo, trig)
+
+def irq_measure():
+    return Ultrasonic(rate_hz=0, max_cm=100).measure
+
+def pio_measure():
+    return PIOUltrasonic(rate_hz=0, max_cm=100).measure
+
+def background():
+    sonar = PIOUltrasonic(rate_hz=20, max_cm=100)
+    utime.sleep_ms(200)
+    return sonar.estimate
+
+if __name__ == '__main__':
+    for label, script in (("target at 30 cm", [30.0]), ("target at 75 cm", [75.0]), ("nothing in range", [None])):
+        print(label)
+        latency("old get_distance", old, script)
+        latency("Ultrasonic.measure", irq_measure, script)
+        latency("PIOUltrasonic.measure", pio_measure, script)
+        latency("background estimate()", background, script)
+        print("")
+
+    print("one missed ping among echoes at 30 cm")
+    setup([30.0, None, 30.2, 30.0])
+    echo = machine.Pin(15, machine.Pin.IN)
+    trig = machine.Pin(14, machine.Pin.OUT)
+    print("%-28s %7.1f cm" % ("old average", reference_get_distance(echo, trig)))
+    setup([30.0, None, 30.2, 30.0])
+    sonar = Ultrasonic(rate_hz=0, max_cm=100)
+    for _ in range(3):
+        sonar.measure(pings=1)
+    print("%-28s %7.1f cm" % ("estimate(3)", sonar.estimate(3)))
@@ -0,0 +1,78 @@
+"""
+Host benchmark for ws2812.NeoPixel.pixels_show() against the fake PIO
+state machine and DMA.
+
+Run under CPython from this directory:
+    python3 bench_ws2812.py
+
+The fake state machine is set to take ws2812.WORD_US per word, as the
+real one does at 800 kHz. For each strip length the CPU path (rp2.DMA
+missing) and the DMA path show one frame; the table gives the virtual
+time pixels_show() spent waiting on the state machine, and how much
+longer busy() stayed True after it returned, which a different frame
+shown straight after spends waiting for the first to latch. Both paths
+must put the same words to the state machine.
+
+The fake clock does not count Python execution, so the brightness
+scaling loop both paths run is timed separately on the host's wall
+clock. It grows with the strip on either path; on the RP2040 the
+interpreter is many times slower than CPython, so read that column for
+its shape rather than its size.
+"""
+import time
+
+import fakes
+fakes.install()
+from fakes import rp2, utime
+
+import ws2812
+from ws2812 import NeoPixel
+
+HAS_DMA = ws2812.DMA
+
+def show_frame(n, dma):
+    fakes.reset()
+    rp2.StateMachine.word_us = ws2812.WORD_US
+    ws2812.DMA = HAS_DMA if dma else None
+    strip = NeoPixel(num=n)
+    utime.sleep_ms(1)
+    for i in range(n):
+        strip.pixels_set(i, (i & 0xFF, 255 - (i & 0xFF), 40))
+
+    t0 = utime.ticks_us()
+    strip.pixels_show()
+    pio = utime.ticks_diff(utime.ticks_us(), t0)
+
+    strip.pixels_show()                         # nothing changed: skipped
+    strip.pixels_set(0, (1, 2, 3))
+    t1 = utime.ticks_us()
+    strip.wait()
+    busy = utime.ticks_diff(utime.ticks_us(), t1)
+    strip.pixels_show()
+    strip.wait()
+    words = list(rp2.StateMachine.registry[ws2812.SM_ID].tx)
+    return pio, busy, words, strip
+
+def scale_us(strip, shows=200):
+    """Host wall time of a pixels_show() with the wait for the last frame taken out"""
+    total = 0.0
+    for k in range(shows):
+        strip.wait()
+        strip.pixels_set(0, (k & 0xFF, 0, 0))
+        t0 = time.perf_counter()
+        strip.pixels_show()
+        total += time.perf_counter() - t0
+    return total * 1e6 / shows
+
+if __name__ == '__main__':
+    print("%5s  %-4s %11s %9s %15s  %s" % ("LEDs", "path", "PIO wait us", "busy us", "scale host us", "words"))
+    for n in (4, 64, 300):
+        results = {}
+        for dma in (False, True):
+            pio, busy, words, strip = show_frame(n, dma)
+            results[dma] = words
+            assert len(words) == 2 * n and strip.skipped == 1
+            print("%5d  %-4s %11d %9d %15.1f  %d" % (n, "DMA" if dma else "CPU", pio, busy, scale_us(strip), len(words)))
+        assert results[False] == results[True]
+    print("(busy us includes the %d us latch gap)" % ws2812.LATCH_US)
+    ws2812.DMA = HAS_DMA
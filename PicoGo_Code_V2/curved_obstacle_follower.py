@@ -1,13 +1,21 @@
 from machine import Pin, PWM
 import time
-from Motor import PicoGo
+from Motor import PicoGo, speed_to_cm_s, cm_s_to_speed
 from ST7789 import ST7789
+from Widgets import Screen, Label, Field, Bar, Indicator
 from ws2812 import NeoPixel
+from Ultrasonic import PIOUltrasonic
+from Tracker import TargetTracker
+from Profiler import LoopProfiler
+
+# Loop profiling, off unless Profiler.ENABLED is set (prints a report every 100 loops)
+PROF = LoopProfiler(("sonar", "ir", "motors", "lcd", "leds", "log"), period_ms=50, report_every=100)
 
 # Initialize logging
 log_file = open("curved_follower.log", "w")
 log_start_time = time.ticks_ms()
 
+@PROF.timed("log")
 def log(message):
     """Write timestamped message to log file"""
     timestamp = time.ticks_diff(time.ticks_ms(), log_start_time) / 1000.0
@@ -21,10 +29,8 @@ M = PicoGo()
 lcd = ST7789()
 strip = NeoPixel()
 buzzer_pwm = PWM(Pin(4))
-
-# Ultrasonic sensor pins
-Echo = Pin(15, Pin.IN)
-Trig = Pin(14, Pin.OUT)
+PROF.wrap(M, ("forward", "backward", "left", "right", "stop", "setMotor"), "motors")
+PROF.wrap(strip, ("pixels_show",), "leds")
 
 # IR sensors for close obstacle detection
 DSR = Pin(2, Pin.IN)
@@ -35,6 +41,13 @@ MIN_DISTANCE = 15  # cm
 MAX_DISTANCE = 80  # cm
 FOLLOW_DISTANCE = 30  # Target following distance in cm
 BASE_SPEED = 17  # Base motor speed (reduced by 3x from 50)
+MAX_FOLLOW_SPEED = 60  # Top speed when keeping up with a fast target
+FOLLOW_GAIN = 0.5  # cm/s of extra speed per cm of distance error
+
+# Ultrasonic sensor, pinged at 20 Hz and timed by PIO state machine 4;
+# echoes from beyond MAX_DISTANCE + 20 cm read as no echo
+SONAR = PIOUltrasonic(rate_hz=20, max_cm=MAX_DISTANCE + 20)
+TRACK = TargetTracker()
 
 # IR Sensor Filtering Class
 class IRFilter:
@@ -123,13 +136,9 @@ def calculate_following_movement(distance, left_ir, right_ir, left_conf, right_c
     if distance > MAX_DISTANCE and not left_ir and not right_ir:
         return (0, 0, "LOST")
     
-    # Calculate base speed from distance
-    if distance < FOLLOW_DISTANCE:
-        base_speed = BASE_SPEED - int((FOLLOW_DISTANCE - distance) * 0.5)
-    else:
-        base_speed = BASE_SPEED + int((distance - FOLLOW_DISTANCE) * 0.3)
-    
-    base_speed = max(10, min(base_speed, 27))  # Clamp speed
+    # Match the target's tracked speed (feed-forward) and close the gap
+    base_speed = cm_s_to_speed(TRACK.follow_speed(FOLLOW_DISTANCE, FOLLOW_GAIN))
+    base_speed = max(10, min(base_speed, MAX_FOLLOW_SPEED))  # Clamp speed
     
     # Case 1: Straight following (ultrasonic only)
     if distance <= MAX_DISTANCE and not left_ir and not right_ir:
@@ -198,47 +207,60 @@ def apply_differential_speeds(left_speed, right_speed):
     else:
         # Differential movement - use setMotor for different speeds
         M.setMotor(left_speed, right_speed)
+    TRACK.robot_speed((speed_to_cm_s(left_speed) + speed_to_cm_s(right_speed)) / 2)
+
+# Status screen: widgets redraw only what changed, so start_show() sends only that
+SCREEN = Screen(lcd)
+SCREEN.add(Label(50, 5, "Curved Following", lcd.WHITE))
+DIST_BAR = SCREEN.add(Bar(20, 25, 200, 15, 100))
+LEFT_IR_BOX = SCREEN.add(Indicator(5, 25, 10, 15, lcd.YELLOW))
+LEFT_IR_FIELD = SCREEN.add(Field(5, 42, "%d%%", lcd.YELLOW))
+RIGHT_IR_BOX = SCREEN.add(Indicator(225, 25, 10, 15, lcd.YELLOW))
+RIGHT_IR_FIELD = SCREEN.add(Field(190, 42, "%d%%", lcd.YELLOW))
+DIST_FIELD = SCREEN.add(Field(10, 60, "Dist: %.1fcm", lcd.WHITE))
+STATE_FIELD = SCREEN.add(Field(10, 75, "State: %s", lcd.GREEN))
+IR_FIELD = SCREEN.add(Field(10, 90, "IR L:%d%% R:%d%%", lcd.BLUE))
+LEFT_ARROW = SCREEN.add(Label(10, 105, "", lcd.YELLOW))
+RIGHT_ARROW = SCREEN.add(Label(190, 105, "", lcd.YELLOW))
+CENTER_ARROW = SCREEN.add(Label(105, 105))
 
+@PROF.timed("lcd")
 def update_following_lcd(state, distance, left_ir, right_ir, left_conf, right_conf, movement_state):
     """Enhanced LCD display with IR sensor information"""
-    lcd.fill(lcd.BLACK)
-    
-    # Title
-    lcd.text("Curved Following", 50, 5, lcd.WHITE)
-    
-    # Distance bar with direction indicator
-    bar_width = min(int((distance / 100) * 200), 200)
-    lcd.rect(20, 25, 200, 15, lcd.WHITE)
+    # Distance bar, empty beyond MAX_DISTANCE
     if distance <= MAX_DISTANCE:
         bar_color = lcd.GREEN if MIN_DISTANCE <= distance <= MAX_DISTANCE else lcd.YELLOW
-        lcd.fill_rect(20, 25, bar_width, 15, bar_color)
+        DIST_BAR.set(distance, bar_color)
+    else:
+        DIST_BAR.set(0)
     
     # IR indicators
-    if left_ir:
-        lcd.fill_rect(5, 25, 10, 15, lcd.YELLOW)  # Left indicator
-        lcd.text(f"{left_conf}%", 5, 42, lcd.YELLOW)
-    if right_ir:
-        lcd.fill_rect(225, 25, 10, 15, lcd.YELLOW)  # Right indicator
-        lcd.text(f"{right_conf}%", 190, 42, lcd.YELLOW)
+    LEFT_IR_BOX.set(left_ir)
+    LEFT_IR_FIELD.set(left_conf if left_ir else None)
+    RIGHT_IR_BOX.set(right_ir)
+    RIGHT_IR_FIELD.set(right_conf if right_ir else None)
     
     # Status text
-    lcd.text(f"Dist: {distance:.1f}cm", 10, 60, lcd.WHITE)
-    lcd.text(f"State: {movement_state}", 10, 75, lcd.GREEN)
+    DIST_FIELD.set(distance)
+    STATE_FIELD.set(movement_state)
     
     # IR confidence
-    lcd.text(f"IR L:{left_conf}% R:{right_conf}%", 10, 90, lcd.BLUE)
+    IR_FIELD.set((left_conf, right_conf))
     
     # Movement indicator
-    if "LEFT" in movement_state:
-        lcd.text("<--", 10, 105, lcd.YELLOW)
-    elif "RIGHT" in movement_state:
-        lcd.text("-->", 190, 105, lcd.YELLOW)
+    LEFT_ARROW.set("<--" if "LEFT" in movement_state else "")
+    RIGHT_ARROW.set("-->" if "RIGHT" in movement_state and "LEFT" not in movement_state else "")
+    if "LEFT" in movement_state or "RIGHT" in movement_state:
+        CENTER_ARROW.set("")
     elif "STRAIGHT" in movement_state:
-        lcd.text("^^^", 105, 105, lcd.GREEN)
+        CENTER_ARROW.set("^^^", lcd.GREEN)
     elif "WIDE" in movement_state:
-        lcd.text("<->", 105, 105, lcd.BLUE)
+        CENTER_ARROW.set("<->", lcd.BLUE)
+    else:
+        CENTER_ARROW.set("")
     
-    lcd.show()
+    SCREEN.update()
+    lcd.start_show()  # DMA; a frame is skipped if the last is still going out
 
 def log_following_state(distance, left_ir, right_ir, left_conf, right_conf, 
                        movement_state, left_speed, right_speed):
@@ -247,47 +269,11 @@ def log_following_state(distance, left_ir, right_ir, left_conf, right_conf,
         f"IR_R={right_ir}({right_conf}%), state={movement_state}, " +
         f"motors=L{left_speed}/R{right_speed}")
 
+@PROF.timed("sonar")
 def get_distance():
-    """Measure distance using ultrasonic sensor with averaging"""
-    distances = []
-    
-    for _ in range(3):  # Take 3 readings
-        # Send trigger pulse
-        Trig.value(0)
-        Trig.value(1)
-        time.sleep_us(10)
-        Trig.value(0)
-        
-        timeout_start = time.ticks_us()
-        timeout = 30000  # 30ms timeout
-        
-        # Wait for echo to go high
-        while Echo.value() == 0:
-            if time.ticks_diff(time.ticks_us(), timeout_start) > timeout:
-                distances.append(999)
-                break
-        else:
-            time1 = time.ticks_us()
-            
-            # Wait for echo to go low
-            while Echo.value() == 1:
-                if time.ticks_diff(time.ticks_us(), time1) > timeout:
-                    distances.append(999)
-                    break
-            else:
-                time2 = time.ticks_us()
-                during = time2 - time1
-                distance = during * 0.034 / 2
-                distances.append(distance)
-        
-        time.sleep_ms(30)  # Short delay between readings
-    
-    # Simple average of all readings
-    if len(distances) > 0:
-        avg_distance = sum(distances) / len(distances)
-        return avg_distance
-    else:
-        return 999
+    """Tracked target distance in cm, predicted between pings; 999 when there is no target"""
+    TRACK.update_sonar(SONAR)
+    return TRACK.predict(default=999)
 
 def scan_for_obstacle(ir_filter):
     """Enhanced scanning with IR hints"""
@@ -299,6 +285,7 @@ def scan_for_obstacle(ir_filter):
     lcd.fill_rect(0, 25, 240, 110, lcd.BLACK)
     lcd.text("SCANNING...", 65, 40, lcd.YELLOW)
     lcd.text("Looking for target", 40, 60, lcd.WHITE)
+    SCREEN.invalidate()  # drawn over the status screen
     
     # Get current IR status
     ir_filter.update()
@@ -397,13 +384,21 @@ log("IR sensors enabled with filtering for curved path following")
 
 try:
     while True:
+        PROF.tick()
+
         # Update IR filter
-        ir_filter.update()
+        with PROF.stage("ir"):
+            ir_filter.update()
         
         # Get sensor readings
-        distance = get_distance()
         left_ir, right_ir = ir_filter.get_filtered()
         left_conf, right_conf = ir_filter.get_confidence()
+        if left_ir and right_ir:
+            TRACK.update_ir(time.ticks_ms())  # something wide right in front
+        distance = get_distance()
+        
+        if state != "FOLLOWING" and TRACK.robot_cm_s:
+            TRACK.robot_speed(0)  # stopped below or turning in place in the scan
         
         if state == "SCANNING":
             M.stop()
@@ -428,6 +423,7 @@ try:
                     lcd.fill_rect(0, 60, 240, 20, lcd.BLACK)
                     lcd.text(f"Next scan in {wait_time:.1f}s", 40, 60, lcd.WHITE)
                     lcd.show()
+                    SCREEN.invalidate()  # drawn over the status screen
             
             update_following_lcd(state, distance, left_ir, right_ir, left_conf, right_conf, "SCANNING")
         
@@ -510,6 +506,7 @@ except Exception as e:
 
 except KeyboardInterrupt:
     log("Program interrupted by user")
+    PROF.report()
     log("Closing log file")
     log_file.close()
     M.stop()
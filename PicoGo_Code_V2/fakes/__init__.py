@@ -0,0 +1,115 @@
+"""
+Host-side stand-ins for the MicroPython hardware modules.
+
+Call install() before importing any of the PicoGo drivers so that
+`import machine`, `rp2`, `framebuf`, `time`/`utime`, `ujson`,
+`micropython`, `uctypes` and `_thread` resolve to the fakes in this package when
+running under CPython on a Linux box. Time is virtual (see
+fakes.utime): sleeping costs nothing on the host, so scripts run
+faster than real time. Hardware accesses cost what they would on the
+Pico (machine.COST_US), and run_script() also charges CALL_US for
+every Python function call the script's own code makes. Without that,
+a loop that never touches the hardware would take no virtual time at
+all, and the host would spin it far more often than the Pico can.
+
+The control scripts are endless loops at module level, so use
+run_script() to execute one for a fixed amount of virtual time:
+
+    import fakes
+    fakes.install()
+    stats = fakes.run_script("main.py", seconds=5)
+"""
+import os
+import runpy
+import sys
+import tempfile
+import time as _host_time
+
+from fakes import _thread, framebuf, machine, micropython, rp2, uctypes, ujson, utime
+
+# virtual microseconds per Python function call in the script's
+# directory (the script and its drivers, not the fakes or the host's
+# library): MicroPython's call overhead plus a short body on a 125 MHz
+# RP2040
+CALL_US = 10
+
+_HERE = os.path.dirname(os.path.abspath(__file__)) + os.sep
+_charge_dir = None
+_charged = {}       # code object -> whether its calls cost CALL_US
+
+def _charge_call(frame, event, arg):
+    if event != "call":
+        return
+    code = frame.f_code
+    charged = _charged.get(code)
+    if charged is None:
+        name = code.co_filename
+        charged = _charged[code] = name.startswith(_charge_dir) and not name.startswith(_HERE)
+    if charged:
+        utime.advance(CALL_US)
+
+MODULES = {
+    "machine": machine,
+    "rp2": rp2,
+    "framebuf": framebuf,
+    "utime": utime,
+    "time": utime,
+    "ujson": ujson,
+    "micropython": micropython,
+    "uctypes": uctypes,
+    "_thread": _thread,
+}
+
+def install():
+    """Register the fake modules in sys.modules"""
+    for name, module in MODULES.items():
+        sys.modules[name] = module
+
+def reset():
+    """Rewind the clock and forget all peripherals, drivers and models"""
+    utime.reset()
+    _thread.reset()
+    machine.reset()
+    rp2.StateMachine.registry.clear()
+    rp2.StateMachine.models.clear()
+    rp2.DMA.claimed.clear()
+    rp2.DMA.sinks.clear()
+
+def run_script(path, seconds, workdir=None):
+    """
+    Run a script until `seconds` of virtual time have passed. Files the
+    script writes (logs) go to workdir, a fresh temporary directory by
+    default. Returns a dict with the virtual and wall-clock time used
+    and the script's globals. Drivers, scripts and models registered on
+    the fakes beforehand stay in place. Each Python function call the
+    script makes costs CALL_US of virtual time.
+    """
+    global _charge_dir
+    install()
+    path = os.path.abspath(path)
+    here = os.path.dirname(path)
+    _charge_dir = here + os.sep
+    _charged.clear()
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    if workdir is None:
+        workdir = tempfile.mkdtemp(prefix="picogo-")
+    old_cwd = os.getcwd()
+    start_us = utime.now_us()
+    utime.set_deadline(start_us + int(seconds * 1_000_000))
+    result = {"globals": None, "stopped": False}
+    wall = _host_time.perf_counter()
+    os.chdir(workdir)
+    sys.setprofile(_charge_call if CALL_US else None)
+    try:
+        result["globals"] = runpy.run_path(path, run_name="__main__")
+    except utime.StopSimulation:
+        result["stopped"] = True
+    finally:
+        sys.setprofile(None)
+        os.chdir(old_cwd)
+        utime.set_deadline(None)
+    result["virtual_s"] = (utime.now_us() - start_us) / 1_000_000
+    result["wall_s"] = _host_time.perf_counter() - wall
+    result["workdir"] = workdir
+    return result
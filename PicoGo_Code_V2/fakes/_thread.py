@@ -0,0 +1,143 @@
+"""
+Fake of the MicroPython `_thread` module: the RP2040's second core.
+
+start_new_thread() runs the function on a host thread standing in for
+core 1, but only one core ever runs at a time. Each has its own
+position on the virtual clock and whichever is behind runs until it
+passes the other, so the interleaving is decided by virtual time alone
+and runs stay deterministic:
+
+    core 0 sleeps 5 ms  -> core 1 runs until its clock passes core 0's
+    core 1 spends 3 ms on SPI -> core 0 catches up before core 1 goes on
+
+Code on either core must therefore wait by sleeping or touching
+hardware (anything that costs virtual time), never by spinning on a
+variable. Like the firmware, only one extra thread can run at a time.
+Anything not defined here is forwarded to the host's _thread.
+"""
+import _thread as _host
+import sys
+import threading
+import traceback
+
+from fakes import utime
+
+class _Core1(object):
+    def __init__(self, now_us):
+        self.now_us = now_us
+        self.go = threading.Event()
+        self.done = False
+
+_core1 = None
+_core0_us = 0
+_core0_go = threading.Event()
+error = RuntimeError
+
+def __getattr__(name):
+    return getattr(_host, name)
+
+def _to_core1():
+    """On core 0: let core 1 run until it passes core 0's clock"""
+    global _core0_us
+    _core0_us = utime._now_us
+    utime._core = 1
+    utime._now_us = _core1.now_us
+    _core0_go.clear()
+    _core1.go.set()
+    _core0_go.wait()
+    utime._core = 0
+    utime._now_us = _core0_us
+
+def _to_core0(core):
+    core.now_us = utime._now_us
+    utime._core = 0
+    utime._now_us = _core0_us
+    core.go.clear()
+    _core0_go.set()
+
+def _sync():
+    core = _core1
+    if core is None or core.done:
+        return
+    if utime._core == 0:
+        if core.now_us <= utime._now_us:
+            _to_core1()
+    elif utime._now_us > _core0_us:
+        _to_core0(core)
+        core.go.wait()
+        utime._core = 1
+        utime._now_us = core.now_us
+
+def start_new_thread(function, args, kwargs=None):
+    global _core1
+    if _core1 is not None and not _core1.done:
+        raise OSError(16, "core1 in use")
+    core = _Core1(utime._now_us)
+
+    def body():
+        core.go.wait()
+        try:
+            function(*args, **(kwargs or {}))
+        except SystemExit:
+            pass
+        except BaseException:
+            print("Unhandled exception in thread started by", function, file=sys.stderr)
+            traceback.print_exc()
+        finally:
+            core.done = True
+            _to_core0(core)
+
+    _core1 = core
+    utime._sync = _sync
+    threading.Thread(target=body, daemon=True).start()
+    _to_core1()
+    return 1
+
+def reset():
+    """Forget core 1; a thread still parked on it never runs again"""
+    global _core1
+    _core1 = None
+
+def get_ident():
+    return utime._core + 1
+
+def exit():
+    raise SystemExit
+
+def stack_size(size=None):
+    return 0
+
+class _Lock(object):
+    def __init__(self):
+        self.held = False
+
+    def acquire(self, waitflag=1, timeout=-1):
+        if waitflag:
+            start = utime._now_us
+            while self.held:
+                if timeout >= 0 and utime._now_us - start >= timeout * 1_000_000:
+                    return False
+                utime.advance(1)
+        elif self.held:
+            return False
+        self.held = True
+        return True
+
+    def release(self):
+        if not self.held:
+            raise RuntimeError("release unlocked lock")
+        self.held = False
+
+    def locked(self):
+        return self.held
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+def allocate_lock():
+    return _Lock()
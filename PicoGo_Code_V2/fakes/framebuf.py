@@ -0,0 +1,257 @@
+"""
+Fake of the MicroPython `framebuf` module.
+
+Pixels land in the caller's buffer in the same layout the firmware
+uses (RGB565 is a little-endian uint16 per pixel), so drivers that
+ship the buffer over SPI see real data. text() draws 8x8 cells like
+the firmware, but the glyph shapes are placeholders derived from the
+character code; only their position and extent are faithful. Methods
+call each other through FrameBuffer, not self, so subclasses that
+override drawing methods see one call per call they make, as on the
+firmware.
+"""
+
+MONO_VLSB = 0
+MVLSB = MONO_VLSB
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+
+_BPP = {
+    MONO_VLSB: 1,
+    RGB565: 16,
+    GS4_HMSB: 4,
+    MONO_HLSB: 1,
+    MONO_HMSB: 1,
+    GS2_HMSB: 2,
+    GS8: 8,
+}
+
+def _glyph(ch):
+    code = ord(ch)
+    if code <= 32 or code > 126:
+        return (0,) * 8
+    h = (code * 2654435761) & 0xFFFFFFFF
+    rows = []
+    for r in range(7):
+        rows.append(((h >> (r * 4)) & 0x3F) << 1 | 0x02)
+    rows.append(0)
+    return tuple(rows)
+
+class FrameBuffer(object):
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format not in _BPP:
+            raise ValueError("invalid format")
+        self.buf = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = width if stride is None else stride
+        bits = self.stride * height * _BPP[format]
+        if format == MONO_VLSB:
+            bits = self.stride * ((height + 7) // 8) * 8
+        if len(memoryview(buffer).cast("B")) * 8 < bits:
+            raise ValueError("buffer too small")
+
+    # -- pixel access ---------------------------------------------------
+
+    def _get(self, x, y):
+        f = self.format
+        buf = self.buf
+        if f == RGB565:
+            i = (y * self.stride + x) * 2
+            return buf[i] | (buf[i + 1] << 8)
+        if f == GS8:
+            return buf[y * self.stride + x]
+        if f == GS4_HMSB:
+            i = y * self.stride + x
+            b = buf[i >> 1]
+            return (b >> 4) if (i & 1) == 0 else (b & 0x0F)
+        if f == GS2_HMSB:
+            i = y * self.stride + x
+            return (buf[i >> 2] >> ((i & 3) * 2)) & 0x03
+        if f == MONO_HLSB:
+            i = y * ((self.stride + 7) & ~7) + x
+            return (buf[i >> 3] >> (7 - (i & 7))) & 1
+        if f == MONO_HMSB:
+            i = y * ((self.stride + 7) & ~7) + x
+            return (buf[i >> 3] >> (i & 7)) & 1
+        # MONO_VLSB
+        return (buf[(y >> 3) * self.stride + x] >> (y & 7)) & 1
+
+    def _set(self, x, y, c):
+        f = self.format
+        buf = self.buf
+        if f == RGB565:
+            i = (y * self.stride + x) * 2
+            buf[i] = c & 0xFF
+            buf[i + 1] = (c >> 8) & 0xFF
+        elif f == GS8:
+            buf[y * self.stride + x] = c & 0xFF
+        elif f == GS4_HMSB:
+            i = y * self.stride + x
+            b = buf[i >> 1]
+            if (i & 1) == 0:
+                buf[i >> 1] = (b & 0x0F) | ((c & 0x0F) << 4)
+            else:
+                buf[i >> 1] = (b & 0xF0) | (c & 0x0F)
+        elif f == GS2_HMSB:
+            i = y * self.stride + x
+            s = (i & 3) * 2
+            buf[i >> 2] = (buf[i >> 2] & ~(0x03 << s) & 0xFF) | ((c & 0x03) << s)
+        elif f == MONO_HLSB:
+            i = y * ((self.stride + 7) & ~7) + x
+            bit = 0x80 >> (i & 7)
+            buf[i >> 3] = (buf[i >> 3] | bit) if c else (buf[i >> 3] & ~bit & 0xFF)
+        elif f == MONO_HMSB:
+            i = y * ((self.stride + 7) & ~7) + x
+            bit = 1 << (i & 7)
+            buf[i >> 3] = (buf[i >> 3] | bit) if c else (buf[i >> 3] & ~bit & 0xFF)
+        else:
+            i = (y >> 3) * self.stride + x
+            bit = 1 << (y & 7)
+            buf[i] = (buf[i] | bit) if c else (buf[i] & ~bit & 0xFF)
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    # -- fills ----------------------------------------------------------
+
+    def fill_rect(self, x, y, w, h, c):
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if self.format == RGB565:
+            row = bytes((c & 0xFF, (c >> 8) & 0xFF)) * (x1 - x0)
+            for yy in range(y0, y1):
+                i = (yy * self.stride + x0) * 2
+                self.buf[i:i + len(row)] = row
+        elif self.format == GS8:
+            row = bytes((c & 0xFF,)) * (x1 - x0)
+            for yy in range(y0, y1):
+                i = yy * self.stride + x0
+                self.buf[i:i + len(row)] = row
+        else:
+            for yy in range(y0, y1):
+                for xx in range(x0, x1):
+                    self._set(xx, yy, c)
+
+    def fill(self, c):
+        FrameBuffer.fill_rect(self, 0, 0, self.width, self.height, c)
+
+    def hline(self, x, y, w, c):
+        FrameBuffer.fill_rect(self, x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        FrameBuffer.fill_rect(self, x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            FrameBuffer.fill_rect(self, x, y, w, h, c)
+            return
+        FrameBuffer.fill_rect(self, x, y, w, 1, c)
+        FrameBuffer.fill_rect(self, x, y + h - 1, w, 1, c)
+        FrameBuffer.fill_rect(self, x, y, 1, h, c)
+        FrameBuffer.fill_rect(self, x + w - 1, y, 1, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            FrameBuffer.pixel(self, x0, y0, c)
+            if x0 == x1 and y0 == y1:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def ellipse(self, x, y, xr, yr, c, f=False, m=0xF):
+        for yy in range(-yr, yr + 1):
+            for xx in range(-xr, xr + 1):
+                inside = (xx * xx) * (yr * yr) + (yy * yy) * (xr * xr) <= (xr * xr) * (yr * yr)
+                if inside and (f or self._edge(xx, yy, xr, yr)):
+                    FrameBuffer.pixel(self, x + xx, y + yy, c)
+
+    def poly(self, x, y, coords, c, f=False):
+        n = len(coords) // 2
+        if f:
+            ys = [coords[2 * i + 1] for i in range(n)]
+            for yy in range(min(ys), max(ys) + 1):
+                xs = []
+                for i in range(n):
+                    ax, ay = coords[2 * i], coords[2 * i + 1]
+                    bx, by = coords[2 * ((i + 1) % n)], coords[2 * ((i + 1) % n) + 1]
+                    if (ay <= yy < by) or (by <= yy < ay):
+                        xs.append(ax + (yy - ay) * (bx - ax) // (by - ay))
+                xs.sort()
+                for i in range(0, len(xs) - 1, 2):
+                    FrameBuffer.fill_rect(self, x + xs[i], y + yy, xs[i + 1] - xs[i] + 1, 1, c)
+        for i in range(n):
+            j = (i + 1) % n
+            FrameBuffer.line(self, x + coords[2 * i], y + coords[2 * i + 1],
+                             x + coords[2 * j], y + coords[2 * j + 1], c)
+
+    @staticmethod
+    def _edge(xx, yy, xr, yr):
+        for nx, ny in ((xx + 1, yy), (xx - 1, yy), (xx, yy + 1), (xx, yy - 1)):
+            if (nx * nx) * (yr * yr) + (ny * ny) * (xr * xr) > (xr * xr) * (yr * yr):
+                return True
+        return False
+
+    # -- text, blit, scroll ---------------------------------------------
+
+    def text(self, s, x, y, c=1):
+        for ch in str(s):
+            rows = _glyph(ch)
+            for r in range(8):
+                bits = rows[r]
+                if bits:
+                    for b in range(8):
+                        if bits & (0x80 >> b):
+                            FrameBuffer.pixel(self, x + b, y + r, c)
+            x += 8
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            fbuf = FrameBuffer(*fbuf)
+        for yy in range(fbuf.height):
+            ty = y + yy
+            if not 0 <= ty < self.height:
+                continue
+            for xx in range(fbuf.width):
+                tx = x + xx
+                if not 0 <= tx < self.width:
+                    continue
+                c = fbuf._get(xx, yy)
+                if c == key:
+                    continue
+                if palette is not None:
+                    c = palette._get(c, 0)
+                self._set(tx, ty, c)
+
+    def scroll(self, xstep, ystep):
+        w, h = self.width, self.height
+        ys = range(h - 1, -1, -1) if ystep > 0 else range(h)
+        xs = range(w - 1, -1, -1) if xstep > 0 else range(w)
+        for yy in ys:
+            for xx in xs:
+                sx, sy = xx - xstep, yy - ystep
+                if 0 <= sx < w and 0 <= sy < h:
+                    self._set(xx, yy, self._get(sx, sy))
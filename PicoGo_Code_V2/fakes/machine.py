@@ -0,0 +1,371 @@
+"""
+Fake of the MicroPython `machine` module.
+
+Every peripheral records what the code under test did to it, and the
+inputs can be scripted:
+
+    Pin.drivers[15] = lambda now_us: 1      # Echo pin follows a function of time
+    Pin.scripts[2] = [1, 1, 0, 0]           # IR pin returns these, then repeats the last
+    ADC.drivers[26] = lambda now_us: 40000  # battery divider
+    Pin.watchers[14] = on_trigger           # called as on_trigger(pin, level) on every change
+
+Drivers, scripts and watchers are looked up by pin id when the peripheral is
+constructed, so they can be set up before a script creates its pins.
+The newest instance for each id is kept in Pin.registry (likewise
+PWM.registry, SPI.registry, ...) for inspection afterwards.
+
+Each hardware access costs a little virtual time (see COST_US), so
+busy-wait loops terminate and a run can be timed on the virtual clock.
+"""
+from collections import deque
+
+from fakes import utime
+
+# virtual microseconds charged per access, roughly what the call
+# costs in MicroPython on a 125 MHz RP2040
+COST_US = {
+    "pin": 2,
+    "pwm": 4,
+    "adc": 5,
+    "spi": 6,
+    "uart": 6,
+}
+
+HISTORY = 256
+
+def _cost(kind):
+    utime.advance(COST_US[kind])
+
+def _script_value(script, default):
+    if script:
+        if len(script) > 1:
+            return script.popleft()
+        return script[0]
+    return default
+
+def reset():
+    """Forget every registered instance, driver and script"""
+    for cls in (Pin, PWM, SPI, UART, ADC):
+        cls.registry.clear()
+    for mem in (mem8, mem16, mem32):
+        mem.values.clear()
+    Pin.drivers.clear()
+    Pin.scripts.clear()
+    Pin.watchers.clear()
+    ADC.drivers.clear()
+    ADC.scripts.clear()
+    UART.scripts.clear()
+
+class _Mem(object):
+    """machine.mem32 and friends: registers read as last written, 0 by default"""
+    def __init__(self):
+        self.values = {}
+
+    def __getitem__(self, address):
+        return self.values.get(address, 0)
+
+    def __setitem__(self, address, value):
+        self.values[address] = value
+
+mem8 = _Mem()
+mem16 = _Mem()
+mem32 = _Mem()
+
+def freq(hz=None):
+    if hz is None:
+        return 125_000_000
+
+def disable_irq():
+    return 0
+
+def enable_irq(state=0):
+    pass
+
+def unique_id():
+    return b"\xe6\x60\x58\x38\x83\x48\x23\x2e"
+
+def reset_cause():
+    return 1
+
+def idle():
+    utime.advance(1)
+
+def lightsleep(ms=0):
+    utime.sleep_ms(ms)
+
+class Pin(object):
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    ALT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    registry = {}
+    drivers = {}
+    scripts = {}
+    watchers = {}
+
+    def __init__(self, id, mode=IN, pull=None, value=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self._value = 0
+        self.writes = 0
+        self.reads = 0
+        self.history = deque((), HISTORY)
+        self.driver = Pin.drivers.get(id)
+        script = Pin.scripts.get(id)
+        self.script = deque(script) if script is not None else None
+        self.watcher = Pin.watchers.get(id)
+        self.irq_handler = None
+        self.irq_trigger = 0
+        Pin.registry[id] = self
+        if value is not None:
+            self.value(value)
+
+    def init(self, mode=IN, pull=None, value=None):
+        self.mode = mode
+        self.pull = pull
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        _cost("pin")
+        if v is None:
+            self.reads += 1
+            if self.driver is not None:
+                self._set(self.driver(utime.now_us()))
+            elif self.script is not None:
+                self._set(_script_value(self.script, self._value))
+            return self._value
+        self.writes += 1
+        self._set(v)
+
+    def _set(self, v):
+        v = 1 if v else 0
+        old = self._value
+        if v == old:
+            return
+        self._value = v
+        self.history.append((utime.now_us(), v))
+        if self.watcher is not None:
+            self.watcher(self, v)
+        if self.irq_handler is not None:
+            if (v and self.irq_trigger & Pin.IRQ_RISING) or (not v and self.irq_trigger & Pin.IRQ_FALLING):
+                self.irq_handler(self)
+
+    def drive(self, v):
+        """Set the level from outside, as the connected device would"""
+        self._set(v)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def high(self):
+        self.value(1)
+
+    def low(self):
+        self.value(0)
+
+    def toggle(self):
+        self.value(0 if self._value else 1)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        self.irq_handler = handler
+        self.irq_trigger = trigger
+
+class PWM(object):
+    registry = {}
+
+    def __init__(self, pin, freq=None, duty_u16=None):
+        self.pin = pin
+        self._freq = 0
+        self._duty = 0
+        self.writes = 0
+        self.history = deque((), HISTORY)
+        PWM.registry[pin.id] = self
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        _cost("pwm")
+        self.writes += 1
+        self._freq = int(value)
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self._duty
+        _cost("pwm")
+        self.writes += 1
+        value = int(value)
+        if not 0 <= value <= 0xFFFF:
+            raise ValueError("duty_u16 out of range")
+        self._duty = value
+        self.history.append((utime.now_us(), value))
+
+    def deinit(self):
+        self._duty = 0
+
+class SPI(object):
+    """
+    Counts bytes and transfers; each write costs its time on the wire.
+    The data register is a sink for fake rp2.DMA transfers, which take
+    the same wire time but leave the CPU free.
+    """
+    registry = {}
+    DR = {0: 0x4003C008, 1: 0x40040008}     # RP2040 SSPDR addresses
+
+    def __init__(self, id, baudrate=1_000_000, polarity=0, phase=0, sck=None, mosi=None, miso=None, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.bytes_written = 0
+        self.writes = 0
+        self.on_write = None
+        SPI.registry[id] = self
+        from fakes import rp2
+        rp2.DMA.sinks[SPI.DR[id]] = self._dma_write
+
+    def _dma_write(self, buf):
+        n = len(buf)
+        self.bytes_written += n
+        if self.on_write is not None:
+            self.on_write(buf)
+        return n * 8 * 1_000_000 // self.baudrate
+
+    def init(self, baudrate=None, **kwargs):
+        if baudrate is not None:
+            self.baudrate = baudrate
+
+    def write(self, buf):
+        n = len(buf)
+        self.writes += 1
+        self.bytes_written += n
+        if self.on_write is not None:
+            self.on_write(buf)
+        utime.advance(COST_US["spi"] + n * 8 * 1_000_000 // self.baudrate)
+
+    def read(self, nbytes, write=0):
+        self.write(bytes(nbytes))
+        return bytes(nbytes)
+
+    def deinit(self):
+        pass
+
+class UART(object):
+    registry = {}
+    scripts = {}
+
+    def __init__(self, id, baudrate=115200, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.tx = bytearray()
+        self.rx = bytearray(UART.scripts.get(id, b""))
+        UART.registry[id] = self
+
+    def init(self, baudrate=None, **kwargs):
+        if baudrate is not None:
+            self.baudrate = baudrate
+
+    def feed(self, data):
+        self.rx.extend(data)
+
+    def any(self):
+        _cost("uart")
+        return len(self.rx)
+
+    def read(self, nbytes=None):
+        _cost("uart")
+        if not self.rx:
+            return None
+        if nbytes is None:
+            nbytes = len(self.rx)
+        data = bytes(self.rx[:nbytes])
+        del self.rx[:nbytes]
+        return data
+
+    def readline(self):
+        i = self.rx.find(b"\n")
+        return self.read(len(self.rx) if i < 0 else i + 1)
+
+    def write(self, buf):
+        _cost("uart")
+        self.tx.extend(buf)
+        return len(buf)
+
+class ADC(object):
+    CORE_TEMP = 4
+
+    registry = {}
+    drivers = {}
+    scripts = {}
+
+    def __init__(self, pin):
+        self.id = pin.id if isinstance(pin, Pin) else pin
+        self.reads = 0
+        self.driver = ADC.drivers.get(self.id)
+        script = ADC.scripts.get(self.id)
+        self.script = deque(script) if script is not None else None
+        ADC.registry[self.id] = self
+
+    def read_u16(self):
+        _cost("adc")
+        self.reads += 1
+        if self.driver is not None:
+            return int(self.driver(utime.now_us())) & 0xFFFF
+        if self.script is not None:
+            return _script_value(self.script, 0)
+        if self.id == ADC.CORE_TEMP:
+            return 14000
+        return 0
+
+class Timer(object):
+    """Periodic/one-shot timer driven by the fake utime virtual clock"""
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self.callback = None
+        self.mode = Timer.PERIODIC
+        self.period_us = 0
+        self.fired = 0
+        self._due_us = 0
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, freq=None, period=None, callback=None, hard=None):
+        if freq is not None:
+            self.period_us = int(1_000_000 / freq)
+        elif period is not None:
+            self.period_us = int(period * 1000)
+        else:
+            raise ValueError("need freq or period")
+        self.mode = mode
+        self.callback = callback
+        self._due_us = utime.now_us() + self.period_us
+        utime._register(self)
+
+    def deinit(self):
+        utime._unregister(self)
+
+    def _fire(self):
+        self.fired += 1
+        if self.mode == Timer.PERIODIC:
+            self._due_us += self.period_us
+        else:
+            utime._unregister(self)
+        if self.callback is not None:
+            self.callback(self)
@@ -0,0 +1,244 @@
+"""Fake of the MicroPython `rp2` module"""
+from collections import deque
+
+from fakes import utime
+
+class PIO(object):
+    OUT_LOW = 0
+    OUT_HIGH = 1
+    IN_LOW = 0
+    IN_HIGH = 1
+    SHIFT_LEFT = 0
+    SHIFT_RIGHT = 1
+    JOIN_NONE = 0
+    JOIN_TX = 1
+    JOIN_RX = 2
+
+    def __init__(self, id=0):
+        self.id = id
+
+    def remove_program(self, program=None):
+        pass
+
+    def irq(self, handler=None, trigger=0, hard=False):
+        pass
+
+class PIOProgram(object):
+    """Stands in for an assembled program; the body is never executed"""
+    def __init__(self, func, options):
+        self.name = func.__name__
+        self.options = options
+
+def asm_pio(**options):
+    def decorator(func):
+        return PIOProgram(func, options)
+    return decorator
+
+class StateMachine(object):
+    """
+    Records every word written to the TX FIFO and serves the RX FIFO.
+    A host-side model of the peripheral can be attached with
+    on_put(callback): the callback receives each word put and may
+    return a word (or list of words) to push into the RX FIFO.
+    Models registered in StateMachine.models[id] are attached when the
+    state machine is constructed. get() on an empty RX FIFO returns
+    idle_word, as a floating input would read, instead of hanging.
+    A handler set with irq() runs after each put whose model pushed
+    something, standing in for the program's `irq` instruction.
+    Each word costs word_us of virtual time. The TX FIFO register
+    (TXF, one per state machine) is a DMA sink, so words can also
+    arrive by rp2.DMA.
+    """
+    registry = {}
+    models = {}
+    word_us = 5
+    PIO_BASE = (0x50200000, 0x50300000)     # RP2040 PIO0, PIO1
+    TXF0 = 0x010
+
+    @staticmethod
+    def txf(id):
+        """Address of state machine id's TX FIFO register"""
+        return StateMachine.PIO_BASE[id // 4] + StateMachine.TXF0 + 4 * (id % 4)
+
+    def __init__(self, id, program=None, freq=125_000_000, **kwargs):
+        self.id = id
+        self.program = program
+        self.freq = freq
+        self.kwargs = kwargs
+        self.running = 0
+        self.tx = deque((), 1024)
+        self.rx = deque()
+        self.puts = 0
+        self.gets = 0
+        self._on_put = StateMachine.models.get(id)
+        self.idle_word = 0
+        self.irq_handler = None
+        StateMachine.registry[id] = self
+        DMA.sinks[StateMachine.txf(id)] = self._dma_write
+
+    def active(self, value=None):
+        if value is None:
+            return self.running
+        self.running = 1 if value else 0
+
+    def on_put(self, callback):
+        self._on_put = callback
+
+    def put(self, value, shift=0):
+        if isinstance(value, int):
+            words = (value,)
+        else:
+            words = value
+        for word in words:
+            utime.advance(self.word_us)
+            self._push((word << shift) & 0xFFFFFFFF)
+
+    def _push(self, word):
+        self.puts += 1
+        self.tx.append(word)
+        if self._on_put is not None:
+            result = self._on_put(word)
+            if isinstance(result, int):
+                self.rx.append(result)
+            elif result is not None:
+                self.rx.extend(result)
+            if result is not None and self.irq_handler is not None:
+                self.irq_handler(self)
+
+    def _dma_write(self, data):
+        words = memoryview(data).cast("I")
+        for word in words:
+            self._push(word)
+        return len(words) * self.word_us
+
+    def get(self, buf=None, shift=0):
+        self.gets += 1
+        utime.advance(self.word_us)
+        if not self.rx:
+            return self.idle_word >> shift
+        return self.rx.popleft() >> shift
+
+    def rx_fifo(self):
+        return len(self.rx)
+
+    def tx_fifo(self):
+        return 0
+
+    def irq(self, handler=None, trigger=0, hard=False):
+        self.irq_handler = handler
+
+class DMA(object):
+    """
+    A DMA channel. config()/active() start a transfer of count items
+    from the read buffer; if the write address has a sink in DMA.sinks
+    (fakes.machine.SPI registers its data register, StateMachine its
+    TX FIFO) the data goes to
+    it and the sink returns how many us the peripheral takes to consume
+    it. The channel stays active() that long on the virtual clock, then
+    calls the irq() handler unless ctrl has irq_quiet set. Transfers to
+    other addresses finish at once. Only CHANNELS can be claimed.
+    """
+    CHANNELS = 12
+    sinks = {}
+    claimed = set()
+
+    # CTRL register fields: name -> (shift, width)
+    FIELDS = {
+        "enable": (0, 1),
+        "high_pri": (1, 1),
+        "size": (2, 2),
+        "inc_read": (4, 1),
+        "inc_write": (5, 1),
+        "ring_size": (6, 4),
+        "ring_sel": (10, 1),
+        "chain_to": (11, 4),
+        "treq_sel": (15, 6),
+        "irq_quiet": (21, 1),
+        "bswap": (22, 1),
+        "sniff_en": (23, 1),
+    }
+
+    def __init__(self):
+        for ch in range(DMA.CHANNELS):
+            if ch not in DMA.claimed:
+                break
+        else:
+            raise OSError(16, "no free DMA channels")
+        DMA.claimed.add(ch)
+        self.channel = ch
+        self.read = None
+        self.write = None
+        self.count = 0
+        self.ctrl = self.pack_ctrl()
+        self.handler = None
+        self.running = False
+        self.transfers = 0
+        self._timer = None
+
+    def pack_ctrl(self, default=None, **kwargs):
+        if default is None:
+            fields = {"enable": 1, "size": 2, "inc_read": 1, "inc_write": 1,
+                      "chain_to": self.channel, "treq_sel": 0x3F, "irq_quiet": 1}
+        else:
+            fields = self.unpack_ctrl(default)
+        for name, value in kwargs.items():
+            if name not in DMA.FIELDS:
+                raise TypeError("unknown ctrl field " + name)
+            fields[name] = int(value)
+        ctrl = 0
+        for name, value in fields.items():
+            shift, width = DMA.FIELDS[name]
+            ctrl |= (value & ((1 << width) - 1)) << shift
+        return ctrl
+
+    @staticmethod
+    def unpack_ctrl(ctrl):
+        return {name: (ctrl >> shift) & ((1 << width) - 1) for name, (shift, width) in DMA.FIELDS.items()}
+
+    def config(self, read=None, write=None, count=None, ctrl=None, trigger=False):
+        if read is not None:
+            self.read = read
+        if write is not None:
+            self.write = write
+        if count is not None:
+            self.count = count
+        if ctrl is not None:
+            self.ctrl = ctrl
+        if trigger:
+            self._start()
+
+    def active(self, value=None):
+        if value is None:
+            return self.running
+        if value:
+            self._start()
+        elif self._timer is not None:
+            self._timer.deinit()
+            self.running = False
+
+    def irq(self, handler=None, hard=False):
+        self.handler = handler
+
+    def close(self):
+        self.active(0)
+        DMA.claimed.discard(self.channel)
+
+    def _start(self):
+        from fakes import machine
+        size = 1 << ((self.ctrl >> 2) & 3)
+        n = self.count * size
+        if isinstance(self.read, int):
+            data = bytes(n)
+        else:
+            data = bytes(memoryview(self.read).cast("B")[:n])
+        sink = DMA.sinks.get(self.write)
+        us = sink(data) if sink is not None else 0
+        self.running = True
+        self.transfers += 1
+        self._timer = machine.Timer(-1, mode=machine.Timer.ONE_SHOT, period=us / 1000, callback=self._done)
+
+    def _done(self, t):
+        self.running = False
+        if self.handler is not None and not (self.ctrl >> 21) & 1:
+            self.handler(self)
+
@@ -0,0 +1,424 @@
+"""
+Deterministic PicoGo simulator on top of the fakes.
+
+The robot is driven by exactly what Motor.PicoGo writes: the duty of
+PWMA/PWMB (pins 16/21) and the AIN1/AIN2/BIN1/BIN2 direction pins.
+Each wheel follows its duty through a deadband, a first-order motor
+lag and the sagging battery voltage, and the chassis moves with
+differential-drive kinematics, stepped every millisecond of virtual
+time. The sensors read the simulated world:
+
+  * the five TR reflectance sensors sample a raster TrackMap (through
+    the TLC1543 model on PIO state machine 1),
+  * the HC-SR04 echo (pin 15) answers each trigger pulse (pin 14) with
+    the distance to the nearest polygon obstacle in its beam, and the
+    echo_timer PIO program (state machine 4) returns the same width,
+  * the IR sensors DSR/DSL (pins 2/3) read 0 while an obstacle is in
+    range, and the battery ADC (pin 26) reports the loaded voltage.
+
+Scripts run unmodified:
+
+    from fakes import sim
+    world = sim.grid_world()
+    result = sim.Simulation(world).run("follow_grid.py", seconds=20)
+
+Units are millimetres, seconds and radians; x points right, y up and
+heading 0 is along +x.
+"""
+import math
+import random
+
+from fakes import machine, rp2, utime
+
+PARAMS = {
+    "wheel_base_mm": 95.0,          # distance between the wheels
+    "max_speed_mm_s": 600.0,        # wheel speed at 100% duty on a full battery
+    "motor_tau_s": 0.08,            # first-order motor/chassis lag
+    "deadband": 0.03,               # duty fraction below which the wheel stalls
+    "sensor_pitch_mm": 16.0,        # TR sensor spacing, sensor 0 on the left
+    "sensor_forward_mm": 45.0,      # TR sensor row ahead of the axle
+    "sonar_forward_mm": 55.0,
+    "sonar_half_angle_deg": 7.5,
+    "sonar_max_mm": 4000.0,
+    "sonar_timeout_us": 38000,      # echo width the HC-SR04 gives with no target
+    "ir_forward_mm": 50.0,
+    "ir_side_mm": 30.0,
+    "ir_angle_deg": 25.0,           # IR beams point this far outward
+    "ir_range_mm": 150.0,
+    "battery_full_v": 4.2,
+    "battery_empty_v": 3.0,
+    "battery_nominal_v": 4.0,       # voltage max_speed_mm_s is quoted at
+    "battery_capacity_mah": 2000.0,
+    "battery_soc": 1.0,
+    "battery_resistance_ohm": 0.15,
+    "idle_current_a": 0.15,
+    "motor_stall_current_a": 0.6,
+    "sensor_noise": 8,              # gaussian sigma on TR readings, in ADC counts
+    "seed": 1,
+}
+
+STEP_US = 1000
+ECHO_DELAY_US = 200     # trigger fall to echo rise
+TRACE_EVERY_US = 10000
+
+class TrackMap(object):
+    """
+    Raster floor map holding the raw TR reading (0-1023) each spot
+    would produce, at res_mm per cell. main.py and follow_grid.py use
+    a light line on a dark floor (line reads low); the Waveshare Line
+    Tracking demos expect a dark line (reads high). Draw whichever the
+    script expects.
+    """
+    def __init__(self, width_mm, height_mm, res_mm=2.0, background=620):
+        self.res = float(res_mm)
+        self.cols = int(math.ceil(width_mm / self.res))
+        self.rows = int(math.ceil(height_mm / self.res))
+        self.background = background
+        self.cells = bytearray([background >> 2]) * (self.cols * self.rows)
+
+    def value(self, x, y):
+        c = int(x / self.res)
+        r = int(y / self.res)
+        if 0 <= c < self.cols and 0 <= r < self.rows:
+            return self.cells[r * self.cols + c] << 2
+        return self.background
+
+    def line(self, x0, y0, x1, y1, width_mm, value):
+        half = width_mm / 2.0
+        res = self.res
+        c0 = max(int((min(x0, x1) - half) / res), 0)
+        c1 = min(int((max(x0, x1) + half) / res) + 1, self.cols)
+        r0 = max(int((min(y0, y1) - half) / res), 0)
+        r1 = min(int((max(y0, y1) + half) / res) + 1, self.rows)
+        dx = x1 - x0
+        dy = y1 - y0
+        length2 = dx * dx + dy * dy
+        v = value >> 2
+        for r in range(r0, r1):
+            py = (r + 0.5) * res
+            for c in range(c0, c1):
+                px = (c + 0.5) * res
+                t = 0.0
+                if length2 > 0:
+                    t = max(0.0, min(1.0, ((px - x0) * dx + (py - y0) * dy) / length2))
+                ex = x0 + t * dx - px
+                ey = y0 + t * dy - py
+                if ex * ex + ey * ey <= half * half:
+                    self.cells[r * self.cols + c] = v
+
+    def polyline(self, points, width_mm, value):
+        for i in range(len(points) - 1):
+            self.line(points[i][0], points[i][1], points[i + 1][0], points[i + 1][1], width_mm, value)
+
+    def arc(self, cx, cy, radius, start_deg, end_deg, width_mm, value, segments=None):
+        if segments is None:
+            segments = max(8, int(abs(end_deg - start_deg) / 5))
+        points = []
+        for i in range(segments + 1):
+            a = math.radians(start_deg + (end_deg - start_deg) * i / segments)
+            points.append((cx + radius * math.cos(a), cy + radius * math.sin(a)))
+        self.polyline(points, width_mm, value)
+
+    def rect(self, x, y, w, h, value):
+        v = value >> 2
+        for r in range(max(int(y / self.res), 0), min(int((y + h) / self.res), self.rows)):
+            for c in range(max(int(x / self.res), 0), min(int((x + w) / self.res), self.cols)):
+                self.cells[r * self.cols + c] = v
+
+    @classmethod
+    def from_pgm(cls, path, res_mm=2.0, white=100, black=900):
+        """Load a binary (P5) greyscale PGM; white pixels read `white`, black `black`"""
+        with open(path, "rb") as f:
+            data = f.read()
+        fields = []
+        i = 0
+        while len(fields) < 4:
+            while data[i:i + 1].isspace():
+                i += 1
+            if data[i:i + 1] == b"#":
+                while data[i:i + 1] not in (b"\n", b""):
+                    i += 1
+                continue
+            j = i
+            while not data[j:j + 1].isspace():
+                j += 1
+            fields.append(data[i:j])
+            i = j
+        if fields[0] != b"P5":
+            raise ValueError("only binary PGM (P5) maps are supported")
+        cols, rows, maxval = int(fields[1]), int(fields[2]), int(fields[3])
+        pixels = data[i + 1:i + 1 + cols * rows]
+        track = cls(cols * res_mm, rows * res_mm, res_mm, white)
+        for r in range(rows):
+            # PGM rows run top to bottom, the map's y axis points up
+            src = (rows - 1 - r) * cols
+            for c in range(cols):
+                g = pixels[src + c]
+                raw = black + (white - black) * g // maxval
+                track.cells[r * cols + c] = raw >> 2
+        return track
+
+class Obstacle(object):
+    """
+    Polygon obstacle. motion, if given, maps virtual time in seconds
+    to an (dx, dy) offset in mm, e.g. a target the robot has to follow.
+    """
+    def __init__(self, points, motion=None):
+        self.points = [(float(x), float(y)) for x, y in points]
+        self.motion = motion
+
+    def edges(self, t):
+        dx, dy = self.motion(t) if self.motion is not None else (0.0, 0.0)
+        pts = self.points
+        for i in range(len(pts)):
+            a = pts[i]
+            b = pts[(i + 1) % len(pts)]
+            yield a[0] + dx, a[1] + dy, b[0] + dx, b[1] + dy
+
+def box(x, y, w, h, motion=None):
+    return Obstacle([(x, y), (x + w, y), (x + w, y + h), (x, y + h)], motion)
+
+class World(object):
+    def __init__(self, track=None, obstacles=(), start=(0.0, 0.0, 0.0)):
+        self.track = track
+        self.obstacles = list(obstacles)
+        self.start = start
+
+    def raycast(self, x, y, heading, max_mm, t):
+        """Distance to the first obstacle edge along a ray, or None"""
+        dx = math.cos(heading)
+        dy = math.sin(heading)
+        best = None
+        for obstacle in self.obstacles:
+            for ax, ay, bx, by in obstacle.edges(t):
+                ex = bx - ax
+                ey = by - ay
+                den = dx * ey - dy * ex
+                if abs(den) < 1e-12:
+                    continue
+                qx = ax - x
+                qy = ay - y
+                dist = (qx * ey - qy * ex) / den
+                u = (qx * dy - qy * dx) / den
+                if 0.0 <= u <= 1.0 and 0.0 <= dist <= max_mm and (best is None or dist < best):
+                    best = dist
+        return best
+
+class Simulation(object):
+    def __init__(self, world, **params):
+        self.world = world
+        self.p = dict(PARAMS)
+        self.p.update(params)
+        self.rng = random.Random(self.p["seed"])
+        self.x, self.y, self.heading = (float(v) for v in world.start)
+        self.v_left = 0.0
+        self.v_right = 0.0
+        self.soc = self.p["battery_soc"]
+        self.voltage = self.p["battery_full_v"]
+        self.distance_mm = 0.0
+        self.trace = []
+        self.tr_frames = 0
+        self._last_trace_us = -TRACE_EVERY_US
+        self._echo_cache = {}
+        self._timer = None
+
+    # -- hookup ---------------------------------------------------------
+
+    def attach(self):
+        """Register the sensor models with the fakes and start stepping"""
+        state = [10]
+        def tr_model(word):
+            addr = word >> 28
+            prev = state[0]
+            state[0] = addr
+            if prev == 0:
+                self.tr_frames += 1
+            raw = self.tr_value(prev) if prev < 5 else 512
+            return raw << 2
+        rp2.StateMachine.models[1] = tr_model
+        rp2.StateMachine.models[4] = self._echo_timer
+        machine.Pin.drivers[15] = self._echo
+        machine.Pin.watchers[14] = self._trigger
+        machine.Pin.drivers[2] = lambda now_us: self._ir(-1)
+        machine.Pin.drivers[3] = lambda now_us: self._ir(1)
+        machine.ADC.drivers[26] = lambda now_us: self.voltage / 2 / 3.3 * 65535
+        self._timer = machine.Timer(-1, mode=machine.Timer.PERIODIC, period=STEP_US / 1000, callback=self._step)
+
+    def run(self, path, seconds, workdir=None):
+        """Reset the fakes, attach to them and run a script for `seconds`"""
+        import fakes
+        fakes.reset()
+        random.seed(self.p["seed"])
+        self.attach()
+        result = fakes.run_script(path, seconds, workdir)
+        result["sim"] = self
+        return result
+
+    # -- physics ----------------------------------------------------------
+
+    def _wheel_target(self, pwm_id, fwd_pin, back_pin):
+        pwm = machine.PWM.registry.get(pwm_id)
+        fwd = machine.Pin.registry.get(fwd_pin)
+        back = machine.Pin.registry.get(back_pin)
+        if pwm is None or fwd is None or back is None:
+            return 0.0
+        direction = fwd._value - back._value
+        frac = pwm._duty / 65535.0
+        deadband = self.p["deadband"]
+        if direction == 0 or frac <= deadband:
+            return 0.0
+        frac = (frac - deadband) / (1.0 - deadband)
+        return direction * frac * self.p["max_speed_mm_s"] * self.voltage / self.p["battery_nominal_v"]
+
+    def _step(self, timer):
+        p = self.p
+        dt = STEP_US / 1_000_000
+        # PicoGo.setMotor: AIN2 high = left forward, BIN2 high = right forward
+        target_left = self._wheel_target(16, 17, 18)
+        target_right = self._wheel_target(21, 20, 19)
+        k = dt / p["motor_tau_s"]
+        self.v_left += (target_left - self.v_left) * k
+        self.v_right += (target_right - self.v_right) * k
+
+        v = (self.v_left + self.v_right) / 2
+        w = (self.v_right - self.v_left) / p["wheel_base_mm"]
+        self.x += v * math.cos(self.heading) * dt
+        self.y += v * math.sin(self.heading) * dt
+        self.heading = (self.heading + w * dt) % (2 * math.pi)
+        self.distance_mm += abs(v) * dt
+
+        load = 0.0
+        for pwm_id in (16, 21):
+            pwm = machine.PWM.registry.get(pwm_id)
+            if pwm is not None:
+                load += pwm._duty / 65535.0
+        current = p["idle_current_a"] + load * p["motor_stall_current_a"]
+        self.soc = max(0.0, self.soc - current * dt / (p["battery_capacity_mah"] * 3.6))
+        open_v = p["battery_empty_v"] + (p["battery_full_v"] - p["battery_empty_v"]) * self.soc
+        self.voltage = open_v - current * p["battery_resistance_ohm"]
+
+        now = utime.now_us()
+        if now - self._last_trace_us >= TRACE_EVERY_US:
+            self._last_trace_us = now
+            self.trace.append((now / 1_000_000, self.x, self.y, self.heading))
+
+    # -- sensors ----------------------------------------------------------
+
+    def _local(self, forward, right):
+        c = math.cos(self.heading)
+        s = math.sin(self.heading)
+        return self.x + forward * c + right * s, self.y + forward * s - right * c
+
+    def tr_position(self, i):
+        return self._local(self.p["sensor_forward_mm"], (i - 2) * self.p["sensor_pitch_mm"])
+
+    def tr_value(self, i):
+        track = self.world.track
+        if track is None:
+            return 512
+        x, y = self.tr_position(i)
+        raw = track.value(x, y)
+        if self.p["sensor_noise"]:
+            raw += int(self.rng.gauss(0, self.p["sensor_noise"]))
+        return max(0, min(1023, raw))
+
+    def sonar_mm(self, t):
+        p = self.p
+        x, y = self._local(p["sonar_forward_mm"], 0.0)
+        spread = math.radians(p["sonar_half_angle_deg"])
+        best = None
+        for a in (-spread, 0.0, spread):
+            d = self.world.raycast(x, y, self.heading + a, p["sonar_max_mm"], t)
+            if d is not None and (best is None or d < best):
+                best = d
+        return best
+
+    def _echo(self, now_us):
+        trig = machine.Pin.registry.get(14)
+        if trig is None:
+            return 0
+        fall = None
+        for t, v in reversed(trig.history):
+            if v == 0:
+                fall = t
+                break
+        if fall is None:
+            return 0
+        start = fall + ECHO_DELAY_US
+        return 1 if start <= now_us < start + self._echo_width(fall) else 0
+
+    def _echo_width(self, fall):
+        width = self._echo_cache.get(fall)
+        if width is None:
+            d = self.sonar_mm(fall / 1_000_000)
+            width = self.p["sonar_timeout_us"] if d is None else int(d / 10 * 58)
+            self._echo_cache.clear()
+            self._echo_cache[fall] = width
+        return width
+
+    def _echo_timer(self, timeout_us):
+        """The Ultrasonic.echo_timer program: what is left of the timeout, 0 for no echo"""
+        width = self._echo_width(utime.now_us())
+        return timeout_us - width if width < timeout_us else 0
+
+    def _trigger(self, pin, level):
+        """Drive the echo edges for each trigger pulse, for code timing them with Pin.irq"""
+        echo = machine.Pin.registry.get(15)
+        if level or echo is None or echo.irq_handler is None:
+            return
+        fall = utime.now_us()
+        width = self._echo_width(fall)
+        for delay, v in ((ECHO_DELAY_US, 1), (ECHO_DELAY_US + width, 0)):
+            # +0.5 us so Timer's int(period * 1000) lands exactly on the edge
+            machine.Timer(-1, mode=machine.Timer.ONE_SHOT, period=(delay + 0.5) / 1000,
+                          callback=lambda t, v=v: echo.drive(v))
+
+    def _ir(self, side):
+        """side -1 is the right sensor (DSR), +1 the left (DSL); 0 = obstacle"""
+        p = self.p
+        x, y = self._local(p["ir_forward_mm"], -side * p["ir_side_mm"])
+        heading = self.heading + side * math.radians(p["ir_angle_deg"])
+        hit = self.world.raycast(x, y, heading, p["ir_range_mm"], utime.now_us() / 1_000_000)
+        return 0 if hit is not None else 1
+
+    # -- summaries --------------------------------------------------------
+
+    def on_line_fraction(self, threshold, below=True):
+        """Share of trace samples with the middle TR sensor over the line"""
+        if not self.trace or self.world.track is None:
+            return 0.0
+        hits = 0
+        for _, x, y, heading in self.trace:
+            sx = x + self.p["sensor_forward_mm"] * math.cos(heading)
+            sy = y + self.p["sensor_forward_mm"] * math.sin(heading)
+            v = self.world.track.value(sx, sy)
+            if (v < threshold) if below else (v > threshold):
+                hits += 1
+        return hits / len(self.trace)
+
+def grid_world(cells=4, pitch_mm=300.0, tape_mm=20.0, floor=620, tape=140):
+    """Square grid of light tape on a dark floor, as follow_grid.py/main.py expect"""
+    size = cells * pitch_mm + 2 * pitch_mm
+    track = TrackMap(size, size, 2.0, floor)
+    for i in range(cells + 1):
+        p = pitch_mm + i * pitch_mm
+        track.line(pitch_mm, p, size - pitch_mm, p, tape_mm, tape)
+        track.line(p, pitch_mm, p, size - pitch_mm, tape_mm, tape)
+    # start on the bottom edge, half way to the first crossing, facing +x
+    return World(track, start=(pitch_mm * 1.5 - 60.0, pitch_mm, 0.0))
+
+def oval_world(floor=100, tape=900, tape_mm=18.0):
+    """Dark oval track on a white floor, for the Line-Tracking demos"""
+    track = TrackMap(1600, 1000, 2.0, floor)
+    track.line(500, 200, 1100, 200, tape_mm, tape)
+    track.line(500, 800, 1100, 800, tape_mm, tape)
+    track.arc(1100, 500, 300, -90, 90, tape_mm, tape)
+    track.arc(500, 500, 300, 90, 270, tape_mm, tape)
+    return World(track, start=(650, 200, 0.0))
+
+def follow_world(gap_mm=300.0, speed_mm_s=80.0, start_after_s=2.0):
+    """A 150 mm wide target that starts driving away at speed_mm_s"""
+    def motion(t):
+        return (max(0.0, t - start_after_s) * speed_mm_s, 0.0)
+    target = box(100.0 + 55.0 + gap_mm, -75.0, 100.0, 150.0, motion)
+    return World(None, [target], start=(100.0, 0.0, 0.0))
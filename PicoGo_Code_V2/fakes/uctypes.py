@@ -0,0 +1,14 @@
+"""
+Fake of the MicroPython `uctypes` module: just addressof() and
+bytearray_at(), which alias a buffer's memory as on the Pico. The
+object bytearray_at() returns indexes and assigns like a bytearray;
+keep the buffer it points into alive while using it.
+"""
+import ctypes
+
+def addressof(obj):
+    n = memoryview(obj).nbytes
+    return ctypes.addressof((ctypes.c_ubyte * n).from_buffer(obj))
+
+def bytearray_at(addr, size):
+    return (ctypes.c_ubyte * size).from_address(addr)
@@ -0,0 +1,2 @@
+"""Fake of the MicroPython `ujson` module"""
+from json import dumps, loads, dump, load
@@ -0,0 +1,109 @@
+"""
+Fake of the MicroPython `utime` / `time` module backed by a virtual clock.
+
+Nothing ever really sleeps: sleep()/sleep_ms()/sleep_us() advance the
+clock and fire any fake machine.Timer that falls due on the way, so
+scripts run faster than real time. Code running on the second core
+(see fakes._thread) has its own position on the clock; timers and the
+deadline only act on core 0's. Anything not defined here (e.g.
+perf_counter) is forwarded to the host's time module.
+"""
+import time as _host
+
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALFPERIOD = TICKS_PERIOD // 2
+
+_now_us = 0
+_deadline_us = None
+_timers = []
+_core = 0           # core the calling code runs on
+_sync = None        # fakes._thread's hook, called after the clock moves
+
+class StopSimulation(BaseException):
+    """Raised by the clock when a deadline set with set_deadline() passes.
+    Derives from BaseException so `except Exception` in scripts lets it out."""
+
+def __getattr__(name):
+    return getattr(_host, name)
+
+def now_us():
+    """Unwrapped virtual time in microseconds"""
+    return _now_us
+
+def _register(timer):
+    if timer not in _timers:
+        _timers.append(timer)
+
+def _unregister(timer):
+    if timer in _timers:
+        _timers.remove(timer)
+
+def set_deadline(us):
+    """Stop the run (raise StopSimulation) once the clock reaches us"""
+    global _deadline_us
+    _deadline_us = us
+
+def advance(us):
+    """Move the virtual clock forward, firing due timers in order.
+    Timer callbacks may advance the clock themselves."""
+    global _now_us
+    if _core:
+        _now_us += int(us)
+        _sync()
+        return
+    end = _now_us + int(us)
+    while True:
+        due = None
+        for t in _timers:
+            if t._due_us <= end and (due is None or t._due_us < due._due_us):
+                due = t
+        if due is None:
+            break
+        if due._due_us > _now_us:
+            _now_us = due._due_us
+        due._fire()
+    if end > _now_us:
+        _now_us = end
+    if _sync is not None:
+        _sync()
+    if _deadline_us is not None and _now_us >= _deadline_us:
+        raise StopSimulation()
+
+def reset():
+    global _now_us, _deadline_us, _core, _sync
+    _now_us = 0
+    _deadline_us = None
+    _core = 0
+    _sync = None
+    del _timers[:]
+
+def ticks_us():
+    return _now_us & TICKS_MAX
+
+def ticks_ms():
+    return (_now_us // 1000) & TICKS_MAX
+
+def ticks_cpu():
+    return ticks_us()
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & TICKS_MAX
+
+def ticks_diff(end, start):
+    return ((end - start + TICKS_HALFPERIOD) & TICKS_MAX) - TICKS_HALFPERIOD
+
+def sleep_us(us):
+    advance(us)
+
+def sleep_ms(ms):
+    advance(ms * 1000)
+
+def sleep(s):
+    advance(s * 1_000_000)
+
+def time():
+    return _now_us // 1_000_000
+
+def time_ns():
+    return _now_us * 1000
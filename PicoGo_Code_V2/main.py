@@ -1,18 +1,29 @@
 from machine import Pin, PWM
 import time
 import random
-import math
 from Motor import PicoGo
 from ST7789 import ST7789
+from Display import DisplayService, RefreshScheduler
+import Assets
+from Widgets import Screen, Label, Field, Indicator, Marker
 from ws2812 import NeoPixel
-from TRSensor import TRSensor
+from TRSensor import TRSensor, FILTER_MEDIAN3
+from Profiler import LoopProfiler
 
 # Initialize hardware
 M = PicoGo()
 lcd = ST7789()
+LCD_ON_CORE1 = True  # Send LCD frames from core 1 so the SPI transfer doesn't stall the loop
+DISPLAY = DisplayService(lcd) if LCD_ON_CORE1 else None
 strip = NeoPixel()
 buzzer = PWM(Pin(4))
 TRS = TRSensor()
+TRS.set_filter(FILTER_MEDIAN3)  # drop single-sample spikes before the thresholds
+
+# Loop profiling, off unless Profiler.ENABLED is set (prints a report every 500 loops)
+PROF = LoopProfiler(("sensors", "motors", "lcd", "leds"), period_ms=10, report_every=500)
+PROF.wrap(M, ("forward", "backward", "left", "right", "stop", "setMotor"), "motors")
+PROF.wrap(strip, ("pixels_show",), "leds")
 
 # Constants
 LINE_THRESHOLD = 480      # Values below this indicate a line
@@ -21,6 +32,8 @@ BASE_SPEED = 9           # Even slower forward speed
 TURN_SPEED = 12          # Speed for searching turns (back to original)
 SEARCH_ANGLE = 10        # Small rotation steps when searching
 LINE_LOST_TOLERANCE = 0.15 # Only tolerate missing line for 150ms
+MIN_LINE_CONFIDENCE = 150  # Below this fall back to the coarse sensor average
+STUCK_RETRY_MS = 50       # Pace of handle_stuck() while stuck (the blocking lcd.show() it used to make took this long)
 
 # State machine states
 STATE_SEARCHING = "SEARCHING"
@@ -39,6 +52,7 @@ line_lost_time = 0      # Time when line was first lost
 stuck_values = None     # Saved sensor values for stuck detection
 stuck_time = 0          # Time when stuck was first detected
 stuck_power_boost = 0   # Additional power when stuck
+stuck_retry_time = 0    # When handle_stuck() may run again
 turn_start_time = 0     # Time when turn started
 turn_direction = ""     # Current turn direction
 turn_duration = 0       # How long to turn
@@ -48,6 +62,13 @@ buzzer_on = False       # Track buzzer state
 buzzer_start_time = 0   # When buzzer was turned on
 last_intersection_choice = ""  # Remember last intersection decision
 
+def show_lcd(wait=False):
+    """Show the LCD frame; on core 1 the frame is skipped if the last one is still going out"""
+    if DISPLAY:
+        DISPLAY.present(wait)
+    else:
+        lcd.show()
+
 def beep(frequency, duration):
     """Play a beep sound"""
     buzzer.freq(frequency)
@@ -81,52 +102,51 @@ def detect_line_pattern(sensor_values):
         avg_pos = sum(sensors_on_line) / num_on_line
         line_position = avg_pos - 2
     
+    # Refine to a sub-sensor position (our line reads low, i.e. white line)
+    if 0 < num_on_line < 4:
+        fine_position, confidence = TRS.interpolateLine(TRS.readCalibratedFixed(sensor_values), white_line=1)
+        if confidence >= MIN_LINE_CONFIDENCE:
+            line_position = (fine_position - 2000) / 1000
+    
     return num_on_line, line_position, is_intersection
 
+# Status screen: widgets redraw only what changed, so show_lcd() sends only that.
+# Redrawn at 10 fps, and not while the loop is running late
+SCREEN = Screen(lcd)
+REFRESH = RefreshScheduler(fps=10, budget_us=4000, period_ms=15)
+SCREEN.add(Label(65, 5, "Grid Follower", lcd.WHITE))
+STATE_LABEL = SCREEN.add(Label(10, 25))
+SCREEN.add(Label(10, 45, "Sensors:", lcd.WHITE))
+SENSOR_FIELDS = [SCREEN.add(Field(20 + i * 40, 60, "%d")) for i in range(5)]
+SENSOR_BOXES = [SCREEN.add(Indicator(25 + i * 40, 80, 20, 10, lcd.GREEN, lcd.WHITE)) for i in range(5)]
+POSITION_MARKER = SCREEN.add(Marker(100, 10, 10, lcd.YELLOW, "^"))
+TURN_FIELD = SCREEN.add(Field(10, 120, "Last turn: %s", lcd.GREEN))
+
+@PROF.timed("lcd")
 def update_lcd(state, sensor_values, line_position):
     """Update LCD with current status"""
-    lcd.fill(lcd.BLACK)
-    
-    # Title
-    lcd.text("Grid Follower", 65, 5, lcd.WHITE)
-    
     # State
     if "HOME" in state:
-        state_color = lcd.GREEN
-        lcd.text(state, 10, 25, state_color)
+        STATE_LABEL.set(state, lcd.GREEN)
     else:
         state_color = lcd.GREEN if state == STATE_FOLLOWING else lcd.YELLOW if state == STATE_SEARCHING else lcd.RED
-        lcd.text(f"State: {state}", 10, 25, state_color)
+        STATE_LABEL.set("State: " + state, state_color)
     
     # Sensor values with visual indicators
-    lcd.text("Sensors:", 10, 45, lcd.WHITE)
     for i in range(5):
-        x = 20 + i * 40
         value = sensor_values[i]
-        
-        # Show value
-        color = lcd.GREEN if value < LINE_THRESHOLD else lcd.WHITE
-        lcd.text(str(value), x, 60, color)
-        
-        # Visual indicator
-        if value < LINE_THRESHOLD:
-            lcd.fill_rect(x + 5, 80, 20, 10, lcd.GREEN)  # Line detected
-        else:
-            lcd.rect(x + 5, 80, 20, 10, lcd.WHITE)       # No line
+        on_line = value < LINE_THRESHOLD
+        SENSOR_FIELDS[i].set(value, lcd.GREEN if on_line else lcd.WHITE)
+        SENSOR_BOXES[i].set(on_line)
     
-    # Line position indicator
-    if line_position is not None:
-        # Convert position to screen coordinates
-        indicator_x = 120 + int(line_position * 30)
-        lcd.fill_rect(indicator_x - 5, 100, 10, 10, lcd.YELLOW)
-        lcd.text("^", indicator_x - 3, 112, lcd.YELLOW)
+    # Line position indicator, converted to screen coordinates
+    POSITION_MARKER.set(None if line_position is None else 120 + int(line_position * 30))
     
     # Show last intersection choice if any
-    global last_intersection_choice
-    if last_intersection_choice:
-        lcd.text(f"Last turn: {last_intersection_choice}", 10, 120, lcd.GREEN)
+    TURN_FIELD.set(last_intersection_choice or None)
     
-    lcd.show()
+    SCREEN.update(REFRESH.budget_us)
+    show_lcd()
 
 def start_search_motion():
     """Start a search motion (non-blocking)"""
@@ -308,7 +328,8 @@ def handle_stuck():
         M.forward(BASE_SPEED + 2 + power)
         action = "forward"
     
-    lcd.show()
+    show_lcd()
+    SCREEN.invalidate()  # drawn over the status screen
     print(f"Stuck action: {action}, L:{left_sensors} C:{center_sensor} R:{right_sensors}")
     
     # Set up timed state
@@ -346,7 +367,8 @@ def handle_intersection():
     lcd.fill_rect(0, 100, 240, 35, lcd.BLACK)
     lcd.text("INTERSECTION!", 60, 100, lcd.RED)
     lcd.text(f"Going: {choice}", 70, 115, lcd.YELLOW)
-    lcd.show()
+    show_lcd()
+    SCREEN.invalidate()  # drawn over the status screen
     
     print(f"Intersection! Choosing: {choice}")
     
@@ -378,7 +400,8 @@ def handle_intersection():
 lcd.fill(lcd.BLACK)
 lcd.text("Grid Follower", 65, 10, lcd.WHITE)
 lcd.text("Initializing...", 55, 60, lcd.YELLOW)
-lcd.show()
+show_lcd(wait=True)
+SCREEN.invalidate()  # drawn over the status screen
 
 # Initialize LEDs
 for i in range(4):
@@ -391,8 +414,12 @@ time.sleep(1)
 
 try:
     while True:
+        PROF.tick()
+        REFRESH.tick()
+
         # Read sensors
-        sensor_values = TRS.AnalogRead()
+        with PROF.stage("sensors"):
+            sensor_values = TRS.AnalogRead()
         
         # Check if robot is in "Home sweet home" (all sensors < 160 and at least one > 100)
         all_below_160 = all(value < 160 for value in sensor_values)
@@ -402,8 +429,10 @@ try:
             # Home sweet home - suspend wheels but keep reading
             M.stop()
             
-            # Update display with sensor values
-            update_lcd("HOME SWEET HOME :)", sensor_values, None)
+            # Update display with sensor values (this branch sleeps 100 ms, longer than the loop period)
+            if REFRESH.due(ignore_behind=True):
+                update_lcd("HOME SWEET HOME :)", sensor_values, None)
+                REFRESH.done()
             
             # Set calm blue LEDs
             for i in range(4):
@@ -429,43 +458,12 @@ try:
             lcd.fill(lcd.BLACK)
             lcd.text("Put me down :(", 65, 20, lcd.WHITE)
             
-            # Draw mathematical heart shape
-            # Heart parameters
-            n = 24  # Size factor (doubled for larger heart)
-            center_x = 120  # Center of screen
-            center_y = 70   # Vertical position (moved up to fit on screen)
+            # Broken heart, precomputed by make_assets.py
             RED_COLOR = 0x07E0  # Red color for this LCD
+            lcd.bitmap(Assets.BROKEN_HEART, 72, 46, RED_COLOR)
             
-            # Draw the heart using the mathematical formula
-            for y in range(-n, 2 * n + 1):
-                for x in range(-2 * n, 2 * n + 1):
-                    # Check if point is inside heart shape
-                    if y <= 0:
-                        # Upper part - two circles
-                        left_circle = math.sqrt((x + n) * (x + n) + y * y) <= n
-                        right_circle = math.sqrt((x - n) * (x - n) + y * y) <= n
-                        if left_circle or right_circle:
-                            # Draw pixel
-                            lcd.fill_rect(center_x + x, center_y + y, 1, 1, RED_COLOR)
-                    else:
-                        # Lower part - triangle
-                        if abs(x) <= 2 * n - y:
-                            # Draw pixel
-                            lcd.fill_rect(center_x + x, center_y + y, 1, 1, RED_COLOR)
-            
-            # Now carve out the zigzag crack with black rectangles
-            # Adjusted with 1 pixel taller blocks (12 instead of 10)
-            lcd.fill_rect(116, 45, 8, 12, lcd.BLACK)    # Start at top
-            lcd.fill_rect(112, 56, 8, 12, lcd.BLACK)    # Zig left
-            lcd.fill_rect(120, 67, 8, 12, lcd.BLACK)    # Zag right
-            lcd.fill_rect(114, 78, 8, 12, lcd.BLACK)    # Zig left
-            lcd.fill_rect(122, 89, 8, 12, lcd.BLACK)    # Zag right
-            lcd.fill_rect(116, 100, 8, 12, lcd.BLACK)   # Center
-            lcd.fill_rect(112, 111, 8, 12, lcd.BLACK)   # Zig left
-            lcd.fill_rect(120, 122, 8, 10, lcd.BLACK)   # Zag right
-            lcd.fill_rect(116, 131, 8, 10, lcd.BLACK)   # Center bottom
-            
-            lcd.show()
+            show_lcd(wait=True)
+            SCREEN.invalidate()  # drawn over the status screen
             
             # SCREAM with buzzer!
             buzzer.freq(2000)  # High pitch
@@ -493,7 +491,10 @@ try:
         
         # Check if stuck
         if check_if_stuck(sensor_values):
-            handle_stuck()
+            if time.ticks_diff(time.ticks_ms(), stuck_retry_time) >= 0:
+                handle_stuck()
+                stuck_retry_time = time.ticks_add(time.ticks_ms(), STUCK_RETRY_MS)
+            time.sleep(0.01)
             continue
         
         # Manage buzzer
@@ -592,14 +593,21 @@ try:
                         strip.pixels_set(i, strip.BLUE)
                     strip.pixels_show()
         
-        # Update display
-        update_lcd(current_state, sensor_values, line_position)
+        # Update display when a frame is due and the loop can spare the time
+        if REFRESH.due():
+            update_lcd(current_state, sensor_values, line_position)
+            REFRESH.done()
         
         # Small delay
         time.sleep(0.01)  # 10ms loop time for responsiveness
 
 except KeyboardInterrupt:
     print("\nGrid Follower stopped by user")
+    PROF.report()
+    REFRESH.report()
+    if DISPLAY:
+        DISPLAY.report()
+        DISPLAY.stop()
     M.stop()
     buzzer.deinit()
     # Turn off LEDs
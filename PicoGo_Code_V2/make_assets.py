@@ -0,0 +1,145 @@
+"""
+Host tool that turns shapes and images into the bitmaps in Assets.py.
+
+Run under CPython from this directory after adding or changing one:
+    python3 make_assets.py
+
+Every asset becomes a (data, width, height, format) tuple with data as
+bytes, which ST7789.bitmap() (or FrameBuffer.blit()) draws in a single
+call instead of working the picture out pixel by pixel on the Pico:
+
+  1 bit   framebuf.MONO_HLSB, rows padded to whole bytes, leftmost
+          pixel in the top bit. Drawn in one colour, given at draw time.
+  RGB565  two bytes per pixel in the panel's byte order (high byte
+          first), copied to the screen as they are.
+
+Shapes are predicates inside(x, y) over the bitmap's pixels. Images are
+binary PPM files (P6, e.g. `convert logo.png logo.ppm`), kept in colour
+or thresholded to 1 bit. To add one, append (NAME, comment, builder) to
+ASSETS and run the tool again.
+"""
+import os
+import sys
+
+MONO_HLSB = 3           # framebuf format numbers
+RGB565 = 1
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUT = os.path.join(HERE, "Assets.py")
+
+def rgb565(r, g, b):
+    """8-bit r, g, b as an ST7789 colour value (the panel shows the buffer's bytes swapped)"""
+    c = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+    return ((c & 0xFF) << 8) | (c >> 8)
+
+def mask(width, height, inside):
+    """1-bit bitmap of the pixels where inside(x, y) is true"""
+    stride = (width + 7) // 8
+    data = bytearray(stride * height)
+    for y in range(height):
+        for x in range(width):
+            if inside(x, y):
+                data[y * stride + (x >> 3)] |= 0x80 >> (x & 7)
+    return (bytes(data), width, height, MONO_HLSB)
+
+def read_ppm(path):
+    """(width, height, pixels) of a binary PPM, pixels as (r, g, b) rows"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    fields = []
+    i = 0
+    while len(fields) < 4:
+        while raw[i:i + 1].isspace():
+            i += 1
+        if raw[i:i + 1] == b"#":
+            while raw[i:i + 1] not in (b"\n", b""):
+                i += 1
+            continue
+        start = i
+        while not raw[i:i + 1].isspace():
+            i += 1
+        fields.append(raw[start:i])
+    if fields[0] != b"P6" or int(fields[3]) != 255:
+        raise ValueError("%s: only 8-bit binary PPM (P6) is supported" % path)
+    width, height = int(fields[1]), int(fields[2])
+    body = raw[i + 1:i + 1 + width * height * 3]
+    rows = []
+    for y in range(height):
+        row = body[y * width * 3:(y + 1) * width * 3]
+        rows.append([tuple(row[x * 3:x * 3 + 3]) for x in range(width)])
+    return width, height, rows
+
+def image(path, threshold=None):
+    """
+    An image file as an RGB565 bitmap, or with threshold as a 1-bit one
+    that is set where the pixel is at least that bright (0-255).
+    """
+    width, height, rows = read_ppm(os.path.join(HERE, path))
+    if threshold is not None:
+        return mask(width, height, lambda x, y: sum(rows[y][x]) >= 3 * threshold)
+    data = bytearray(width * height * 2)
+    i = 0
+    for row in rows:
+        for r, g, b in row:
+            c = rgb565(r, g, b)
+            data[i] = c & 0xFF          # as FrameBuffer stores it, little-endian
+            data[i + 1] = c >> 8
+            i += 2
+    return (bytes(data), width, height, RGB565)
+
+def broken_heart():
+    """
+    main.py's "Put me down" heart: two circles over a triangle around
+    (120, 70), size 24, with the zigzag crack cut out. 97x73, drawn at
+    (72, 46).
+    """
+    n = 24
+    crack = (                           # screen rectangles the crack was carved with
+        (116, 45, 8, 12), (112, 56, 8, 12), (120, 67, 8, 12),
+        (114, 78, 8, 12), (122, 89, 8, 12), (116, 100, 8, 12),
+        (112, 111, 8, 12), (120, 122, 8, 10), (116, 131, 8, 10),
+    )
+    def inside(px, py):
+        x = px - 2 * n
+        y = py - n
+        sx, sy = 120 + x, 70 + y
+        for cx, cy, cw, ch in crack:
+            if cx <= sx < cx + cw and cy <= sy < cy + ch:
+                return False
+        if y <= 0:
+            return (x + n) * (x + n) + y * y <= n * n or (x - n) * (x - n) + y * y <= n * n
+        return abs(x) <= 2 * n - y
+    return mask(4 * n + 1, 3 * n + 1, inside)
+
+ASSETS = (
+    ("BROKEN_HEART", "main.py's \"Put me down :(\" heart, drawn at (72, 46)", broken_heart),
+)
+
+FORMATS = {MONO_HLSB: ("1 bit", "framebuf.MONO_HLSB"), RGB565: ("RGB565", "framebuf.RGB565")}
+
+def source(name, comment, asset):
+    data, width, height, fmt = asset
+    kind, const = FORMATS[fmt]
+    row = (width + 7) // 8 if fmt == MONO_HLSB else width * 2
+    lines = ["# %dx%d, %s, %d bytes: %s" % (width, height, kind, len(data), comment),
+             "%s = (" % name]
+    for y in range(height):
+        chunk = data[y * row:(y + 1) * row]
+        for i in range(0, len(chunk), 32):
+            lines.append("    b'" + "".join("\\x%02x" % b for b in chunk[i:i + 32]) + "'")
+    lines[-1] += ","
+    lines.append("    %d, %d, %s)" % (width, height, const))
+    return "\n".join(lines)
+
+def main():
+    parts = ['"""\nBitmaps for ST7789.bitmap(), generated by make_assets.py: edit that and\nrun it again rather than changing this file.\n"""\nimport framebuf']
+    for name, comment, build in ASSETS:
+        asset = build()
+        parts.append(source(name, comment, asset))
+        print("%-16s %3dx%-3d %6d bytes" % (name, asset[1], asset[2], len(asset[0])))
+    with open(OUT, "w") as f:
+        f.write("\n\n".join(parts) + "\n")
+    print("wrote %s" % os.path.relpath(OUT))
+
+if __name__ == '__main__':
+    sys.exit(main())
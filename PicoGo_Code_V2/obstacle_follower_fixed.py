@@ -1,8 +1,11 @@
 from machine import Pin, PWM
 import time
-from Motor import PicoGo
+from Motor import PicoGo, speed_to_cm_s, cm_s_to_speed
 from ST7789 import ST7789
+from Widgets import Screen, Label, Field, Bar
 from ws2812 import NeoPixel
+from Ultrasonic import PIOUltrasonic
+from Tracker import TargetTracker
 
 # Initialize logging
 log_file = open("obstacle_follower.log", "w")
@@ -22,10 +25,6 @@ lcd = ST7789()
 strip = NeoPixel()
 buzzer_pwm = PWM(Pin(4))
 
-# Ultrasonic sensor pins
-Echo = Pin(15, Pin.IN)
-Trig = Pin(14, Pin.OUT)
-
 # IR sensors for close obstacle detection
 DSR = Pin(2, Pin.IN)
 DSL = Pin(3, Pin.IN)
@@ -35,6 +34,13 @@ MIN_DISTANCE = 15  # cm
 MAX_DISTANCE = 80  # cm
 FOLLOW_DISTANCE = 30  # Target following distance in cm
 BASE_SPEED = 17  # Base motor speed (reduced by 3x from 50)
+MAX_FOLLOW_SPEED = 60  # Top speed when keeping up with a fast target
+FOLLOW_GAIN = 0.5  # cm/s of extra speed per cm of distance error
+
+# Ultrasonic sensor, pinged at 20 Hz and timed by PIO state machine 4;
+# echoes from beyond MAX_DISTANCE + 20 cm read as no echo
+SONAR = PIOUltrasonic(rate_hz=20, max_cm=MAX_DISTANCE + 20)
+TRACK = TargetTracker()
 
 # Imperial March setup
 A4 = 440
@@ -72,46 +78,9 @@ current_note_start = 0
 is_playing_note = False
 
 def get_distance():
-    """Measure distance using ultrasonic sensor with averaging"""
-    distances = []
-    
-    for _ in range(3):  # Take 3 readings
-        # Send trigger pulse
-        Trig.value(0)
-        Trig.value(1)
-        time.sleep_us(10)
-        Trig.value(0)
-        
-        timeout_start = time.ticks_us()
-        timeout = 30000  # 30ms timeout
-        
-        # Wait for echo to go high
-        while Echo.value() == 0:
-            if time.ticks_diff(time.ticks_us(), timeout_start) > timeout:
-                distances.append(999)
-                break
-        else:
-            time1 = time.ticks_us()
-            
-            # Wait for echo to go low
-            while Echo.value() == 1:
-                if time.ticks_diff(time.ticks_us(), time1) > timeout:
-                    distances.append(999)
-                    break
-            else:
-                time2 = time.ticks_us()
-                during = time2 - time1
-                distance = during * 0.034 / 2
-                distances.append(distance)
-        
-        time.sleep_ms(30)  # Short delay between readings
-    
-    # Simple average of all readings
-    if len(distances) > 0:
-        avg_distance = sum(distances) / len(distances)
-        return avg_distance
-    else:
-        return 999
+    """Tracked target distance in cm, predicted between pings; 999 when there is no target"""
+    TRACK.update_sonar(SONAR)
+    return TRACK.predict(default=999)
 
 def scan_for_obstacle():
     """Scan by rotating slowly to find obstacle in range"""
@@ -123,6 +92,7 @@ def scan_for_obstacle():
     lcd.fill_rect(0, 25, 240, 110, lcd.BLACK)
     lcd.text("SCANNING...", 65, 40, lcd.YELLOW)
     lcd.text("Looking for target", 40, 60, lcd.WHITE)
+    SCREEN.invalidate()  # drawn over the status screen
     
     # Quick scan left and right first
     lcd.text("Quick scan...", 60, 80, lcd.BLUE)
@@ -218,33 +188,23 @@ def scan_for_obstacle():
 
 def update_lcd(state, distance, speed_left, speed_right):
     """Update LCD with current state"""
-    lcd.fill_rect(0, 25, 240, 110, lcd.BLACK)
-    
     # State display
     state_color = lcd.GREEN if state == "FOLLOWING" else lcd.YELLOW if state == "SCANNING" else lcd.RED
-    lcd.text(f"State: {state}", 10, 25, state_color)
+    STATE_FIELD.set(state, state_color)
     
-    # Distance display
+    # Distance display and visual distance bar
     if distance < 999:
-        lcd.text(f"Distance: {distance:.1f} cm", 10, 45, lcd.WHITE)
-        
-        # Visual distance bar
-        bar_length = int((distance / 100) * 200)
-        if MIN_DISTANCE <= distance <= MAX_DISTANCE:
-            bar_color = lcd.GREEN
-        else:
-            bar_color = lcd.RED
-        lcd.fill_rect(20, 65, bar_length, 10, bar_color)
-        lcd.rect(20, 65, 200, 10, lcd.WHITE)
+        DIST_FIELD.set(distance, lcd.WHITE)
+        DIST_BAR.set(distance, lcd.GREEN if MIN_DISTANCE <= distance <= MAX_DISTANCE else lcd.RED)
     else:
-        lcd.text("Distance: No Target", 10, 45, lcd.RED)
+        DIST_FIELD.set(None, lcd.RED)
+        DIST_BAR.set(None)
     
     # Speed display
-    lcd.text(f"Motors: L:{speed_left} R:{speed_right}", 10, 85, lcd.BLUE)
+    MOTOR_FIELD.set((speed_left, speed_right))
     
-    # Target range indicator
-    lcd.text(f"Target: {MIN_DISTANCE}-{MAX_DISTANCE}cm", 10, 105, lcd.WHITE)
-    lcd.show()
+    SCREEN.update()
+    lcd.start_show()  # DMA; a frame is skipped if the last is still going out
 
 def play_imperial_march():
     """Handle Imperial March playback"""
@@ -280,6 +240,14 @@ lcd.fill(lcd.BLACK)
 lcd.text("Obstacle Follower", 45, 10, lcd.WHITE)
 lcd.show()
 
+# Status screen below the title: widgets redraw only what changed, so start_show() sends only that
+SCREEN = Screen(lcd, y=25, h=110)
+STATE_FIELD = SCREEN.add(Field(10, 25, "State: %s"))
+DIST_FIELD = SCREEN.add(Field(10, 45, "Distance: %.1f cm", none_text="Distance: No Target"))
+DIST_BAR = SCREEN.add(Bar(20, 65, 200, 10, 100))
+MOTOR_FIELD = SCREEN.add(Field(10, 85, "Motors: L:%d R:%d", lcd.BLUE))
+SCREEN.add(Label(10, 105, f"Target: {MIN_DISTANCE}-{MAX_DISTANCE}cm", lcd.WHITE))
+
 # Set initial LED pattern
 for i in range(4):
     strip.pixels_set(i, strip.BLUE)
@@ -307,6 +275,9 @@ try:
         dr_status = DSR.value()
         dl_status = DSL.value()
         
+        if state != "FOLLOWING" and TRACK.robot_cm_s:
+            TRACK.robot_speed(0)  # stopped below or turning in place in the scan
+        
         if state == "SCANNING":
             stop_music()
             M.stop()
@@ -329,6 +300,7 @@ try:
                     lcd.fill_rect(0, 60, 240, 20, lcd.BLACK)
                     lcd.text(f"Next scan in {wait_time:.1f}s", 40, 60, lcd.WHITE)
                     lcd.show()
+                    SCREEN.invalidate()  # drawn over the status screen
             
             update_lcd(state, distance, 0, 0)
         
@@ -356,22 +328,16 @@ try:
             else:
                 play_imperial_march()
                 
-                # Calculate motor speeds based on distance
+                # Match the target's tracked speed (feed-forward) and close the gap
                 error = distance - FOLLOW_DISTANCE
+                speed = cm_s_to_speed(TRACK.follow_speed(FOLLOW_DISTANCE, FOLLOW_GAIN))
+                speed = max(-15, min(speed, MAX_FOLLOW_SPEED))  # Gentle reverse max
                 
-                # Add dead zone to prevent oscillation
                 if abs(error) < 3:  # Within 3cm is good enough
-                    speed = BASE_SPEED
                     led_color = strip.GREEN
-                elif error > 0:  # Too far - speed up
-                    # Gentler acceleration
-                    speed = BASE_SPEED + int(error * 0.3)
-                    speed = min(speed, 27)  # Cap reduced by 3x from 80
+                elif error > 0:  # Too far - speeding up
                     led_color = strip.CYAN
-                else:  # Too close - slow down or reverse
-                    # Gentler deceleration
-                    speed = BASE_SPEED + int(error * 0.4)
-                    speed = max(speed, -15)  # Gentle reverse max
+                else:  # Too close - slowing down
                     led_color = strip.YELLOW
                 
                 # Apply speeds using high-level methods
@@ -394,6 +360,7 @@ try:
                 else:
                     log("Calling M.stop()")
                     M.stop()
+                TRACK.robot_speed(speed_to_cm_s(speed))
                 
                 # Set LED color based on action
                 for i in range(4):
@@ -0,0 +1,71 @@
+"""
+Run a PicoGo script in the simulator (fakes.sim) on the host.
+
+    python3 simulate.py follow_grid.py --world grid --seconds 20
+    python3 simulate.py curved_obstacle_follower.py --world follow --trace run.csv
+
+Prints how fast the run went compared with real time and how the robot
+did; --trace writes the pose every 10 ms as CSV (t, x_mm, y_mm, heading).
+--profile turns on the scripts' LoopProfiler and prints its stage
+timings on the virtual clock at the end of the run.
+Edit the constants in the script (BASE_SPEED, TURN_SPEED, turn
+durations, ...) and rerun to compare settings.
+"""
+import argparse
+import contextlib
+import io
+import math
+
+import fakes
+fakes.install()
+from fakes import sim
+import Profiler
+
+WORLDS = {
+    "grid": (sim.grid_world, 480),
+    "oval": (sim.oval_world, 500),
+    "follow": (sim.follow_world, None),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("script")
+    parser.add_argument("--world", choices=sorted(WORLDS), default="grid")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--noise", type=int, default=sim.PARAMS["sensor_noise"], help="TR sensor noise sigma in ADC counts")
+    parser.add_argument("--trace", help="write the pose trace to this CSV file")
+    parser.add_argument("--verbose", action="store_true", help="show the script's own output")
+    parser.add_argument("--profile", action="store_true", help="enable the script's loop profiler")
+    args = parser.parse_args()
+
+    make_world, line_threshold = WORLDS[args.world]
+    Profiler.ENABLED = args.profile
+    simulation = sim.Simulation(make_world(), seed=args.seed, sensor_noise=args.noise)
+    out = io.StringIO()
+    if args.verbose:
+        result = simulation.run(args.script, args.seconds)
+    else:
+        with contextlib.redirect_stdout(out):
+            result = simulation.run(args.script, args.seconds)
+
+    print("%s in %s world: %.1f virtual s in %.2f wall s (%.0fx real time)" % (
+        args.script, args.world, result["virtual_s"], result["wall_s"],
+        result["virtual_s"] / max(result["wall_s"], 1e-9)))
+    print("travelled %.0f mm, final pose x=%.0f y=%.0f heading=%.0f deg, battery %.2f V" % (
+        simulation.distance_mm, simulation.x, simulation.y,
+        math.degrees(simulation.heading), simulation.voltage))
+    if line_threshold is not None:
+        below = args.world == "grid"
+        print("middle sensor over the line %.0f%% of the time, %d sensor frames read" % (
+            100 * simulation.on_line_fraction(line_threshold, below), simulation.tr_frames))
+    for prof in Profiler.instances:
+        prof.report()
+    if args.trace:
+        with open(args.trace, "w") as f:
+            f.write("t,x_mm,y_mm,heading\n")
+            for t, x, y, heading in simulation.trace:
+                f.write("%.3f,%.1f,%.1f,%.4f\n" % (t, x, y, heading))
+
+if __name__ == '__main__':
+    main()
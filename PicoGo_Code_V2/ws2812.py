@@ -1,11 +1,26 @@
 # Example using PIO to drive a set of WS2812 LEDs.
 import array, time
-from machine import Pin
+from machine import Pin, Timer
 import rp2
+import uctypes
+try:
+    from rp2 import DMA
+except ImportError:
+    DMA = None          # firmware without rp2.DMA: pixels_show() puts from the CPU
 
 # Configure the number of WS2812 LEDs.
 NUM_LEDS = 4
 PIN_NUM = 22
+SM_ID = 0               # PIO0 state machine 0
+
+# Its TX FIFO and DREQ, for pixels_show()'s DMA transfers (same on RP2040 and RP2350)
+PIO0_BASE = 0x50200000
+PIO_TXF0 = 0x010
+DREQ_PIO0_TX0 = 0
+
+WORD_US = 30            # one LED's 24 bits at 800 kHz
+FIFO_WORDS = 4          # still queued in the PIO when the DMA channel finishes
+LATCH_US = 300          # low time that latches a frame (WS2812B needs 280 us)
 
 @rp2.asm_pio(sideset_init=rp2.PIO.OUT_LOW, out_shiftdir=rp2.PIO.SHIFT_LEFT, autopull=True, pull_thresh=24)
 def ws2812():
@@ -22,19 +37,50 @@ def ws2812():
     wrap()
         
 class NeoPixel(object):
+    """
+    pixels_set() keeps colours in ar as GRB words; pixels_show() scales
+    them through a 256-entry brightness table into a preallocated
+    output array and puts that to the PIO. The table is rebuilt only when
+    brightness is assigned a new value, and pixels_show() sends nothing
+    if no pixel (nor the brightness) has changed since the last time it
+    did, so loops can call it every iteration. Change pixels through
+    pixels_set()/pixels_fill(), not by writing ar directly.
+
+    With rp2.DMA, pixels_show() hands the output array to a DMA channel
+    paced by the state machine's TX FIFO and returns once it has scaled
+    the pixels, instead of also waiting 30 us per LED for the FIFO to
+    take them. The scaling is still a Python loop over every LED, so
+    the CPU cost stays O(n). busy() is True until that frame has been
+    shifted out and held low for LATCH_US; a pixels_show() that has
+    something new to send first waits for that, so frames never run
+    together. The DMA IRQ is a hard one, so busy() also clears when
+    pixels_show() runs from a soft callback such as Animator's timer.
+    """
     def __init__(self,pin=PIN_NUM,num=NUM_LEDS,brightness=0.8):
         self.pin=pin
         self.num=num
+        self.lut = bytearray(256)   # channel value -> value scaled by brightness
+        self._brightness = None
+        self.dirty = True           # ar or brightness changed since the last put
+        self.shows = 0              # pixels_show() calls that put data
+        self.skipped = 0            # and those that had nothing new to send
         self.brightness = brightness
+        self.dma = None             # claimed by the first pixels_show()
+        self.sending = False        # DMA transfer running
+        self.tail_us = (FIFO_WORDS + 1) * WORD_US + LATCH_US   # from the channel finishing to the frame latching
+        self.sent_us = time.ticks_add(time.ticks_us(), -self.tail_us)
         
         # Create the StateMachine with the ws2812 program, outputting on pin
-        self.sm = rp2.StateMachine(0, ws2812, freq=8_000_000, sideset_base=Pin(PIN_NUM))
+        self.sm = rp2.StateMachine(SM_ID, ws2812, freq=8_000_000, sideset_base=Pin(self.pin))
 
         # Start the StateMachine, it will wait for data on its FIFO.
         self.sm.active(1)
 
         # Display a pattern on the LEDs via an array of LED RGB values.
         self.ar = array.array("I", [0 for _ in range(self.num)])
+        self.out = array.array("I", [0 for _ in range(self.num)])     # ar scaled by brightness, shifted for the PIO
+        # out's bytes, little-endian: byte 0 stays 0, then B, R, G, so each word is GRB << 8
+        self.out_bytes = uctypes.bytearray_at(uctypes.addressof(self.out), 4 * self.num)
         
         self.BLACK = (0, 0, 0)
         self.RED = (255, 0, 0)
@@ -47,17 +93,77 @@ class NeoPixel(object):
         self.COLORS = (self.BLACK, self.RED, self.YELLOW, self.GREEN, self.CYAN, self.BLUE, self.PURPLE, self.WHITE)
         
     ##########################################################################
+    @property
+    def brightness(self):
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        if value == self._brightness:
+            return
+        self._brightness = value
+        lut = self.lut
+        for v in range(256):
+            lut[v] = min(int(v * value), 255)
+        self.dirty = True
+
     def pixels_show(self):
-        dimmer_ar = array.array("I", [0 for _ in range(self.num)])
-        for i,c in enumerate(self.ar):
-            r = int(((c >> 8) & 0xFF) * self.brightness)
-            g = int(((c >> 16) & 0xFF) * self.brightness)
-            b = int((c & 0xFF) * self.brightness)
-            dimmer_ar[i] = (g<<16) + (r<<8) + b
-        self.sm.put(dimmer_ar, 8)
+        if not self.dirty:
+            self.skipped += 1
+            return
+        self.wait()             # out may still be going out
+        lut = self.lut
+        ar = self.ar
+        out = self.out_bytes    # bytes of out: no int above 2**24, so nothing allocates
+        j = 1
+        for i in range(self.num):
+            c = ar[i]
+            out[j] = lut[c & 0xFF]
+            out[j + 1] = lut[(c >> 8) & 0xFF]
+            out[j + 2] = lut[(c >> 16) & 0xFF]
+            j += 4
+        out = self.out
+        self.dirty = False
+        self.shows += 1
+        if self._claim_dma():
+            self.sending = True
+            self.dma.config(read=out, write=PIO0_BASE + PIO_TXF0 + 4 * SM_ID, count=self.num,
+                            ctrl=self.dma_ctrl, trigger=True)
+        else:
+            self.sm.put(out)
+            self.sent_us = time.ticks_us()
+
+    def _claim_dma(self):
+        if self.dma is None and DMA is not None:
+            try:
+                self.dma = DMA()
+            except (OSError, ValueError):
+                return False    # all channels taken
+            self.dma_ctrl = self.dma.pack_ctrl(size=2, inc_write=False, treq_sel=DREQ_PIO0_TX0 + SM_ID, irq_quiet=False)
+            self.dma.irq(self._dma_done, hard=True)   # a soft IRQ can't run inside a Timer callback
+        return self.dma is not None
+
+    def _dma_done(self, dma):
+        # hard IRQ: no allocation
+        self.sent_us = time.ticks_us()
+        self.sending = False
+
+    def busy(self):
+        """True until the last frame has been shifted out and latched"""
+        if self.sending:
+            return True
+        return time.ticks_diff(time.ticks_us(), self.sent_us) < self.tail_us
+
+    def wait(self):
+        """Block until busy() is False"""
+        while self.busy():
+            time.sleep_us(50)
 
     def pixels_set(self, i, color):
-        self.ar[i] = (color[1]<<16) + (color[0]<<8) + color[2]
+        c = (color[1]<<16) + (color[0]<<8) + color[2]
+        if self.ar[i] != c:
+            self.ar[i] = c
+            self.dirty = True
 
     def pixels_fill(self, color):
         for i in range(len(self.ar)):
@@ -92,6 +198,119 @@ class NeoPixel(object):
             self.pixels_show()
             time.sleep(wait)
 
+class Animator(object):
+    """
+    LED effects that run without blocking the control loop.
+
+        LEDS = Animator(strip)
+        LEDS.start_timer()                              # frames from a machine.Timer, or
+        LEDS.tick()                                     # from the loop, at most fps a second
+        LEDS.play("rainbow", period_ms=5000)
+        LEDS.play("blink", strip.RED, period_ms=400)
+
+    Effects, each repeating every period_ms:
+      solid    all pixels color
+      blink    color for the first half of the period, color2 for the rest
+      chase    width pixels of color running round a color2 background
+      rainbow  the colour wheel turning round the strip
+      pulse    color fading up from color2 and back
+
+    play() may be called every iteration with the effect the robot should
+    show: asking for the one already running changes nothing, so only a
+    real change restarts it. Frames are worked out from the time since
+    it started, so a late tick never slows an effect down. While the
+    Animator runs the strip, leave pixels_set()/pixels_show() to it.
+    """
+    def __init__(self, strip, fps=50):
+        self.strip = strip
+        self.interval_ms = 1000 // fps
+        self.next_ms = time.ticks_ms()
+        self.current = None         # (effect, name, color, color2, period_ms, width, start_ms), swapped whole
+        self.timer = None
+        self.frames = 0
+        self._frame_cb = self._timer_frame   # bound once so the timer does not allocate
+
+    def play(self, name, color=(255, 255, 255), period_ms=1000, color2=(0, 0, 0), width=1):
+        """Run effect name (see above) from now on, unless it is already running with these settings"""
+        cur = self.current
+        if (cur is not None and cur[1] == name and cur[2] == color and cur[3] == color2
+                and cur[4] == period_ms and cur[5] == width):
+            return
+        effect = getattr(self, "_" + name, None)
+        if effect is None:
+            raise ValueError("unknown effect %s" % name)
+        self.current = (effect, name, color, color2, max(period_ms, 2), width, time.ticks_ms())
+        self.next_ms = time.ticks_ms()      # show the change at the next tick
+
+    def stop(self):
+        """Stop the timer and blank the strip"""
+        self.stop_timer()
+        self.current = None
+        self.strip.pixels_fill((0, 0, 0))
+        self.strip.pixels_show()
+
+    def start_timer(self, timer_id=-1, fps=None):
+        """Draw frames from a machine.Timer instead of tick()"""
+        self.stop_timer()
+        if fps:
+            self.interval_ms = 1000 // fps
+        self.timer = Timer(timer_id, mode=Timer.PERIODIC, freq=1000 // self.interval_ms, callback=self._frame_cb)
+
+    def stop_timer(self):
+        if self.timer is not None:
+            self.timer.deinit()
+            self.timer = None
+
+    def tick(self):
+        """Draw a frame if one is due; True if it did"""
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self.next_ms) < 0:
+            return False
+        self.next_ms = time.ticks_add(now, self.interval_ms)
+        return self._draw(now)
+
+    def _timer_frame(self, t):
+        self._draw(time.ticks_ms())
+
+    def _draw(self, now):
+        cur = self.current
+        if cur is None:
+            return False
+        effect, name, color, color2, period, width, start = cur
+        effect(time.ticks_diff(now, start) % period, period, color, color2, width)
+        self.strip.pixels_show()
+        self.frames += 1
+        return True
+
+    # -- effects: draw phase ms into the period ----------------------------
+
+    def _solid(self, phase, period, color, color2, width):
+        self.strip.pixels_fill(color)
+
+    def _blink(self, phase, period, color, color2, width):
+        self.strip.pixels_fill(color if phase < period // 2 else color2)
+
+    def _chase(self, phase, period, color, color2, width):
+        strip = self.strip
+        num = strip.num
+        head = phase * num // period
+        for i in range(num):
+            strip.pixels_set(i, color if (head - i) % num < width else color2)
+
+    def _rainbow(self, phase, period, color, color2, width):
+        strip = self.strip
+        num = strip.num
+        offset = phase * 256 // period
+        for i in range(num):
+            strip.pixels_set(i, strip.wheel(((i * 256 // num) + offset) & 255))
+
+    def _pulse(self, phase, period, color, color2, width):
+        half = period // 2
+        k = phase * 256 // half if phase < half else (period - phase) * 256 // (period - half)
+        self.strip.pixels_fill((color2[0] + (color[0] - color2[0]) * k // 256,
+                                color2[1] + (color[1] - color2[1]) * k // 256,
+                                color2[2] + (color[2] - color2[2]) * k // 256))
+
 if __name__=='__main__':
     strip = NeoPixel()
     print("fills")